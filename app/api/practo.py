@@ -1,23 +1,255 @@
 import os
-import requests
-from typing import Dict, Any, Optional, List
+import logging
+import threading
+import json
+import time
+import asyncio
+import httpx
+from typing import Dict, Any, Optional, List, AsyncIterator, Awaitable, Callable, Tuple
 from dotenv import load_dotenv
 from fastapi import HTTPException
+from .practo_cache import TieredCache, cache_key, cache_ttl, get_practo_cache
+from .rate_limit import TokenBucket, get_rate_limiter
+from .resilience import (RETRY_STATUSES, CircuitOpenError, RetryPolicy, get_circuit_breaker,
+                         get_request_metrics, parse_retry_after)
 
 # Load environment variables
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+_http_client: Optional[httpx.Client] = None
+_http_client_lock = threading.Lock()
+_async_http_client: Optional[httpx.AsyncClient] = None
+
+def _http2_enabled() -> bool:
+    """HTTP/2 is used unless PRACTO_HTTP2 disables it, when the h2 package is installed"""
+    if os.getenv("PRACTO_HTTP2", "true").lower() not in ("1", "true", "yes"):
+        return False
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+def http_client_options() -> Dict[str, Any]:
+    """
+    Connection pool, timeout and protocol settings for Practo HTTP clients
+    
+    Configured with PRACTO_POOL_SIZE (max open connections, default 20),
+    PRACTO_KEEPALIVE_EXPIRY (seconds an idle connection is kept, default 30),
+    PRACTO_TIMEOUT (default 10), PRACTO_CONNECT_TIMEOUT (default 5) and PRACTO_HTTP2.
+    """
+    pool_size = int(os.getenv("PRACTO_POOL_SIZE", "20"))
+    return {
+        "limits": httpx.Limits(
+            max_connections=pool_size,
+            max_keepalive_connections=pool_size,
+            keepalive_expiry=float(os.getenv("PRACTO_KEEPALIVE_EXPIRY", "30"))
+        ),
+        "timeout": httpx.Timeout(
+            float(os.getenv("PRACTO_TIMEOUT", "10")),
+            connect=float(os.getenv("PRACTO_CONNECT_TIMEOUT", "5"))
+        ),
+        "http2": _http2_enabled(),
+    }
+
+def get_http_client() -> httpx.Client:
+    """Process-wide pooled HTTP client, so connections are kept alive across Practo calls"""
+    global _http_client
+    with _http_client_lock:
+        if _http_client is None or _http_client.is_closed:
+            options = http_client_options()
+            _http_client = httpx.Client(**options)
+            logger.info(f"Created Practo HTTP pool ({options['limits'].max_connections} connections, "
+                        f"http2={options['http2']})")
+        return _http_client
+
+def close_http_client():
+    """Close the shared HTTP client and its connections"""
+    global _http_client
+    with _http_client_lock:
+        if _http_client is not None:
+            _http_client.close()
+            _http_client = None
+
+def practo_error(e: httpx.HTTPError) -> HTTPException:
+    """Translate an HTTP client error into the HTTPException returned to the caller"""
+    if isinstance(e, httpx.HTTPStatusError):
+        if e.response.status_code == 429:
+            return HTTPException(status_code=429, detail="Rate limit exceeded for Practo API")
+        status_code = e.response.status_code
+        try:
+            error_detail = e.response.json()
+        except ValueError:
+            error_detail = e.response.text
+    elif isinstance(e, httpx.TimeoutException):
+        status_code = 504
+        error_detail = f"timed out ({type(e).__name__})"
+    else:
+        status_code = 500
+        error_detail = str(e)
+    
+    return HTTPException(status_code=status_code, detail=f"Practo API error: {error_detail}")
+
+def get_async_http_client() -> httpx.AsyncClient:
+    """Pooled async HTTP client shared by every AsyncPractoClient on the event loop"""
+    global _async_http_client
+    if _async_http_client is None or _async_http_client.is_closed:
+        options = http_client_options()
+        _async_http_client = httpx.AsyncClient(**options)
+        logger.info(f"Created async Practo HTTP pool ({options['limits'].max_connections} connections, "
+                    f"http2={options['http2']})")
+    return _async_http_client
+
+async def close_async_http_client():
+    """Close the shared async HTTP client and its connections"""
+    global _async_http_client
+    if _async_http_client is not None:
+        await _async_http_client.aclose()
+        _async_http_client = None
+
+# Practo caps search results per call
+SEARCH_PAGE_LIMIT = 50
+
+def _page_records(response: Dict[str, Any], keys: Tuple[str, ...]) -> List[Dict[str, Any]]:
+    """Records of a page: the first list found under one of the keys"""
+    for key in keys:
+        if isinstance(response.get(key), list):
+            return response[key]
+    return []
+
+def _record_key(record: Any) -> str:
+    """Identity of a record for de-duplication across pages"""
+    if isinstance(record, dict) and record.get("id") is not None:
+        return str(record["id"])
+    return json.dumps(record, sort_keys=True)
+
+async def fan_out_pages(fetch_page: Callable[[int], Awaitable[Tuple[List[Dict[str, Any]], Optional[int]]]],
+                        page_size: int, concurrency: int, rate_limiter: Optional[TokenBucket] = None,
+                        max_pages: Optional[int] = None) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Fetch pages concurrently and yield their records as pages arrive
+    
+    Pages are requested in order, at most `concurrency` at a time, each taking a
+    token from the rate limiter first. The first page that is short, or the page
+    count a response reports, ends the scan; pages beyond it are cancelled.
+    Records seen on an earlier page are skipped.
+    
+    Args:
+        fetch_page: Coroutine function returning (records, total pages or None) for a 0-based page
+        page_size: Records on a full page
+        concurrency: Maximum pages in flight
+        rate_limiter: Budget every page request takes a token from
+        max_pages: Maximum pages to fetch
+        
+    Yields:
+        Unique records, page by page in completion order
+    """
+    async def fetch(page: int):
+        if rate_limiter is not None:
+            await rate_limiter.acquire()
+        return page, await fetch_page(page)
+    
+    last_page = max_pages - 1 if max_pages else float("inf")
+    next_page = 0
+    pending = {}
+    seen = set()
+    try:
+        while True:
+            while len(pending) < max(1, concurrency) and next_page <= last_page:
+                pending[asyncio.ensure_future(fetch(next_page))] = next_page
+                next_page += 1
+            if not pending:
+                return
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in sorted(done, key=pending.get):
+                del pending[task]
+                page, (records, total_pages) = task.result()
+                if total_pages is not None:
+                    last_page = min(last_page, total_pages - 1)
+                if len(records) < page_size:
+                    last_page = min(last_page, page)
+                for record in records:
+                    key = _record_key(record)
+                    if key not in seen:
+                        seen.add(key)
+                        yield record
+            for task, page in list(pending.items()):
+                if page > last_page:
+                    task.cancel()
+                    del pending[task]
+    finally:
+        for task in pending:
+            task.cancel()
+
 class PractoClient:
     """Client for interacting with the Practo Search and Listings API"""
     
     BASE_URL = "https://api.practo.com"
     
-    def __init__(self):
+    def __init__(self, http_client: Optional[httpx.Client] = None, base_url: Optional[str] = None,
+                 cache: Optional[TieredCache] = None, rate_limiter: Optional[TokenBucket] = None):
+        """
+        Initialize the Practo client
+        
+        Args:
+            http_client: HTTP client to send requests with (defaults to the shared pooled client)
+            base_url: API root (defaults to PRACTO_BASE_URL or the public Practo API)
+            cache: Cache of meta and detail responses (defaults to the shared cache, unless PRACTO_CACHE disables it)
+            rate_limiter: Request budget (defaults to the one shared by every client in the process)
+        """
         self.client_id = os.getenv("PRACTO_CLIENT_ID")
         self.api_key = os.getenv("PRACTO_API_KEY")
         
         if not self.client_id or not self.api_key:
             raise ValueError("PRACTO_CLIENT_ID and PRACTO_API_KEY environment variables must be set")
+        
+        self.base_url = (base_url or os.getenv("PRACTO_BASE_URL") or self.BASE_URL).rstrip("/")
+        self.http = http_client or self._default_http_client()
+        self.cache = cache or get_practo_cache()
+        # Shared across clients, so one burst or outage is smoothed out for every request
+        self.rate_limiter = rate_limiter or get_rate_limiter()
+        self.breaker = get_circuit_breaker()
+        self.metrics = get_request_metrics()
+        self.retry_policy = RetryPolicy()
+        self._headers = self._get_headers()
+    
+    def _default_http_client(self) -> httpx.Client:
+        return get_http_client()
+    
+    @staticmethod
+    def _search_params(city: str, speciality: Optional[str], locality: Optional[str], searchfor: str,
+                       q: Optional[str], offset: int, limit: int, near: Optional[str], sort_by: str,
+                       filters: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Query parameters of a search request"""
+        params = {
+            "city": city,
+            "searchfor": searchfor,
+            "offset": offset,
+            "limit": limit,
+            "sort_by": sort_by
+        }
+        
+        # Add optional parameters if provided
+        if speciality:
+            params["speciality"] = speciality
+        if locality:
+            params["locality"] = locality
+        if q:
+            params["q"] = q
+        if near:
+            params["near"] = near
+        
+        # Add filters if provided
+        if filters:
+            for key, value in filters.items():
+                if isinstance(value, list):
+                    for i, item in enumerate(value):
+                        params[f"filters[{key}][{i}]"] = item
+                else:
+                    params[f"filters[{key}]"] = value
+        return params
     
     def _get_headers(self) -> Dict[str, str]:
         """Get the headers required for Practo API requests"""
@@ -27,35 +259,98 @@ class PractoClient:
             "Content-Type": "application/json"
         }
     
+    def _before_call(self, method: str):
+        """Count a call and fail fast while the circuit is open"""
+        if method not in ("GET", "POST"):
+            raise ValueError(f"Unsupported HTTP method: {method}")
+        self.metrics.count("requests")
+        try:
+            self.breaker.before_call()
+        except CircuitOpenError as e:
+            raise HTTPException(status_code=503, detail=f"Practo API unavailable: {str(e)}")
+    
+    def _retry_delay(self, error: httpx.HTTPError, method: str, retry: int) -> Optional[float]:
+        """
+        Seconds to wait before retrying a failed attempt, or None to give up
+        
+        A 429 also slows the shared rate limiter down. Only GETs are retried, on
+        throttling, gateway errors and transport failures.
+        """
+        response = error.response if isinstance(error, httpx.HTTPStatusError) else None
+        retry_after = parse_retry_after(response.headers.get("Retry-After")) if response is not None else None
+        if response is not None and response.status_code == 429:
+            self.metrics.count("throttled")
+            self.rate_limiter.throttle(retry_after)
+        if method != "GET":
+            return None
+        if response is None and not isinstance(error, httpx.TransportError):
+            return None
+        if response is not None and response.status_code not in RETRY_STATUSES:
+            return None
+        delay = self.retry_policy.delay(retry, retry_after)
+        if delay is not None:
+            self.metrics.count("retries")
+            logger.info(f"Retrying Practo request in {delay:.2f}s (retry {retry}) after: {str(error) or type(error).__name__}")
+        return delay
+    
+    def _after_call(self, error: Optional[httpx.HTTPError] = None):
+        """Report the outcome of a call to the circuit breaker and the rate limiter"""
+        if error is None:
+            self.rate_limiter.recover()
+            self.breaker.record_success()
+            return
+        self.metrics.count("failures")
+        if isinstance(error, httpx.HTTPStatusError) and error.response.status_code < 500:
+            # Client errors and throttling mean Practo is up
+            self.breaker.record_success()
+        else:
+            self.breaker.record_failure()
+    
     def _make_request(self, endpoint: str, method: str = "GET", params: Dict[str, Any] = None) -> Dict[str, Any]:
-        """Make a request to the Practo API"""
-        url = f"{self.BASE_URL}{endpoint}"
-        headers = self._get_headers()
+        """
+        Make a request to the Practo API over a pooled keep-alive connection
+        
+        Every attempt waits for the shared rate limiter. Throttled or briefly failing
+        GETs are retried with backoff, and calls fail fast while the circuit is open.
+        """
+        url = f"{self.base_url}{endpoint}"
+        self._before_call(method)
+        retry = 0
+        reported = False
         
         try:
-            if method == "GET":
-                response = requests.get(url, headers=headers, params=params)
-            elif method == "POST":
-                response = requests.post(url, headers=headers, json=params)
-            else:
-                raise ValueError(f"Unsupported HTTP method: {method}")
-            
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            if hasattr(e, 'response') and e.response is not None:
-                if e.response.status_code == 429:
-                    raise HTTPException(status_code=429, detail="Rate limit exceeded for Practo API")
-                status_code = e.response.status_code
+            while True:
+                self.metrics.record_wait(self.rate_limiter.acquire_sync())
                 try:
-                    error_detail = e.response.json()
-                except:
-                    error_detail = e.response.text
-            else:
-                status_code = 500
-                error_detail = str(e)
-            
-            raise HTTPException(status_code=status_code, detail=f"Practo API error: {error_detail}")
+                    response = self.http.request(method, url, headers=self._headers,
+                                                 params=params if method == "GET" else None,
+                                                 json=params if method == "POST" else None)
+                    response.raise_for_status()
+                    result = response.json()
+                except httpx.HTTPError as e:
+                    retry += 1
+                    delay = self._retry_delay(e, method, retry)
+                    if delay is None:
+                        reported = True
+                        self._after_call(e)
+                        raise practo_error(e)
+                    time.sleep(delay)
+                    continue
+                
+                reported = True
+                self._after_call()
+                return result
+        finally:
+            if not reported:
+                # Cancelled, or failed before Practo answered (e.g. an invalid JSON body)
+                self.breaker.release()
+    
+    def _cached_request(self, name: str, endpoint: str, params: Dict[str, Any] = None) -> Dict[str, Any]:
+        """Make a GET request for slow-changing data through the cache, with the endpoint's TTL"""
+        if self.cache is None:
+            return self._make_request(endpoint, params=params)
+        return self.cache.fetch_sync(cache_key(f"{self.base_url}{endpoint}", params), cache_ttl(name),
+                                     lambda: self._make_request(endpoint, params=params))
     
     # Doctor Details API
     def list_doctors(self, page: int = 1) -> Dict[str, Any]:
@@ -65,7 +360,7 @@ class PractoClient:
     def get_doctor(self, doctor_id: int, with_relations: bool = False) -> Dict[str, Any]:
         """Get details of a specific doctor"""
         params = {"with_relations": "true" if with_relations else "false"}
-        return self._make_request(f"/doctors/{doctor_id}", params=params)
+        return self._cached_request("doctor", f"/doctors/{doctor_id}", params=params)
     
     def get_doctor_phone_number(self, relation_id: str) -> Dict[str, Any]:
         """Get phone number for a practice doctor"""
@@ -79,7 +374,7 @@ class PractoClient:
     def get_practice(self, practice_id: int, with_doctors: bool = False) -> Dict[str, Any]:
         """Get details of a specific practice"""
         params = {"with_doctors": "true" if with_doctors else "false"}
-        return self._make_request(f"/practices/{practice_id}", params=params)
+        return self._cached_request("practice", f"/practices/{practice_id}", params=params)
     
     # Search API
     def search(self, 
@@ -108,33 +403,8 @@ class PractoClient:
             sort_by: Sort results by (practo_ranking, distance, experience, fees, recommendations)
             filters: Additional filters (qualification, min_fee, max_fee, min_time, max_time, day)
         """
-        params = {
-            "city": city,
-            "searchfor": searchfor,
-            "offset": offset,
-            "limit": limit,
-            "sort_by": sort_by
-        }
-        
-        # Add optional parameters if provided
-        if speciality:
-            params["speciality"] = speciality
-        if locality:
-            params["locality"] = locality
-        if q:
-            params["q"] = q
-        if near:
-            params["near"] = near
-        
-        # Add filters if provided
-        if filters:
-            for key, value in filters.items():
-                if isinstance(value, list):
-                    for i, item in enumerate(value):
-                        params[f"filters[{key}][{i}]"] = item
-                else:
-                    params[f"filters[{key}]"] = value
-        
+        params = self._search_params(city, speciality, locality, searchfor, q, offset, limit, near,
+                                     sort_by, filters)
         return self._make_request("/search", params=params)
     
     # Search Meta API
@@ -143,12 +413,203 @@ class PractoClient:
         params = {}
         if country_id:
             params["country_id"] = country_id
-        return self._make_request("/meta/cities", params=params)
+        return self._cached_request("cities", "/meta/cities", params=params)
     
     def get_localities_and_specialties(self, city_id: int) -> Dict[str, Any]:
         """Get localities and specialties for a city"""
-        return self._make_request(f"/meta/cities/{city_id}")
+        return self._cached_request("localities", f"/meta/cities/{city_id}")
     
     def list_countries(self) -> Dict[str, Any]:
         """List countries where Practo search service is available"""
-        return self._make_request("/meta/countries")
+        return self._cached_request("countries", "/meta/countries")
+
+class AsyncPractoClient(PractoClient):
+    """
+    Async client for the Practo Search and Listings API
+    
+    Same API as PractoClient, but every method is a coroutine awaiting the
+    shared pooled httpx.AsyncClient, so slow Practo calls never block the event loop.
+    """
+    
+    def _default_http_client(self) -> httpx.AsyncClient:
+        return get_async_http_client()
+    
+    async def _make_request(self, endpoint: str, method: str = "GET",
+                            params: Dict[str, Any] = None) -> Dict[str, Any]:
+        """Make a request to the Practo API without blocking the event loop (see PractoClient._make_request)"""
+        url = f"{self.base_url}{endpoint}"
+        self._before_call(method)
+        retry = 0
+        reported = False
+        
+        try:
+            while True:
+                self.metrics.record_wait(await self.rate_limiter.acquire())
+                try:
+                    response = await self.http.request(method, url, headers=self._headers,
+                                                       params=params if method == "GET" else None,
+                                                       json=params if method == "POST" else None)
+                    response.raise_for_status()
+                    result = response.json()
+                except httpx.HTTPError as e:
+                    retry += 1
+                    delay = self._retry_delay(e, method, retry)
+                    if delay is None:
+                        reported = True
+                        self._after_call(e)
+                        raise practo_error(e)
+                    await asyncio.sleep(delay)
+                    continue
+                
+                reported = True
+                self._after_call()
+                return result
+        finally:
+            if not reported:
+                # Cancelled, or failed before Practo answered (e.g. an invalid JSON body)
+                self.breaker.release()
+    
+    async def _cached_request(self, name: str, endpoint: str, params: Dict[str, Any] = None) -> Dict[str, Any]:
+        """Make a GET request for slow-changing data through the cache, with the endpoint's TTL"""
+        if self.cache is None:
+            return await self._make_request(endpoint, params=params)
+        return await self.cache.fetch(cache_key(f"{self.base_url}{endpoint}", params), cache_ttl(name),
+                                      lambda: self._make_request(endpoint, params=params))
+    
+    # Doctor Details API
+    async def list_doctors(self, page: int = 1) -> Dict[str, Any]:
+        """List all doctors with pagination"""
+        return await self._make_request("/doctors", params={"page": page})
+    
+    async def get_doctor(self, doctor_id: int, with_relations: bool = False) -> Dict[str, Any]:
+        """Get details of a specific doctor"""
+        params = {"with_relations": "true" if with_relations else "false"}
+        return await self._cached_request("doctor", f"/doctors/{doctor_id}", params=params)
+    
+    async def get_doctor_phone_number(self, relation_id: str) -> Dict[str, Any]:
+        """Get phone number for a practice doctor"""
+        return await self._make_request("/doctors/phone_number", params={"relation_id": relation_id})
+    
+    # Practice Details API
+    async def list_practices(self, page: int = 1) -> Dict[str, Any]:
+        """List all practices with pagination"""
+        return await self._make_request("/practices", params={"page": page})
+    
+    async def get_practice(self, practice_id: int, with_doctors: bool = False) -> Dict[str, Any]:
+        """Get details of a specific practice"""
+        params = {"with_doctors": "true" if with_doctors else "false"}
+        return await self._cached_request("practice", f"/practices/{practice_id}", params=params)
+    
+    # Search API
+    async def search(self, 
+                     city: str, 
+                     speciality: Optional[str] = None,
+                     locality: Optional[str] = None,
+                     searchfor: str = "specialization",
+                     q: Optional[str] = None,
+                     offset: int = 0,
+                     limit: int = 10,
+                     near: Optional[str] = None,
+                     sort_by: str = "practo_ranking",
+                     filters: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Search for doctors/practices within a city (see PractoClient.search)"""
+        params = self._search_params(city, speciality, locality, searchfor, q, offset, limit, near,
+                                     sort_by, filters)
+        return await self._make_request("/search", params=params)
+    
+    # Search Meta API
+    async def list_cities(self, country_id: Optional[int] = None) -> Dict[str, Any]:
+        """List cities where Practo search service is available"""
+        params = {}
+        if country_id:
+            params["country_id"] = country_id
+        return await self._cached_request("cities", "/meta/cities", params=params)
+    
+    async def get_localities_and_specialties(self, city_id: int) -> Dict[str, Any]:
+        """Get localities and specialties for a city"""
+        return await self._cached_request("localities", f"/meta/cities/{city_id}")
+    
+    async def list_countries(self) -> Dict[str, Any]:
+        """List countries where Practo search service is available"""
+        return await self._cached_request("countries", "/meta/countries")
+    
+    # Fan-out pagination
+    async def iter_search(self,
+                          city: str,
+                          speciality: Optional[str] = None,
+                          locality: Optional[str] = None,
+                          searchfor: str = "specialization",
+                          q: Optional[str] = None,
+                          near: Optional[str] = None,
+                          sort_by: str = "practo_ranking",
+                          filters: Optional[Dict[str, Any]] = None,
+                          max_results: Optional[int] = None,
+                          concurrency: Optional[int] = None,
+                          rate_limiter: Optional[TokenBucket] = None) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream every search result, fetching pages of 50 concurrently
+        
+        Args:
+            city, speciality, locality, searchfor, q, near, sort_by, filters: As in search
+            max_results: Stop after this many results (defaults to all of them)
+            concurrency: Pages in flight (defaults to PRACTO_FANOUT_CONCURRENCY or 8)
+            rate_limiter: Budget of this scan, on top of the shared one every request takes a token from
+            
+        Yields:
+            Unique results as their pages arrive
+        """
+        keys = (searchfor + "s", "doctors", "practices", "results")
+        
+        async def fetch_page(page: int):
+            params = self._search_params(city, speciality, locality, searchfor, q, page * SEARCH_PAGE_LIMIT,
+                                         SEARCH_PAGE_LIMIT, near, sort_by, filters)
+            response = await self._make_request("/search", params=params)
+            total = response.get("total")
+            return (_page_records(response, keys),
+                    -(-int(total) // SEARCH_PAGE_LIMIT) if isinstance(total, int) else None)
+        
+        max_pages = -(-max_results // SEARCH_PAGE_LIMIT) if max_results else None
+        count = 0
+        async for record in self._fan_out(fetch_page, SEARCH_PAGE_LIMIT, concurrency, rate_limiter, max_pages):
+            yield record
+            count += 1
+            if max_results and count >= max_results:
+                return
+    
+    async def iter_doctors(self, max_pages: Optional[int] = None, concurrency: Optional[int] = None,
+                           rate_limiter: Optional[TokenBucket] = None) -> AsyncIterator[Dict[str, Any]]:
+        """Stream every doctor, fetching pages concurrently (see iter_search)"""
+        async for record in self._iter_listing("/doctors", "doctors", max_pages, concurrency, rate_limiter):
+            yield record
+    
+    async def iter_practices(self, max_pages: Optional[int] = None, concurrency: Optional[int] = None,
+                             rate_limiter: Optional[TokenBucket] = None) -> AsyncIterator[Dict[str, Any]]:
+        """Stream every practice, fetching pages concurrently (see iter_search)"""
+        async for record in self._iter_listing("/practices", "practices", max_pages, concurrency, rate_limiter):
+            yield record
+    
+    async def _iter_listing(self, endpoint: str, key: str, max_pages: Optional[int], concurrency: Optional[int],
+                            rate_limiter: Optional[TokenBucket]) -> AsyncIterator[Dict[str, Any]]:
+        """Stream a paginated listing, sizing pages from the first one"""
+        first = await self._make_request(endpoint, params={"page": 1})
+        records = _page_records(first, (key, "results"))
+        if not records:
+            return
+        total_pages = first.get("total_pages")
+        
+        async def fetch_page(page: int):
+            response = first if page == 0 else await self._make_request(endpoint, params={"page": page + 1})
+            return _page_records(response, (key, "results")), total_pages
+        
+        async for record in self._fan_out(fetch_page, len(records), concurrency, rate_limiter, max_pages):
+            yield record
+    
+    def _fan_out(self, fetch_page, page_size: int, concurrency: Optional[int], rate_limiter: Optional[TokenBucket],
+                 max_pages: Optional[int]) -> AsyncIterator[Dict[str, Any]]:
+        return fan_out_pages(
+            fetch_page,
+            page_size,
+            concurrency or int(os.getenv("PRACTO_FANOUT_CONCURRENCY", "8")),
+            rate_limiter,
+            max_pages
+        )
@@ -0,0 +1,303 @@
+import os
+import json
+import time
+import asyncio
+import logging
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Seconds a response is fresh, per endpoint; overridden with PRACTO_CACHE_TTL_<NAME>
+DEFAULT_TTLS = {
+    "countries": 86400,
+    "cities": 86400,
+    "localities": 86400,
+    "doctor": 3600,
+    "practice": 3600,
+}
+
+_shared_cache: Optional["TieredCache"] = None
+_shared_cache_lock = threading.Lock()
+
+def cache_ttl(name: str) -> float:
+    """Fresh lifetime of an endpoint's responses"""
+    return float(os.getenv(f"PRACTO_CACHE_TTL_{name.upper()}", str(DEFAULT_TTLS[name])))
+
+def cache_key(endpoint: str, params: Optional[Dict[str, Any]] = None) -> str:
+    """Key of a request: its endpoint and sorted query parameters"""
+    if not params:
+        return endpoint
+    return f"{endpoint}?{json.dumps(params, sort_keys=True, separators=(',', ':'))}"
+
+def get_practo_cache() -> Optional["TieredCache"]:
+    """
+    Process-wide Practo response cache, or None when PRACTO_CACHE disables it
+
+    Configured with PRACTO_CACHE_SIZE (in-memory entries, default 2048),
+    PRACTO_CACHE_PATH (SQLite file of the disk tier; unset keeps only the memory
+    tier) and PRACTO_CACHE_STALE (fraction of the TTL a stale entry is still
+    served while it is refreshed, default 1.0).
+    """
+    global _shared_cache
+    if os.getenv("PRACTO_CACHE", "true").lower() not in ("1", "true", "yes"):
+        return None
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            _shared_cache = TieredCache(
+                max_size=int(os.getenv("PRACTO_CACHE_SIZE", "2048")),
+                path=os.getenv("PRACTO_CACHE_PATH") or None,
+                stale_factor=float(os.getenv("PRACTO_CACHE_STALE", "1.0"))
+            )
+        return _shared_cache
+
+class _Flight:
+    """A fetch in progress in a thread, which other threads missing the same key wait for"""
+    def __init__(self):
+        self.done = threading.Event()
+        self.value: Any = None
+        self.error: Optional[BaseException] = None
+
+class TieredCache:
+    """
+    Two-tier cache of slow-changing API responses
+
+    An in-memory LRU sits in front of an optional SQLite file shared by workers
+    and kept across restarts. Entries are fresh for the TTL passed with each
+    lookup; for `stale_factor` times the TTL after that they are still served
+    while one background fetch refreshes them. Concurrent misses for a key share
+    a single fetch. Failed fetches are not cached.
+    """
+    def __init__(self, max_size: int = 2048, path: Optional[str] = None, stale_factor: float = 1.0):
+        """
+        Initialize the cache
+
+        Args:
+            max_size: Maximum in-memory entries (0 disables the memory tier)
+            path: SQLite file of the disk tier (None disables it)
+            stale_factor: Fraction of the TTL a stale entry is served while it is refreshed
+        """
+        self.max_size = max_size
+        self.path = path
+        self.stale_factor = stale_factor
+        self.hits = 0
+        self.disk_hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._flights: Dict[str, _Flight] = {}
+        self._async_flights: Dict[str, asyncio.Future] = {}
+        self._background = set()
+        self._db: Optional[sqlite3.Connection] = None
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("CREATE TABLE IF NOT EXISTS responses "
+                             "(key TEXT PRIMARY KEY, fetched_at REAL NOT NULL, value TEXT NOT NULL)")
+
+    def _lookup(self, key: str) -> Optional[Tuple[float, Any]]:
+        """(fetch time, value) of a key from memory, then disk"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry
+            if self._db is None:
+                return None
+            row = self._db.execute("SELECT fetched_at, value FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            entry = (row[0], json.loads(row[1]))
+            self._remember(key, entry)
+            self.disk_hits += 1
+            return entry
+
+    def _remember(self, key: str, entry: Tuple[float, Any]):
+        """Put an entry in the memory tier (caller holds the lock)"""
+        if self.max_size <= 0:
+            return
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def put(self, key: str, value: Any):
+        """Store a freshly fetched value in both tiers"""
+        entry = (time.time(), value)
+        with self._lock:
+            self._remember(key, entry)
+            if self._db is not None:
+                self._db.execute("INSERT OR REPLACE INTO responses (key, fetched_at, value) VALUES (?, ?, ?)",
+                                 (key, entry[0], json.dumps(value)))
+
+    def _state(self, key: str, ttl: float) -> Tuple[Optional[Any], bool]:
+        """
+        Classify a key for a lookup
+
+        Returns:
+            (value, stale): the value is None on a miss or once it is too stale to serve
+        """
+        entry = self._lookup(key)
+        if entry is None:
+            return None, False
+        age = time.time() - entry[0]
+        if age < ttl:
+            return entry[1], False
+        if age < ttl * (1 + self.stale_factor):
+            return entry[1], True
+        return None, False
+
+    def _count(self, counter: str):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    async def fetch(self, key: str, ttl: float, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Return a cached value, fetching it on a miss (async callers)
+
+        Args:
+            key: Cache key
+            ttl: Seconds a value is fresh
+            fetch: Coroutine function fetching the value
+
+        Returns:
+            The cached or fetched value
+        """
+        value, stale = self._state(key, ttl)
+        if value is not None:
+            if stale:
+                self._count("stale_hits")
+                if key not in self._async_flights:
+                    task = asyncio.ensure_future(self._fetch_async(key, fetch, self._start_flight(key)))
+                    self._background.add(task)
+                    task.add_done_callback(self._refreshed)
+            else:
+                self._count("hits")
+            return value
+
+        self._count("misses")
+        flight = self._async_flights.get(key)
+        if flight is not None:
+            return await asyncio.shield(flight)
+        return await self._fetch_async(key, fetch, self._start_flight(key))
+
+    def _start_flight(self, key: str) -> asyncio.Future:
+        """Register the fetch of a key, so lookups missing it until it finishes wait for it"""
+        flight = self._async_flights[key] = asyncio.get_running_loop().create_future()
+        return flight
+
+    async def _fetch_async(self, key: str, fetch: Callable[[], Awaitable[Any]], flight: asyncio.Future) -> Any:
+        """Fetch and store a value, resolving its flight for the lookups waiting on it"""
+        try:
+            value = await fetch()
+            self.put(key, value)
+            flight.set_result(value)
+            return value
+        except asyncio.CancelledError:
+            flight.cancel()
+            raise
+        except BaseException as e:
+            flight.set_exception(e)
+            # Retrieved here so an unawaited flight does not log "exception was never retrieved"
+            flight.exception()
+            raise
+        finally:
+            del self._async_flights[key]
+
+    def _refreshed(self, task: asyncio.Task):
+        """Done callback of a background refresh"""
+        self._background.discard(task)
+        if task.cancelled():
+            return
+        if task.exception() is not None:
+            logger.warning(f"Background refresh failed, serving stale data: {task.exception()}")
+        else:
+            self._count("refreshes")
+
+    def fetch_sync(self, key: str, ttl: float, fetch: Callable[[], Any]) -> Any:
+        """
+        Return a cached value, fetching it on a miss (threaded callers)
+
+        Args:
+            key: Cache key
+            ttl: Seconds a value is fresh
+            fetch: Function fetching the value
+
+        Returns:
+            The cached or fetched value
+        """
+        value, stale = self._state(key, ttl)
+        if value is not None:
+            if stale:
+                self._count("stale_hits")
+                flight, leader = self._join_flight(key)
+                if leader:
+                    threading.Thread(target=self._refresh_sync, args=(key, fetch, flight), daemon=True).start()
+            else:
+                self._count("hits")
+            return value
+
+        self._count("misses")
+        flight, leader = self._join_flight(key)
+        if leader:
+            self._run_flight(key, fetch, flight)
+        else:
+            flight.done.wait()
+        if flight.error is not None:
+            raise flight.error
+        return flight.value
+
+    def _join_flight(self, key: str) -> Tuple[_Flight, bool]:
+        """The fetch in progress for a key, and whether the caller has to run it"""
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None:
+                return flight, False
+            flight = self._flights[key] = _Flight()
+            return flight, True
+
+    def _run_flight(self, key: str, fetch: Callable[[], Any], flight: _Flight):
+        try:
+            flight.value = fetch()
+            self.put(key, flight.value)
+        except BaseException as e:
+            flight.error = e
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+
+    def _refresh_sync(self, key: str, fetch: Callable[[], Any], flight: _Flight):
+        self._run_flight(key, fetch, flight)
+        if flight.error is not None:
+            logger.warning(f"Background refresh failed, serving stale data: {flight.error}")
+        else:
+            self._count("refreshes")
+
+    def clear(self):
+        """Drop every entry from both tiers"""
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM responses")
+
+    def stats(self) -> Dict[str, Any]:
+        """Entry count and hit/miss counters"""
+        with self._lock:
+            lookups = self.hits + self.stale_hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "disk": self.path,
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "refreshes": self.refreshes,
+                "hit_ratio": round((self.hits + self.stale_hits) / lookups, 4) if lookups else 0.0
+            }
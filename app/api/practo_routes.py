@@ -1,12 +1,37 @@
+import os
+import json
+import asyncio
 from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from typing import Dict, Any, Optional, List
 from pydantic import BaseModel
-from .practo import PractoClient
+from .practo import AsyncPractoClient
+from .practo_cache import get_practo_cache
+from .rate_limit import get_rate_limiter
+from .resilience import get_circuit_breaker, get_request_metrics
+
+_concurrency_limit: Optional[asyncio.Semaphore] = None
+
+# Dependency bounding the Practo calls in flight, so a burst queues here instead of piling onto Practo
+async def limit_concurrency():
+    global _concurrency_limit
+    if _concurrency_limit is None:
+        _concurrency_limit = asyncio.Semaphore(int(os.getenv("PRACTO_CONCURRENCY", "32")))
+    try:
+        await asyncio.wait_for(_concurrency_limit.acquire(),
+                               timeout=float(os.getenv("PRACTO_QUEUE_TIMEOUT", "10")))
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=503, detail="Too many concurrent Practo requests, try again later")
+    try:
+        yield
+    finally:
+        _concurrency_limit.release()
 
 # Create router
 router = APIRouter(
     prefix="/api/practo",
     tags=["practo"],
+    dependencies=[Depends(limit_concurrency)],
     responses={404: {"description": "Not found"}},
 )
 
@@ -19,56 +44,80 @@ class FilterRequest(BaseModel):
     max_time: Optional[str] = None
     day: Optional[List[str]] = None
 
-# Dependency to get Practo client
+_practo_client: Optional[AsyncPractoClient] = None
+
+# Dependency to get Practo client, shared across requests so connections are reused
 def get_practo_client():
-    try:
-        return PractoClient()
-    except ValueError as e:
-        raise HTTPException(status_code=503, detail=f"Practo client not initialized: {str(e)}")
+    global _practo_client
+    if _practo_client is None:
+        try:
+            _practo_client = AsyncPractoClient()
+        except ValueError as e:
+            raise HTTPException(status_code=503, detail=f"Practo client not initialized: {str(e)}")
+    return _practo_client
+
+def build_filters(qualification: Optional[str], min_fee: Optional[int], max_fee: Optional[int],
+                  min_time: Optional[str], max_time: Optional[str], day: Optional[List[str]]) -> Dict[str, Any]:
+    """Construct the search filters dictionary from query parameters"""
+    filters = {}
+    if qualification:
+        filters["qualification"] = qualification
+    if min_fee:
+        filters["min_fee"] = min_fee
+    if max_fee:
+        filters["max_fee"] = max_fee
+    if min_time:
+        filters["min_time"] = min_time
+    if max_time:
+        filters["max_time"] = max_time
+    if day:
+        filters["day"] = day
+    return filters
 
 # Doctor Details API routes
 @router.get("/doctors")
 async def list_doctors(
     page: int = 1,
-    client: PractoClient = Depends(get_practo_client)
+    client: AsyncPractoClient = Depends(get_practo_client)
 ):
     """List all doctors with pagination"""
-    return client.list_doctors(page=page)
+    return await client.list_doctors(page=page)
+
+# Registered before /doctors/{doctor_id}, which would otherwise match it
+@router.get("/doctors/phone_number")
+async def get_doctor_phone_number(
+    relation_id: str,
+    client: AsyncPractoClient = Depends(get_practo_client)
+):
+    """Get phone number for a practice doctor"""
+    return await client.get_doctor_phone_number(relation_id=relation_id)
 
 @router.get("/doctors/{doctor_id}")
 async def get_doctor(
     doctor_id: int,
     with_relations: bool = False,
-    client: PractoClient = Depends(get_practo_client)
+    client: AsyncPractoClient = Depends(get_practo_client)
 ):
     """Get details of a specific doctor"""
-    return client.get_doctor(doctor_id=doctor_id, with_relations=with_relations)
-
-@router.get("/doctors/phone_number")
-async def get_doctor_phone_number(
-    relation_id: str,
-    client: PractoClient = Depends(get_practo_client)
-):
-    """Get phone number for a practice doctor"""
-    return client.get_doctor_phone_number(relation_id=relation_id)
+    return await client.get_doctor(doctor_id=doctor_id, with_relations=with_relations)
 
 # Practice Details API routes
 @router.get("/practices")
 async def list_practices(
     page: int = 1,
-    client: PractoClient = Depends(get_practo_client)
+    client: AsyncPractoClient = Depends(get_practo_client)
 ):
     """List all practices with pagination"""
-    return client.list_practices(page=page)
+    return await client.list_practices(page=page)
 
 @router.get("/practices/{practice_id}")
 async def get_practice(
     practice_id: int,
     with_doctors: bool = False,
-    client: PractoClient = Depends(get_practo_client)
+    client: AsyncPractoClient = Depends(get_practo_client)
 ):
     """Get details of a specific practice"""
-    return client.get_practice(practice_id=practice_id, with_doctors=with_doctors)
+    return await client.get_practice(practice_id=practice_id, with_doctors=with_doctors)
 
 # Search API routes
 @router.get("/search")
@@ -88,7 +137,7 @@ async def search(
     min_time: Optional[str] = Query(None),
     max_time: Optional[str] = Query(None),
     day: Optional[List[str]] = Query(None),
-    client: PractoClient = Depends(get_practo_client)
+    client: AsyncPractoClient = Depends(get_practo_client)
 ):
     """
     Search for doctors/practices within a city
@@ -104,22 +153,9 @@ async def search(
     - **sort_by**: Sort results by (practo_ranking, distance, experience, fees, recommendations)
     - **filters**: Additional filters (qualification, min_fee, max_fee, min_time, max_time, day)
     """
-    # Construct filters dictionary from query parameters
-    filters = {}
-    if qualification:
-        filters["qualification"] = qualification
-    if min_fee:
-        filters["min_fee"] = min_fee
-    if max_fee:
-        filters["max_fee"] = max_fee
-    if min_time:
-        filters["min_time"] = min_time
-    if max_time:
-        filters["max_time"] = max_time
-    if day:
-        filters["day"] = day
+    filters = build_filters(qualification, min_fee, max_fee, min_time, max_time, day)
     
-    return client.search(
+    return await client.search(
         city=city,
         speciality=speciality,
         locality=locality,
@@ -132,26 +168,90 @@ async def search(
         filters=filters if filters else None
     )
 
+@router.get("/search/stream")
+async def search_stream(
+    city: str,
+    speciality: Optional[str] = None,
+    locality: Optional[str] = None,
+    searchfor: str = "specialization",
+    q: Optional[str] = None,
+    near: Optional[str] = None,
+    sort_by: str = "practo_ranking",
+    max_results: Optional[int] = Query(None, ge=1),
+    concurrency: Optional[int] = Query(None, ge=1, le=32),
+    qualification: Optional[str] = Query(None),
+    min_fee: Optional[int] = Query(None),
+    max_fee: Optional[int] = Query(None),
+    min_time: Optional[str] = Query(None),
+    max_time: Optional[str] = Query(None),
+    day: Optional[List[str]] = Query(None),
+    client: AsyncPractoClient = Depends(get_practo_client)
+):
+    """
+    Stream every search result as NDJSON, one result per line
+    
+    Pages of 50 are fetched concurrently within the shared Practo rate budget, and
+    results are written as their pages arrive, de-duplicated.
+    
+    - **max_results**: Stop after this many results
+    - **concurrency**: Pages fetched at once (defaults to PRACTO_FANOUT_CONCURRENCY)
+    - Other parameters as in /search
+    """
+    filters = build_filters(qualification, min_fee, max_fee, min_time, max_time, day)
+    results = client.iter_search(
+        city=city,
+        speciality=speciality,
+        locality=locality,
+        searchfor=searchfor,
+        q=q,
+        near=near,
+        sort_by=sort_by,
+        filters=filters if filters else None,
+        max_results=max_results,
+        concurrency=concurrency
+    )
+    
+    async def lines():
+        try:
+            async for record in results:
+                yield json.dumps(record, ensure_ascii=False) + "\n"
+        except HTTPException as e:
+            # Headers are already sent, so the error becomes the last line
+            yield json.dumps({"error": e.detail, "status_code": e.status_code}) + "\n"
+    
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
 # Search Meta API routes
 @router.get("/meta/cities")
 async def list_cities(
     country_id: Optional[int] = None,
-    client: PractoClient = Depends(get_practo_client)
+    client: AsyncPractoClient = Depends(get_practo_client)
 ):
     """List cities where Practo search service is available"""
-    return client.list_cities(country_id=country_id)
+    return await client.list_cities(country_id=country_id)
 
 @router.get("/meta/cities/{city_id}")
 async def get_localities_and_specialties(
     city_id: int,
-    client: PractoClient = Depends(get_practo_client)
+    client: AsyncPractoClient = Depends(get_practo_client)
 ):
     """Get localities and specialties for a city"""
-    return client.get_localities_and_specialties(city_id=city_id)
+    return await client.get_localities_and_specialties(city_id=city_id)
 
 @router.get("/meta/countries")
 async def list_countries(
-    client: PractoClient = Depends(get_practo_client)
+    client: AsyncPractoClient = Depends(get_practo_client)
 ):
     """List countries where Practo search service is available"""
-    return client.list_countries()
+    return await client.list_countries()
+
+@router.get("/metrics")
+async def practo_metrics():
+    """Request, retry and rate limiter counters, circuit breaker state and cache hit ratios"""
+    cache = get_practo_cache()
+    return {
+        "requests": get_request_metrics().stats(),
+        "rate_limiter": get_rate_limiter().stats(),
+        "circuit_breaker": get_circuit_breaker().stats(),
+        "cache": cache.stats() if cache is not None else None
+    }
@@ -0,0 +1,132 @@
+import os
+import time
+import asyncio
+import threading
+from typing import Any, Dict, Optional
+
+_shared_bucket: Optional["TokenBucket"] = None
+_shared_bucket_lock = threading.Lock()
+
+def get_rate_limiter() -> "TokenBucket":
+    """
+    Process-wide request budget for Practo
+
+    Configured with PRACTO_RATE_LIMIT (requests per second, default 10) and
+    PRACTO_RATE_BURST (requests allowed at once after an idle period, default 20).
+    """
+    global _shared_bucket
+    with _shared_bucket_lock:
+        if _shared_bucket is None:
+            _shared_bucket = TokenBucket(
+                rate=float(os.getenv("PRACTO_RATE_LIMIT", "10")),
+                burst=int(os.getenv("PRACTO_RATE_BURST", "20"))
+            )
+        return _shared_bucket
+
+class TokenBucket:
+    """
+    Adaptive token bucket rate limiter for async and threaded callers
+
+    Tokens accrue at `rate` per second up to `burst`; every request takes one,
+    waiting until it is available. Waiters are served in arrival order.
+
+    When the upstream throttles anyway, throttle() halves the rate (down to
+    `min_rate`) and pauses the bucket; every successful request then wins back
+    a twentieth of the configured rate, so the rate settles just below the
+    upstream's actual limit.
+    """
+    def __init__(self, rate: float, burst: int = 1, min_rate: Optional[float] = None):
+        """
+        Initialize the bucket, full
+
+        Args:
+            rate: Tokens added per second
+            burst: Maximum tokens held
+            min_rate: Lowest rate throttling reduces to (defaults to a tenth of the rate)
+        """
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.max_rate = rate
+        self.rate = rate
+        self.min_rate = min_rate or rate / 10
+        self.burst = max(1, burst)
+        self.throttles = 0
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        # Guards the token count, which threads and other event loops may share
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        """Add the tokens accrued since the last update (caller holds the lock)"""
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _reserve(self) -> float:
+        """Take a token, possibly going into debt, and return the seconds until it is covered"""
+        with self._lock:
+            self._refill()
+            self._tokens -= 1
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    def throttle(self, pause: Optional[float] = None):
+        """
+        Slow down after the upstream rejected a request for exceeding its rate limit
+
+        Args:
+            pause: Seconds the upstream asked to wait (Retry-After); no token is handed out before then
+        """
+        with self._lock:
+            self._refill()
+            self.rate = max(self.min_rate, self.rate / 2)
+            self.throttles += 1
+            if pause:
+                self._tokens = min(self._tokens, -pause * self.rate)
+
+    def recover(self):
+        """Raise the rate back towards the configured one after a successful request"""
+        if self.rate >= self.max_rate:
+            return
+        with self._lock:
+            self._refill()
+            self.rate = min(self.max_rate, self.rate + self.max_rate / 20)
+
+    def acquire_sync(self) -> float:
+        """
+        Wait for a token, blocking the calling thread
+
+        Returns:
+            Seconds waited
+        """
+        wait = self._reserve()
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    async def acquire(self) -> float:
+        """
+        Wait for a token
+
+        Returns:
+            Seconds waited
+        """
+        wait = self._reserve()
+        if wait > 0:
+            try:
+                await asyncio.sleep(wait)
+            except asyncio.CancelledError:
+                # Give the reserved token back so a cancelled request does not delay the others
+                with self._lock:
+                    self._tokens += 1
+                raise
+        return wait
+
+    def stats(self) -> Dict[str, Any]:
+        """Current and configured rate, and how often the upstream throttled"""
+        with self._lock:
+            return {
+                "rate": round(self.rate, 3),
+                "max_rate": self.max_rate,
+                "burst": self.burst,
+                "throttles": self.throttles
+            }
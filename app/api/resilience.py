@@ -0,0 +1,209 @@
+import os
+import time
+import random
+import logging
+import threading
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+_shared: Dict[str, Any] = {}
+_shared_lock = threading.Lock()
+
+def get_circuit_breaker() -> "CircuitBreaker":
+    """Process-wide circuit breaker for Practo"""
+    with _shared_lock:
+        if "breaker" not in _shared:
+            _shared["breaker"] = CircuitBreaker()
+        return _shared["breaker"]
+
+def get_request_metrics() -> "RequestMetrics":
+    """Process-wide Practo request metrics"""
+    with _shared_lock:
+        if "metrics" not in _shared:
+            _shared["metrics"] = RequestMetrics()
+        return _shared["metrics"]
+
+# Statuses worth retrying: throttled, or the upstream (or a proxy in front of it) is briefly unavailable
+RETRY_STATUSES = {429, 502, 503, 504}
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header, given in seconds or as an HTTP date"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+class RetryPolicy:
+    """
+    Exponential backoff with full jitter, honouring Retry-After
+    """
+    def __init__(self, max_retries: Optional[int] = None, base_delay: Optional[float] = None,
+                 max_delay: Optional[float] = None, max_retry_after: Optional[float] = None):
+        """
+        Initialize the policy
+
+        Args:
+            max_retries: Retries after the first attempt (defaults to PRACTO_MAX_RETRIES or 3)
+            base_delay: Backoff of the first retry, doubled for each one after
+                (defaults to PRACTO_RETRY_BASE_DELAY or 0.5)
+            max_delay: Longest backoff (defaults to PRACTO_RETRY_MAX_DELAY or 8)
+            max_retry_after: Longest Retry-After waited for; a longer one fails the request
+                (defaults to PRACTO_MAX_RETRY_AFTER or 30)
+        """
+        self.max_retries = max_retries if max_retries is not None else int(os.getenv("PRACTO_MAX_RETRIES", "3"))
+        self.base_delay = base_delay or float(os.getenv("PRACTO_RETRY_BASE_DELAY", "0.5"))
+        self.max_delay = max_delay or float(os.getenv("PRACTO_RETRY_MAX_DELAY", "8"))
+        self.max_retry_after = max_retry_after or float(os.getenv("PRACTO_MAX_RETRY_AFTER", "30"))
+
+    def delay(self, retry: int, retry_after: Optional[float] = None) -> Optional[float]:
+        """
+        Seconds to wait before a retry
+
+        Args:
+            retry: Retry number, from 1
+            retry_after: Seconds the upstream asked to wait
+
+        Returns:
+            The delay, or None when the request should not be retried
+        """
+        if retry > self.max_retries:
+            return None
+        if retry_after is not None:
+            if retry_after > self.max_retry_after:
+                return None
+            # Jitter on top, so clients told the same Retry-After do not return at once
+            return retry_after + random.uniform(0, self.base_delay)
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (retry - 1)))
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an upstream whose circuit is open"""
+
+class CircuitBreaker:
+    """
+    Circuit breaker over consecutive upstream failures
+
+    After `failure_threshold` failures in a row the circuit opens and calls fail
+    fast for `reset_timeout` seconds. Then one trial call is let through
+    (half-open): success closes the circuit, failure opens it again.
+    Thread-safe.
+    """
+    def __init__(self, failure_threshold: Optional[int] = None, reset_timeout: Optional[float] = None):
+        """
+        Initialize the breaker, closed
+
+        Args:
+            failure_threshold: Consecutive failures that open the circuit
+                (defaults to PRACTO_BREAKER_THRESHOLD or 5)
+            reset_timeout: Seconds the circuit stays open before a trial call
+                (defaults to PRACTO_BREAKER_RESET or 30)
+        """
+        self.failure_threshold = failure_threshold or int(os.getenv("PRACTO_BREAKER_THRESHOLD", "5"))
+        self.reset_timeout = reset_timeout or float(os.getenv("PRACTO_BREAKER_RESET", "30"))
+        self.state = "closed"
+        self.failures = 0
+        self.opened = 0
+        self.rejected = 0
+        self._opened_at = 0.0
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    def before_call(self):
+        """
+        Let a call through, or raise CircuitOpenError
+
+        Every call let through must be followed by record_success or record_failure.
+        """
+        with self._lock:
+            if self.state == "open":
+                if time.monotonic() - self._opened_at < self.reset_timeout:
+                    self.rejected += 1
+                    raise CircuitOpenError(f"Circuit open after {self.failures} consecutive failures")
+                self.state = "half-open"
+            if self.state == "half-open":
+                if self._trial_running:
+                    self.rejected += 1
+                    raise CircuitOpenError("Circuit half-open, waiting for the trial call")
+                self._trial_running = True
+
+    def release(self):
+        """End a call let through without an outcome (it was cancelled or failed locally)"""
+        with self._lock:
+            self._trial_running = False
+
+    def record_success(self):
+        with self._lock:
+            if self.state != "closed":
+                logger.info("Circuit closed, upstream recovered")
+            self.state = "closed"
+            self.failures = 0
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial_running = False
+            if self.state == "half-open" or (self.state == "closed" and self.failures >= self.failure_threshold):
+                logger.warning(f"Circuit opened after {self.failures} consecutive failures")
+                self.state = "open"
+                self.opened += 1
+                self._opened_at = time.monotonic()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "state": self.state,
+                "consecutive_failures": self.failures,
+                "opened": self.opened,
+                "rejected": self.rejected
+            }
+
+class RequestMetrics:
+    """
+    Counters of upstream requests, retries and rate limiter waits
+    """
+    def __init__(self):
+        self.requests = 0
+        self.attempts = 0
+        self.retries = 0
+        self.throttled = 0
+        self.failures = 0
+        self.limiter_waits = 0
+        self.limiter_wait_seconds = 0.0
+        self.limiter_max_wait = 0.0
+        self._lock = threading.Lock()
+
+    def count(self, counter: str, amount: int = 1):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + amount)
+
+    def record_wait(self, seconds: float):
+        """Record one rate limiter acquisition"""
+        with self._lock:
+            self.attempts += 1
+            if seconds > 0:
+                self.limiter_waits += 1
+                self.limiter_wait_seconds += seconds
+                self.limiter_max_wait = max(self.limiter_max_wait, seconds)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "attempts": self.attempts,
+                "retries": self.retries,
+                "throttled": self.throttled,
+                "failures": self.failures,
+                "limiter_waits": self.limiter_waits,
+                "limiter_wait_seconds": round(self.limiter_wait_seconds, 3),
+                "limiter_avg_wait_ms": round(1000 * self.limiter_wait_seconds / self.attempts, 3)
+                if self.attempts else 0.0,
+                "limiter_max_wait_ms": round(1000 * self.limiter_max_wait, 3)
+            }
@@ -0,0 +1,272 @@
+"""
+Okapi BM25 lexical index for the sexual wellness vector database
+
+Catches what dense embeddings miss on short keyword queries (drug names, STI
+abbreviations). Like the vector index, it has an immutable base written with
+each published version and memory-mapped by every worker, plus an in-memory
+delta for documents added since, scored together with corpus-wide statistics.
+"""
+
+import os
+import re
+import json
+import math
+from array import array
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+import numpy as np
+
+from app.vector_storage import CorruptDatabaseError, map_file
+
+# Words, keeping Devanagari vowel signs attached so Hindi words are not split
+TOKEN_PATTERN = re.compile(r"[\w\u0900-\u097F]+")
+
+TERMS_FILE = "bm25_terms.json"
+IDS_FILE = "bm25_ids.bin"
+TFS_FILE = "bm25_tfs.bin"
+LENGTHS_FILE = "bm25_lengths.bin"
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens of a text"""
+    return TOKEN_PATTERN.findall(text.lower())
+
+def document_text(doc: Mapping[str, Any]) -> str:
+    """Text of a document that is indexed lexically"""
+    return f"{doc['question']} {doc['answer']}"
+
+class BM25Index:
+    """
+    Okapi BM25 inverted index over question and answer text
+    """
+    def __init__(self, k1: float = 1.2, b: float = 0.75, max_postings: int = 2048, champions: int = 512):
+        """
+        Initialize an empty index
+
+        Args:
+            k1: Term frequency saturation
+            b: Document length normalization
+            max_postings: Postings above which a term only scores documents found through rarer terms
+            champions: Documents kept per common term for queries made only of common terms
+        """
+        self.k1 = k1
+        self.b = b
+        self.max_postings = max_postings
+        self.champions = champions
+        self._champion_cache: Dict[str, Tuple[int, np.ndarray]] = {}
+        # Base postings: term -> (start, count) into the mapped id and term frequency arrays
+        self._base_terms: Dict[str, Tuple[int, int]] = {}
+        self._base_ids = np.empty(0, dtype="<u4")
+        self._base_tfs = np.empty(0, dtype="<u4")
+        # Delta postings: term -> (doc ids, term frequencies)
+        self._delta: Dict[str, Tuple[array, array]] = {}
+        self._lengths = np.zeros(1024, dtype="uint32")
+        self._count = 0
+        self._total_length = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    @staticmethod
+    def exists(directory: str) -> bool:
+        """Check whether a directory holds a saved index"""
+        return os.path.exists(os.path.join(directory, TERMS_FILE))
+
+    @classmethod
+    def load(cls, directory: str) -> "BM25Index":
+        """
+        Map an index saved with save()
+
+        Args:
+            directory: Version directory
+
+        Returns:
+            The index, with the saved documents as its base
+        """
+        with open(os.path.join(directory, TERMS_FILE), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        index = cls(k1=meta["k1"], b=meta["b"])
+        index._base_terms = {term: tuple(span) for term, span in meta["terms"].items()}
+        index._base_ids = np.frombuffer(map_file(os.path.join(directory, IDS_FILE)), dtype="<u4")
+        index._base_tfs = np.frombuffer(map_file(os.path.join(directory, TFS_FILE)), dtype="<u4")
+        lengths = np.fromfile(os.path.join(directory, LENGTHS_FILE), dtype="<u4")
+        index._lengths = np.zeros(max(1024, 2 * len(lengths)), dtype="uint32")
+        index._lengths[:len(lengths)] = lengths
+        index._count = meta["count"]
+        index._total_length = meta["total_length"]
+        if len(lengths) != index._count:
+            raise CorruptDatabaseError(f"BM25 index in {directory} has {len(lengths)} lengths for {index._count} documents")
+        return index
+
+    @classmethod
+    def build(cls, documents: Iterable[Mapping[str, Any]]) -> "BM25Index":
+        """Index documents in id order, starting at id 0"""
+        index = cls()
+        for doc_id, doc in enumerate(documents):
+            index.add(doc_id, document_text(doc))
+        return index
+
+    def add(self, doc_id: int, text: str):
+        """
+        Index one document
+
+        Args:
+            doc_id: Document id, which must be the next id
+            text: Text to index
+        """
+        if doc_id != self._count:
+            raise ValueError(f"Expected document {self._count}, got {doc_id}")
+        counts = Counter(tokenize(text))
+        for term, tf in counts.items():
+            ids, tfs = self._delta.setdefault(term, (array("I"), array("I")))
+            ids.append(doc_id)
+            tfs.append(tf)
+
+        if self._count == len(self._lengths):
+            lengths = np.zeros(2 * len(self._lengths), dtype="uint32")
+            lengths[:self._count] = self._lengths
+            self._lengths = lengths
+        length = sum(counts.values())
+        self._lengths[self._count] = length
+        self._count += 1
+        self._total_length += length
+
+    def _postings(self, term: str) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """Doc ids and term frequencies of a term across base and delta"""
+        ids, tfs = [], []
+        span = self._base_terms.get(term)
+        if span is not None:
+            start, count = span
+            ids.append(self._base_ids[start:start + count])
+            tfs.append(self._base_tfs[start:start + count])
+        delta = self._delta.get(term)
+        if delta is not None:
+            # Zero-copy views: they must not outlive the caller, as an exported array cannot grow
+            ids.append(np.frombuffer(delta[0], dtype="uint32"))
+            tfs.append(np.frombuffer(delta[1], dtype="uint32"))
+        if not ids:
+            return None
+        if len(ids) == 1:
+            return ids[0], tfs[0]
+        return np.concatenate(ids), np.concatenate(tfs)
+
+    def _champions(self, term: str, ids: np.ndarray, tfs: np.ndarray, avgdl: float) -> np.ndarray:
+        """Ids of the documents where a common term weighs most, cached until its postings change"""
+        cached = self._champion_cache.get(term)
+        if cached is not None and cached[0] == len(ids):
+            return cached[1]
+        tf = tfs.astype("float32")
+        weights = tf / (tf + self.k1 * (1 - self.b + self.b * self._lengths[ids] / avgdl))
+        champions = ids[np.argpartition(-weights, self.champions - 1)[:self.champions]]
+        self._champion_cache[term] = (len(ids), champions)
+        return champions
+
+    def search(self, query: str, k: int = 10) -> List[Tuple[int, float, float]]:
+        """
+        Find the documents scoring highest for a query
+
+        Only documents containing a query term with at most `max_postings`
+        postings are scored. If every query term is more common than that, the
+        `champions` documents where each term weighs most are scored instead, so
+        a lookup never walks the postings of terms found in most documents.
+
+        Args:
+            query: Query text
+            k: Number of results
+
+        Returns:
+            (doc id, BM25 score, coverage) tuples, best first. Coverage is the
+            IDF-weighted share of the query terms found in the document, from 0 to 1.
+        """
+        matches, total_idf = self._query_terms(query)
+        if not matches:
+            return []
+
+        rare = [ids for _, _, ids, _ in matches if len(ids) <= self.max_postings]
+        if not rare:
+            avgdl = self._total_length / self._count or 1.0
+            rare = [self._champions(term, ids, tfs, avgdl) for term, _, ids, tfs in matches]
+        candidates = np.unique(np.concatenate(rare))
+        scores, coverage = self._score(matches, total_idf, candidates)
+
+        top = np.arange(len(candidates))
+        if len(top) > k:
+            top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(int(candidates[i]), float(scores[i]), float(coverage[i])) for i in top]
+
+    def score_documents(self, query: str, doc_ids: List[int]) -> List[Tuple[float, float]]:
+        """
+        Score given documents for a query, e.g. dense hits that search() did not return
+
+        Args:
+            query: Query text
+            doc_ids: Document ids
+
+        Returns:
+            (BM25 score, coverage) per document, in order
+        """
+        matches, total_idf = self._query_terms(query)
+        if not matches or not doc_ids:
+            return [(0.0, 0.0)] * len(doc_ids)
+        scores, coverage = self._score(matches, total_idf, np.asarray(doc_ids, dtype="int64"))
+        return [(float(score), float(share)) for score, share in zip(scores, coverage)]
+
+    def _query_terms(self, query: str) -> Tuple[List[Tuple[str, float, np.ndarray, np.ndarray]], float]:
+        """(term, IDF, doc ids, term frequencies) of the query terms in the index, and the IDF of all query terms"""
+        terms = set(tokenize(query))
+        if not terms or not self._count:
+            return [], 0.0
+        n = self._count
+        total_idf = 0.0
+        matches = []
+        for term in terms:
+            postings = self._postings(term)
+            df = 0 if postings is None else len(postings[0])
+            idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+            total_idf += idf
+            if df:
+                matches.append((term, idf) + postings)
+        return matches, total_idf
+
+    def _score(self, matches: List[Tuple[str, float, np.ndarray, np.ndarray]], total_idf: float,
+               candidates: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """BM25 scores and IDF-weighted query term coverage of candidate documents"""
+        avgdl = self._total_length / self._count or 1.0
+        # Postings are sorted by doc id, so each term is looked up with a binary search per candidate
+        scores = np.zeros(len(candidates), dtype="float32")
+        matched = np.zeros(len(candidates), dtype="float32")
+        for _, idf, ids, tfs in matches:
+            positions = np.minimum(np.searchsorted(ids, candidates), len(ids) - 1)
+            found = ids[positions] == candidates
+            tf = tfs[positions[found]].astype("float32")
+            norm = self.k1 * (1 - self.b + self.b * self._lengths[candidates[found]] / avgdl)
+            scores[found] += idf * tf * (self.k1 + 1) / (tf + norm)
+            matched[found] += idf
+        return scores, np.minimum(1.0, matched / total_idf)
+
+    def save(self, directory: str) -> List[str]:
+        """
+        Write base and delta as one base, streaming the postings term by term
+
+        Args:
+            directory: Target directory
+
+        Returns:
+            The names of the files written
+        """
+        terms = {}
+        position = 0
+        with open(os.path.join(directory, IDS_FILE), "wb") as ids_file, \
+                open(os.path.join(directory, TFS_FILE), "wb") as tfs_file:
+            for term in sorted(set(self._base_terms) | set(self._delta)):
+                ids, tfs = self._postings(term)
+                ids_file.write(np.ascontiguousarray(ids, dtype="<u4").tobytes())
+                tfs_file.write(np.ascontiguousarray(tfs, dtype="<u4").tobytes())
+                terms[term] = (position, len(ids))
+                position += len(ids)
+        with open(os.path.join(directory, LENGTHS_FILE), "wb") as f:
+            f.write(self._lengths[:self._count].astype("<u4").tobytes())
+        with open(os.path.join(directory, TERMS_FILE), "w", encoding="utf-8") as f:
+            json.dump({"k1": self.k1, "b": self.b, "count": self._count, "total_length": self._total_length,
+                       "terms": terms}, f, ensure_ascii=False, separators=(",", ":"))
+        return [TERMS_FILE, IDS_FILE, TFS_FILE, LENGTHS_FILE]
@@ -0,0 +1,224 @@
+"""
+Confidence threshold calibration for the sexual wellness agent
+
+Runs a labeled query set through the vector database and derives the score
+thresholds the agent uses instead of hard-coded constants:
+
+    answer_threshold   lowest top-1 score at which answers reach the target precision
+    minimum_score      score separating in-domain from out-of-domain queries; below
+                       it the agent says it has no information instead of guessing
+
+The thresholds are written as JSON next to the database, where the agent reads
+them at startup. A database without thresholds is calibrated against the
+bundled labeled set (app/data/wellness_queries.jsonl) the first time the
+agent loads it. Scores depend on the model and on hybrid vs dense-only search,
+so calibrate again after changing either.
+
+Usage:
+    python -m app.calibration app/data/wellness_queries.jsonl
+    python -m app.calibration queries.jsonl --target-precision 0.95 --output confidence.json
+"""
+
+import os
+import json
+import argparse
+import logging
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple
+
+from app.vector_db import SexualWellnessVectorDB
+
+logger = logging.getLogger(__name__)
+
+CONFIDENCE_FILE = "confidence.json"
+# Cosine similarity; the old L2 index scored 1 - distance² = 2cos - 1, so its 0.6 is cos 0.8
+DEFAULT_ANSWER_THRESHOLD = 0.8
+DEFAULT_MINIMUM_SCORE = 0.0
+
+def default_labeled_queries_path() -> str:
+    """Labeled query set calibrated against when no thresholds exist (WELLNESS_CALIBRATION_QUERIES overrides it)"""
+    return os.getenv("WELLNESS_CALIBRATION_QUERIES") or os.path.join(
+        os.path.dirname(__file__), "data", "wellness_queries.jsonl")
+
+def confidence_path(db_path: str) -> str:
+    """Threshold file of a database (WELLNESS_CONFIDENCE_PATH overrides it)"""
+    return os.getenv("WELLNESS_CONFIDENCE_PATH") or os.path.join(db_path, CONFIDENCE_FILE)
+
+def load_labeled_queries(path: str) -> List[Dict[str, Any]]:
+    """Read {"query", "question"} records; question is null for out-of-domain queries"""
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def load_thresholds(path: str) -> Dict[str, Any]:
+    """
+    Read calibrated thresholds, falling back to the defaults
+
+    Args:
+        path: Threshold file written by calibrate
+
+    Returns:
+        Dict with "answer_threshold" and "minimum_score", plus the calibration
+        details when the file exists
+    """
+    thresholds = {"answer_threshold": DEFAULT_ANSWER_THRESHOLD, "minimum_score": DEFAULT_MINIMUM_SCORE}
+    if not os.path.exists(path):
+        return thresholds
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            thresholds.update(json.load(f))
+    except (OSError, ValueError) as e:
+        logger.error(f"Error reading confidence thresholds from {path}, using defaults: {str(e)}")
+    return thresholds
+
+def score_queries(labeled: List[Mapping[str, Any]],
+                  search: Callable[[List[str]], List[List[Mapping[str, Any]]]]) -> List[Tuple[float, bool, bool]]:
+    """
+    Score the top hit of every labeled query
+
+    Args:
+        labeled: {"query", "question"} records
+        search: Returns the hits of a batch of queries, best first
+
+    Returns:
+        (top score, in domain, top hit correct) per query
+    """
+    samples = []
+    results = search([item["query"] for item in labeled])
+    for item, hits in zip(labeled, results):
+        score = hits[0]["score"] if hits else 0.0
+        in_domain = bool(item.get("question"))
+        samples.append((float(score), in_domain, in_domain and bool(hits) and hits[0]["question"] == item["question"]))
+    return samples
+
+def answer_threshold(samples: List[Tuple[float, bool, bool]], target_precision: float) -> float:
+    """
+    Lowest score at which the answers at or above it are correct often enough
+
+    Args:
+        samples: Output of score_queries
+        target_precision: Required share of correct answers above the threshold
+
+    Returns:
+        The threshold, or just above the best score if no threshold reaches the precision
+    """
+    ranked = sorted(samples, key=lambda sample: -sample[0])
+    threshold = None
+    correct = 0
+    for count, (score, _, is_correct) in enumerate(ranked, start=1):
+        correct += is_correct
+        # Only cut between distinct scores, so every sample at the threshold is counted
+        if count < len(ranked) and ranked[count][0] == score:
+            continue
+        if correct / count >= target_precision:
+            threshold = score
+    if threshold is None:
+        return round(ranked[0][0] + 1e-4, 4) if ranked else DEFAULT_ANSWER_THRESHOLD
+    return round(threshold, 4)
+
+def minimum_score(samples: List[Tuple[float, bool, bool]]) -> float:
+    """
+    Score best separating in-domain from out-of-domain queries (maximum Youden's J)
+
+    Args:
+        samples: Output of score_queries
+
+    Returns:
+        The threshold, or DEFAULT_MINIMUM_SCORE without both kinds of queries
+    """
+    in_domain = [score for score, inside, _ in samples if inside]
+    out_of_domain = [score for score, inside, _ in samples if not inside]
+    if not in_domain or not out_of_domain:
+        return DEFAULT_MINIMUM_SCORE
+    best, best_j = DEFAULT_MINIMUM_SCORE, 0.0
+    for threshold in sorted(set(in_domain)):
+        accepted = sum(score >= threshold for score in in_domain) / len(in_domain)
+        rejected = sum(score < threshold for score in out_of_domain) / len(out_of_domain)
+        if accepted + rejected - 1 > best_j:
+            best, best_j = threshold, accepted + rejected - 1
+    return round(best, 4)
+
+def calibrate(vector_db: SexualWellnessVectorDB, labeled: List[Mapping[str, Any]],
+              target_precision: float = 0.9, output: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Derive confidence thresholds from a labeled query set and write them
+
+    Args:
+        vector_db: Database to calibrate, searched as the agent searches it
+        labeled: {"query", "question"} records, question null for out-of-domain queries
+        target_precision: Required share of correct answers at or above answer_threshold
+        output: Threshold file (defaults to the database's confidence path)
+
+    Returns:
+        The thresholds with the metrics they reach on the labeled set
+    """
+    if not labeled:
+        raise ValueError("Calibration needs at least one labeled query")
+    samples = score_queries(labeled, lambda queries: vector_db.search_batch(queries, k=1))
+    answer = answer_threshold(samples, target_precision)
+    minimum = min(minimum_score(samples), answer)
+
+    answered = [sample for sample in samples if sample[0] >= answer]
+    in_domain = sum(inside for _, inside, _ in samples)
+    out_of_domain = len(samples) - in_domain
+    thresholds = {
+        "answer_threshold": answer,
+        "minimum_score": minimum,
+        "target_precision": target_precision,
+        "precision": round(sum(correct for _, _, correct in answered) / len(answered), 4) if answered else 0.0,
+        "answered": round(len(answered) / len(samples), 4),
+        "in_domain_rejected": round(
+            sum(inside and score < minimum for score, inside, _ in samples) / in_domain, 4) if in_domain else 0.0,
+        "out_of_domain_rejected": round(
+            sum(not inside and score < minimum for score, inside, _ in samples) / out_of_domain, 4)
+            if out_of_domain else 0.0,
+        "queries": len(samples),
+        "documents": vector_db.count,
+        "model": vector_db.model_name,
+        "embedding_backend": vector_db.embedding_backend,
+        "hybrid": vector_db.hybrid,
+    }
+
+    path = output or confidence_path(vector_db.db_path)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(thresholds, f, indent=2)
+    os.replace(tmp_path, path)
+    logger.info(f"Wrote confidence thresholds to {path}: answer={answer} minimum={minimum}")
+    return thresholds
+
+def ensure_thresholds(vector_db: SexualWellnessVectorDB, labeled_path: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Load a database's thresholds, calibrating them first if none were written yet
+
+    Args:
+        vector_db: Database the thresholds belong to
+        labeled_path: Labeled query set (defaults to default_labeled_queries_path())
+
+    Returns:
+        The thresholds; the defaults, with a warning, if calibration is not possible
+    """
+    path = confidence_path(vector_db.db_path)
+    if not os.path.exists(path):
+        labeled_path = labeled_path or default_labeled_queries_path()
+        try:
+            calibrate(vector_db, load_labeled_queries(labeled_path), output=path)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not calibrate confidence thresholds from {labeled_path}, using the defaults "
+                           f"(answer={DEFAULT_ANSWER_THRESHOLD}, minimum={DEFAULT_MINIMUM_SCORE}): {str(e)}")
+    return load_thresholds(path)
+
+def main():
+    parser = argparse.ArgumentParser(description="Derive the agent's confidence thresholds from labeled queries")
+    parser.add_argument("queries", help="JSONL file of {\"query\", \"question\"} records")
+    parser.add_argument("--target-precision", type=float, default=0.9,
+                        help="Required share of correct answers above the answer threshold")
+    parser.add_argument("--output", help="Threshold file (defaults to WELLNESS_CONFIDENCE_PATH or the database)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+
+    thresholds = calibrate(SexualWellnessVectorDB(query_cache_size=0), load_labeled_queries(args.queries),
+                           target_precision=args.target_precision, output=args.output)
+    print(json.dumps(thresholds, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+import os
+import re
+import logging
+from typing import Optional
+import numpy as np
+
+from app.lru_cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r"\s+")
+
+def normalize_query(text: str) -> str:
+    """Normalize query text for cache lookups (case and whitespace insensitive)"""
+    return _WHITESPACE.sub(" ", text).strip().lower()
+
+class EmbeddingCache(LRUCache):
+    """
+    Bounded LRU cache of normalized query text to embedding
+
+    Thread-safe, with hit/miss counters. When a path is given the cache can be
+    saved to and restored from disk, so it survives restarts.
+    """
+    def __init__(self, max_size: int = 10000, path: Optional[str] = None, model_name: str = ""):
+        """
+        Initialize the cache
+
+        Args:
+            max_size: Maximum number of cached embeddings (0 disables caching)
+            path: Optional .npz file the cache is persisted to
+            model_name: Model that produced the embeddings; a persisted cache from
+                another model is ignored
+        """
+        super().__init__(max_size=max_size)
+        self.path = path
+        self.model_name = model_name
+        if path:
+            self.load()
+
+    def get(self, text: str) -> Optional[np.ndarray]:
+        """Return the cached embedding for a query, or None"""
+        return super().get(normalize_query(text))
+
+    def put(self, text: str, embedding: np.ndarray):
+        """Cache the embedding of a query, evicting the least recently used entry if full"""
+        super().put(normalize_query(text), np.array(embedding, dtype="float32"))
+
+    def save(self):
+        """Persist the cache to disk (no-op without a path)"""
+        if not self.path:
+            return
+        entries = self.items()
+        keys = [key for key, _ in entries]
+        vectors = np.stack([vector for _, vector in entries]) if keys else np.empty((0, 0), dtype="float32")
+        try:
+            tmp_path = self.path + ".tmp.npz"
+            np.savez(tmp_path, keys=np.array(keys, dtype=str), vectors=vectors,
+                     model_name=np.array(self.model_name))
+            os.replace(tmp_path, self.path)
+            logger.info(f"Saved query embedding cache with {len(keys)} entries")
+        except Exception as e:
+            logger.error(f"Error saving query embedding cache: {str(e)}")
+
+    def load(self):
+        """Restore a persisted cache, keeping the most recently used entries"""
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with np.load(self.path) as data:
+                if str(data["model_name"]) != self.model_name:
+                    logger.info("Ignoring query embedding cache persisted for a different model")
+                    return
+                keys, vectors = data["keys"], data["vectors"]
+                start = max(0, len(keys) - self.max_size)
+                for key, vector in zip(keys[start:], vectors[start:]):
+                    super().put(str(key), vector)
+            logger.info(f"Loaded query embedding cache with {len(self)} entries")
+        except Exception as e:
+            logger.error(f"Error loading query embedding cache: {str(e)}")
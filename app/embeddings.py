@@ -0,0 +1,256 @@
+"""
+Embedding backends for the sexual wellness vector database
+
+"sentence-transformers" runs the model through PyTorch. "onnx" and "onnx-int8"
+run an exported copy of the same model through ONNX Runtime (the latter with
+dynamically int8-quantized weights), which needs far less CPU time and memory
+per worker on CPU-only nodes. ONNX models are exported once, ahead of
+deployment, and can be checked against sentence-transformers at any time:
+
+    python -m app.embeddings export --quantize
+    python -m app.embeddings verify --quantized
+"""
+
+import os
+import logging
+import argparse
+from typing import Dict, List, Optional
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_BACKENDS = ("sentence-transformers", "onnx", "onnx-int8")
+
+DEFAULT_ONNX_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "static", "models")
+
+# Minimum mean cosine similarity of an ONNX backend to the sentence-transformers embeddings
+PARITY_THRESHOLDS = {"onnx": 0.999, "onnx-int8": 0.98}
+
+PARITY_SENTENCES = [
+    "What is sexual wellness?",
+    "How can I practice safer sex?",
+    "Is it normal to have low libido after childbirth?",
+    "What are the early symptoms of chlamydia?",
+    "Can stress cause erectile dysfunction?",
+    "How often should I get tested for STIs?",
+    "Does the contraceptive pill protect against HIV?",
+    "Mujhe shaadi se pehle darr lag raha hai, kya karoon?",
+    "What is consent in sexual relationships?",
+    "How does aging affect sexual health?",
+]
+
+def _hub_id(model_name: str) -> str:
+    """Map a sentence-transformers short name to its Hugging Face Hub id"""
+    return model_name if "/" in model_name else f"sentence-transformers/{model_name}"
+
+def onnx_model_dir(model_name: str, base_dir: Optional[str] = None) -> str:
+    """Directory holding the exported ONNX model and tokenizer for a model"""
+    base_dir = base_dir or os.getenv("WELLNESS_ONNX_DIR") or DEFAULT_ONNX_DIR
+    return os.path.join(base_dir, model_name.replace("/", "__"))
+
+class SentenceTransformerEncoder:
+    """
+    Encoder running the sentence-transformers model through PyTorch
+    """
+    def __init__(self, model_name: str):
+        # Imported here: sentence-transformers pulls in torch, which dominates import time
+        from sentence_transformers import SentenceTransformer
+        self.model = SentenceTransformer(model_name)
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.model.get_sentence_embedding_dimension()
+
+    def encode(self, texts: List[str], batch_size: int = 32) -> np.ndarray:
+        return np.asarray(self.model.encode(texts, batch_size=batch_size), dtype="float32")
+
+class OnnxEncoder:
+    """
+    Encoder running an exported transformer through ONNX Runtime, with the same
+    mean pooling and normalization as the sentence-transformers pipeline
+    """
+    def __init__(self, model_name: str, quantized: bool = False, model_dir: Optional[str] = None,
+                 max_length: int = 256, threads: Optional[int] = None):
+        """
+        Initialize the encoder
+
+        Args:
+            model_name: The sentence transformer model the ONNX model was exported from
+            quantized: Use the int8-quantized model
+            model_dir: Directory of the exported model (see export_onnx)
+            max_length: Maximum tokens per text
+            threads: ONNX Runtime intra-op threads (defaults to WELLNESS_ONNX_THREADS or all cores)
+        """
+        try:
+            import onnxruntime
+        except ImportError as e:
+            raise ImportError("The onnx embedding backends need onnxruntime: pip install onnxruntime") from e
+        from transformers import AutoTokenizer
+
+        self.model_dir = model_dir or onnx_model_dir(model_name)
+        model_path = os.path.join(self.model_dir, "model_int8.onnx" if quantized else "model.onnx")
+        if not os.path.exists(model_path):
+            # Exporting needs torch and takes minutes, so it is a deployment step, not a worker's job
+            raise FileNotFoundError(f"No ONNX model at {model_path}. Export it first with: "
+                                    f"python -m app.embeddings export --model {model_name}"
+                                    f"{' --quantize' if quantized else ''}")
+
+        options = onnxruntime.SessionOptions()
+        threads = threads or int(os.getenv("WELLNESS_ONNX_THREADS", "0"))
+        if threads:
+            options.intra_op_num_threads = threads
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = onnxruntime.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        self.input_names = {node.name for node in self.session.get_inputs()}
+        self.tokenizer = AutoTokenizer.from_pretrained(self.model_dir)
+        self.max_length = max_length
+        self.dimension = self.session.get_outputs()[0].shape[-1]
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.dimension
+
+    def encode(self, texts: List[str], batch_size: int = 32) -> np.ndarray:
+        embeddings = np.empty((len(texts), self.dimension), dtype="float32")
+        # Batch texts of similar length together to minimize padding
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        for start in range(0, len(order), batch_size):
+            rows = order[start:start + batch_size]
+            tokens = self.tokenizer([texts[i] for i in rows], padding=True, truncation=True,
+                                    max_length=self.max_length, return_tensors="np")
+            feeds = {name: tokens[name].astype("int64") for name in self.input_names if name in tokens}
+            hidden = self.session.run(None, feeds)[0]
+            mask = tokens["attention_mask"][..., None].astype("float32")
+            pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+            pooled /= np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+            embeddings[rows] = pooled
+        return embeddings
+
+def create_encoder(backend: Optional[str], model_name: str):
+    """
+    Create the embedding encoder for a backend
+
+    Args:
+        backend: One of EMBEDDING_BACKENDS (defaults to WELLNESS_EMBEDDING_BACKEND or "sentence-transformers")
+        model_name: The sentence transformer model
+
+    Returns:
+        An encoder with encode() and get_sentence_embedding_dimension()
+    """
+    backend = (backend or os.getenv("WELLNESS_EMBEDDING_BACKEND", "sentence-transformers")).lower()
+    if backend == "sentence-transformers":
+        return SentenceTransformerEncoder(model_name)
+    if backend == "onnx":
+        return OnnxEncoder(model_name)
+    if backend == "onnx-int8":
+        return OnnxEncoder(model_name, quantized=True)
+    raise ValueError(f"Unknown embedding backend: {backend}. Expected one of {EMBEDDING_BACKENDS}")
+
+def check_parity(backend: str, reference: np.ndarray, embeddings: np.ndarray) -> Dict[str, float]:
+    """
+    Compare a backend's embeddings with the sentence-transformers ones
+
+    Args:
+        backend: The backend that produced `embeddings`
+        reference: sentence-transformers embeddings of the same texts
+        embeddings: The backend's embeddings
+
+    Returns:
+        Mean and minimum cosine similarity
+
+    Raises:
+        RuntimeError: If the mean similarity is below the backend's PARITY_THRESHOLDS entry
+    """
+    cosine = np.sum(reference * embeddings, axis=1) / np.clip(
+        np.linalg.norm(reference, axis=1) * np.linalg.norm(embeddings, axis=1), 1e-12, None)
+    result = {"mean": float(cosine.mean()), "min": float(cosine.min())}
+    threshold = PARITY_THRESHOLDS.get(backend, 1.0)
+    if result["mean"] < threshold:
+        raise RuntimeError(f"{backend} embeddings differ from sentence-transformers: mean cosine "
+                           f"{result['mean']:.5f} is below {threshold}")
+    return result
+
+def verify_onnx(model_name: str, output_dir: Optional[str] = None, quantized: bool = False) -> Dict[str, float]:
+    """Check an exported ONNX model against the sentence-transformers model (see check_parity)"""
+    reference = SentenceTransformerEncoder(model_name).encode(PARITY_SENTENCES)
+    encoder = OnnxEncoder(model_name, quantized=quantized, model_dir=output_dir or onnx_model_dir(model_name))
+    return check_parity("onnx-int8" if quantized else "onnx", reference, encoder.encode(PARITY_SENTENCES))
+
+def export_onnx(model_name: str, output_dir: Optional[str] = None, quantize: bool = False,
+                opset: int = 14) -> str:
+    """
+    Export a sentence transformer to ONNX, optionally with an int8-quantized copy
+
+    Needs torch and transformers; the exported model only needs onnxruntime.
+    Newly exported models are checked against sentence-transformers and
+    removed again if they fail the parity check.
+
+    Args:
+        model_name: The sentence transformer model
+        output_dir: Target directory (defaults to onnx_model_dir(model_name))
+        quantize: Also write model_int8.onnx with dynamically quantized weights
+        opset: ONNX opset version
+
+    Returns:
+        The output directory
+    """
+    import torch
+    from transformers import AutoModel, AutoTokenizer
+
+    output_dir = output_dir or onnx_model_dir(model_name)
+    os.makedirs(output_dir, exist_ok=True)
+    model_path = os.path.join(output_dir, "model.onnx")
+
+    exported = []
+    if not os.path.exists(model_path):
+        tokenizer = AutoTokenizer.from_pretrained(_hub_id(model_name))
+        model = AutoModel.from_pretrained(_hub_id(model_name)).eval()
+        tokenizer.save_pretrained(output_dir)
+
+        sample = tokenizer(["export sample"], return_tensors="pt")
+        input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample]
+        dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names + ["last_hidden_state"]}
+        with torch.no_grad():
+            torch.onnx.export(model, tuple(sample[name] for name in input_names), model_path,
+                              input_names=input_names, output_names=["last_hidden_state"],
+                              dynamic_axes=dynamic_axes, opset_version=opset)
+        logger.info(f"Exported {model_name} to {model_path}")
+        exported.append((model_path, False))
+
+    quantized_path = os.path.join(output_dir, "model_int8.onnx")
+    if quantize and not os.path.exists(quantized_path):
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+        quantize_dynamic(model_path, quantized_path, weight_type=QuantType.QInt8)
+        logger.info(f"Wrote int8-quantized model to {quantized_path}")
+        exported.append((quantized_path, True))
+
+    for path, quantized in exported:
+        try:
+            parity = verify_onnx(model_name, output_dir, quantized=quantized)
+        except RuntimeError:
+            os.remove(path)
+            raise
+        logger.info(f"{os.path.basename(path)} parity: mean cosine {parity['mean']:.5f}, min {parity['min']:.5f}")
+
+    return output_dir
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Embedding backend utilities")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    export_parser = subparsers.add_parser("export", help="Export the embedding model to ONNX")
+    export_parser.add_argument("--model", default="all-MiniLM-L6-v2")
+    export_parser.add_argument("--output-dir")
+    export_parser.add_argument("--quantize", action="store_true", help="Also write an int8-quantized model")
+    verify_parser = subparsers.add_parser("verify", help="Check an exported model against sentence-transformers")
+    verify_parser.add_argument("--model", default="all-MiniLM-L6-v2")
+    verify_parser.add_argument("--output-dir")
+    verify_parser.add_argument("--quantized", action="store_true", help="Check the int8-quantized model")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    if args.command == "export":
+        print(export_onnx(args.model, args.output_dir, quantize=args.quantize))
+    else:
+        try:
+            parity = verify_onnx(args.model, args.output_dir, quantized=args.quantized)
+        except RuntimeError as e:
+            raise SystemExit(str(e))
+        print(f"mean cosine {parity['mean']:.5f}, min {parity['min']:.5f}")
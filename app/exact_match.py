@@ -0,0 +1,109 @@
+"""
+Exact question lookup for the sexual wellness vector database
+
+Maps a 64-bit hash of each normalized stored question to its document id, so
+a query that repeats a stored question (as the UI does with follow-up
+suggestions) is answered without embedding or searching. Like the BM25
+index, the base is saved with each published version as a sorted hash array
+that every worker maps, and documents added since live in an in-memory delta.
+"""
+
+import os
+import hashlib
+from typing import Any, Dict, Iterable, List, Mapping, Optional
+import numpy as np
+
+from app.embedding_cache import normalize_query
+from app.vector_storage import CorruptDatabaseError, map_file
+
+HASHES_FILE = "questions_hash.bin"
+IDS_FILE = "questions_ids.bin"
+
+def normalize_question(text: str) -> str:
+    """Normalize a question for exact matching (case, whitespace and trailing punctuation insensitive)"""
+    return normalize_query(text).rstrip("?!.। ")
+
+def question_hash(text: str) -> int:
+    """Stable 64-bit hash of a normalized question"""
+    digest = hashlib.blake2b(normalize_question(text).encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little")
+
+class QuestionIndex:
+    """
+    Hash index from normalized question text to the newest document with that question
+    """
+    def __init__(self):
+        self._base_hashes = np.empty(0, dtype="<u8")
+        self._base_ids = np.empty(0, dtype="<u4")
+        self._delta: Dict[int, int] = {}
+
+    @staticmethod
+    def exists(directory: str) -> bool:
+        """Check whether a directory holds a saved index"""
+        return os.path.exists(os.path.join(directory, HASHES_FILE))
+
+    @classmethod
+    def load(cls, directory: str) -> "QuestionIndex":
+        """Map an index saved with save()"""
+        index = cls()
+        index._base_hashes = np.frombuffer(map_file(os.path.join(directory, HASHES_FILE)), dtype="<u8")
+        index._base_ids = np.frombuffer(map_file(os.path.join(directory, IDS_FILE)), dtype="<u4")
+        if len(index._base_hashes) != len(index._base_ids):
+            raise CorruptDatabaseError(f"Question index in {directory} has mismatched hash and id files")
+        return index
+
+    @classmethod
+    def build(cls, documents: Iterable[Mapping[str, Any]]) -> "QuestionIndex":
+        """Index documents in id order, starting at id 0"""
+        index = cls()
+        for doc_id, doc in enumerate(documents):
+            index.add(doc_id, doc["question"])
+        return index
+
+    def add(self, doc_id: int, question: str):
+        """Index one document, replacing an older document with the same question"""
+        self._delta[question_hash(question)] = doc_id
+
+    def lookup(self, text: str) -> Optional[int]:
+        """
+        Find the document whose question matches a text
+
+        Args:
+            text: Query text
+
+        Returns:
+            The document id, or None. Hashes can collide, so callers compare the
+            normalized questions before trusting a match.
+        """
+        key = question_hash(text)
+        doc_id = self._delta.get(key)
+        if doc_id is not None:
+            return doc_id
+        position = int(np.searchsorted(self._base_hashes, np.uint64(key)))
+        if position < len(self._base_hashes) and int(self._base_hashes[position]) == key:
+            return int(self._base_ids[position])
+        return None
+
+    def save(self, directory: str) -> List[str]:
+        """
+        Write base and delta as one base sorted by hash
+
+        Args:
+            directory: Target directory
+
+        Returns:
+            The names of the files written
+        """
+        hashes = np.concatenate([self._base_hashes, np.fromiter(self._delta.keys(), dtype="<u8",
+                                                                count=len(self._delta))])
+        ids = np.concatenate([self._base_ids, np.fromiter(self._delta.values(), dtype="<u4",
+                                                          count=len(self._delta))])
+        # Sort by hash, then id, and keep the newest document of every hash
+        order = np.lexsort((ids, hashes))
+        hashes, ids = hashes[order], ids[order]
+        newest = np.append(hashes[1:] != hashes[:-1], True) if len(hashes) else np.empty(0, dtype=bool)
+        with open(os.path.join(directory, HASHES_FILE), "wb") as f:
+            f.write(hashes[newest].astype("<u8").tobytes())
+        with open(os.path.join(directory, IDS_FILE), "wb") as f:
+            f.write(ids[newest].astype("<u4").tobytes())
+        return [HASHES_FILE, IDS_FILE]
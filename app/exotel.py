@@ -1,15 +1,71 @@
 import os
-import requests
-from typing import Dict, Any, Optional
+import asyncio
+import logging
+import threading
+import httpx
+from typing import Dict, Any, Optional, List, AsyncIterator, Awaitable, Callable
 from dotenv import load_dotenv
+from app.api.rate_limit import TokenBucket
+from app.api.resilience import parse_retry_after
 
 # Load environment variables
 load_dotenv()
 
-class ExotelClient:
-    def __init__(self, api_key: str = None, api_token: str = None):
+logger = logging.getLogger(__name__)
+
+_http_client: Optional[httpx.Client] = None
+_http_client_lock = threading.Lock()
+_async_http_client: Optional[httpx.AsyncClient] = None
+
+def http_client_options() -> Dict[str, Any]:
+    """
+    Connection pool and timeout settings for Exotel HTTP clients
+    
+    Configured with EXOTEL_POOL_SIZE (max open connections, default 32),
+    EXOTEL_TIMEOUT (default 15) and EXOTEL_CONNECT_TIMEOUT (default 5).
+    """
+    pool_size = int(os.getenv("EXOTEL_POOL_SIZE", "32"))
+    return {
+        "limits": httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+        "timeout": httpx.Timeout(
+            float(os.getenv("EXOTEL_TIMEOUT", "15")),
+            connect=float(os.getenv("EXOTEL_CONNECT_TIMEOUT", "5"))
+        ),
+    }
+
+def get_http_client() -> httpx.Client:
+    """Process-wide pooled HTTP client for Exotel"""
+    global _http_client
+    with _http_client_lock:
+        if _http_client is None or _http_client.is_closed:
+            _http_client = httpx.Client(**http_client_options())
+        return _http_client
+
+def get_async_http_client() -> httpx.AsyncClient:
+    """Pooled async HTTP client for Exotel, shared on the event loop"""
+    global _async_http_client
+    if _async_http_client is None or _async_http_client.is_closed:
+        _async_http_client = httpx.AsyncClient(**http_client_options())
+    return _async_http_client
+
+async def close_async_http_client():
+    """Close the shared async HTTP client and its connections"""
+    global _async_http_client
+    if _async_http_client is not None:
+        await _async_http_client.aclose()
+        _async_http_client = None
+
+class ExotelClientBase:
+    """
+    Credentials, API URL and request payloads shared by ExotelClient and
+    AsyncExotelClient, which send the requests synchronously and asynchronously
+    """
+    def __init__(self, api_key: str = None, api_token: str = None, http_client: Any = None):
         """
         Initialize Exotel client with API credentials
+        
+        Requests go over a pooled keep-alive HTTP client (the shared one unless
+        http_client is given). EXOTEL_BASE_URL overrides the API host.
         """
         self.api_key = api_key or os.getenv("EXOTEL_API_KEY")
         self.api_token = api_token or os.getenv("EXOTEL_API_TOKEN")
@@ -18,11 +74,60 @@ class ExotelClient:
         if not self.api_key or not self.api_token or not self.sid:
             raise ValueError("Exotel credentials not set. Please set EXOTEL_API_KEY, EXOTEL_API_TOKEN and EXOTEL_SID in .env file")
         
-        self.base_url = f"https://api.exotel.com/v1/Accounts/{self.sid}"
+        api_host = os.getenv("EXOTEL_BASE_URL", "https://api.exotel.com").rstrip("/")
+        self.base_url = f"{api_host}/v1/Accounts/{self.sid}"
         self.auth = (self.api_key, self.api_token)
+        self.http = http_client or self._default_http_client()
+        # Where calls report status changes unless a call names its own (see /api/exotel/status-callback)
+        self.status_callback_url = os.getenv("EXOTEL_STATUS_CALLBACK_URL")
     
-    def make_call(self, from_number: str, to_number: str, caller_id: str, 
-                 call_type: str = "trans", time_limit: int = 14400, 
+    def _default_http_client(self) -> Any:
+        raise NotImplementedError
+    
+    def _call_payload(self, from_number: str, to_number: str, caller_id: str, call_type: str, time_limit: int,
+                      status_callback: Optional[str]) -> Dict[str, Any]:
+        """Form fields of a connect call request"""
+        payload = {
+            "From": from_number,
+            "To": to_number,
+            "CallerId": caller_id,
+            "CallType": call_type,
+            "TimeLimit": time_limit
+        }
+        
+        status_callback = status_callback or self.status_callback_url
+        if status_callback:
+            payload["StatusCallback"] = status_callback
+        return payload
+    
+    @staticmethod
+    def _sms_payload(from_number: str, to_number: str, body: str, priority: str,
+                     encoding_type: str) -> Dict[str, Any]:
+        """Form fields of a send SMS request"""
+        return {
+            "From": from_number,
+            "To": to_number,
+            "Body": body,
+            "Priority": priority,
+            "EncodingType": encoding_type
+        }
+
+class ExotelClient(ExotelClientBase):
+    """
+    Exotel client on the shared pooled httpx.Client
+    """
+    def _default_http_client(self) -> httpx.Client:
+        return get_http_client()
+    
+    def _request(self, method: str, path: str, data: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Send a request to the Exotel API and return the JSON body, raising on HTTP errors"""
+        response = self.http.request(method, f"{self.base_url}{path}", auth=self.auth, data=data)
+        response.raise_for_status()
+        
+        return response.json()
+    
+    def make_call(self, from_number: str, to_number: str, caller_id: str,
+                 call_type: str = "trans", time_limit: int = 14400,
                  status_callback: Optional[str] = None) -> Dict[str, Any]:
         """
         Make an outbound call
@@ -34,29 +139,14 @@ class ExotelClient:
             call_type: The type of call (trans, promo)
             time_limit: Maximum call duration in seconds
             status_callback: URL to receive call status updates
-            
+        
         Returns:
             API response as dictionary
         """
-        url = f"{self.base_url}/Calls/connect.json"
-        
-        payload = {
-            "From": from_number,
-            "To": to_number,
-            "CallerId": caller_id,
-            "CallType": call_type,
-            "TimeLimit": time_limit
-        }
-        
-        if status_callback:
-            payload["StatusCallback"] = status_callback
-            
-        response = requests.post(url, auth=self.auth, data=payload)
-        response.raise_for_status()
-        
-        return response.json()
+        payload = self._call_payload(from_number, to_number, caller_id, call_type, time_limit, status_callback)
+        return self._request("POST", "/Calls/connect.json", payload)
     
-    def send_sms(self, from_number: str, to_number: str, body: str, 
+    def send_sms(self, from_number: str, to_number: str, body: str,
                 priority: str = "normal", encoding_type: str = "plain") -> Dict[str, Any]:
         """
         Send SMS
@@ -67,24 +157,12 @@ class ExotelClient:
             body: SMS content
             priority: SMS priority (normal, high)
             encoding_type: Encoding type (plain, unicode)
-            
+        
         Returns:
             API response as dictionary
         """
-        url = f"{self.base_url}/Sms/send.json"
-        
-        payload = {
-            "From": from_number,
-            "To": to_number,
-            "Body": body,
-            "Priority": priority,
-            "EncodingType": encoding_type
-        }
-        
-        response = requests.post(url, auth=self.auth, data=payload)
-        response.raise_for_status()
-        
-        return response.json()
+        payload = self._sms_payload(from_number, to_number, body, priority, encoding_type)
+        return self._request("POST", "/Sms/send.json", payload)
     
     def get_call_details(self, call_sid: str) -> Dict[str, Any]:
         """
@@ -92,16 +170,11 @@ class ExotelClient:
         
         Args:
             call_sid: The SID of the call
-            
+        
         Returns:
             Call details as dictionary
         """
-        url = f"{self.base_url}/Calls/{call_sid}.json"
-        
-        response = requests.get(url, auth=self.auth)
-        response.raise_for_status()
-        
-        return response.json()
+        return self._request("GET", f"/Calls/{call_sid}.json")
     
     def get_call_recordings(self, call_sid: str) -> Dict[str, Any]:
         """
@@ -109,16 +182,11 @@ class ExotelClient:
         
         Args:
             call_sid: The SID of the call
-            
+        
         Returns:
             Recording details as dictionary
         """
-        url = f"{self.base_url}/Calls/{call_sid}/Recordings.json"
-        
-        response = requests.get(url, auth=self.auth)
-        response.raise_for_status()
-        
-        return response.json()
+        return self._request("GET", f"/Calls/{call_sid}/Recordings.json")
     
     def create_applet(self, applet_data: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -126,13 +194,175 @@ class ExotelClient:
         
         Args:
             applet_data: Dictionary containing applet configuration
-            
+        
         Returns:
             API response as dictionary
         """
-        url = f"{self.base_url}/Applets.json"
-        
-        response = requests.post(url, auth=self.auth, data=applet_data)
+        return self._request("POST", "/Applets.json", applet_data)
+
+class AsyncExotelClient(ExotelClientBase):
+    """
+    Async Exotel client on a pooled httpx.AsyncClient
+    
+    The methods of ExotelClient as coroutines, plus bulk sends that
+    stream per-recipient results. Bulk sends share one token bucket
+    (EXOTEL_RATE_LIMIT requests per second, EXOTEL_RATE_BURST at once) and run at
+    most EXOTEL_BULK_CONCURRENCY requests at a time.
+    """
+    def __init__(self, api_key: str = None, api_token: str = None,
+                 http_client: Optional[httpx.AsyncClient] = None, rate_limiter: Optional[TokenBucket] = None):
+        super().__init__(api_key, api_token, http_client)
+        self.rate_limiter = rate_limiter or TokenBucket(
+            rate=float(os.getenv("EXOTEL_RATE_LIMIT", "10")),
+            burst=int(os.getenv("EXOTEL_RATE_BURST", "10"))
+        )
+        self.bulk_concurrency = int(os.getenv("EXOTEL_BULK_CONCURRENCY", "16"))
+        self.max_retries = int(os.getenv("EXOTEL_MAX_RETRIES", "3"))
+    
+    def _default_http_client(self) -> httpx.AsyncClient:
+        return get_async_http_client()
+    
+    async def _request(self, method: str, path: str, data: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Send a request to the Exotel API and return the JSON body, raising on HTTP errors"""
+        response = await self.http.request(method, f"{self.base_url}{path}", auth=self.auth, data=data)
         response.raise_for_status()
         
         return response.json()
+    
+    async def _limited_request(self, method: str, path: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Send a request within the rate budget, retrying when Exotel throttles it
+        
+        Only 429s are retried: Exotel did not act on those, whereas a send that
+        timed out or failed with a 5xx may have gone out, and retrying could
+        message or call someone twice.
+        """
+        for attempt in range(self.max_retries + 1):
+            await self.rate_limiter.acquire()
+            try:
+                return await self._request(method, path, data)
+            except httpx.HTTPStatusError as e:
+                if e.response.status_code != 429 or attempt == self.max_retries:
+                    raise
+                pause = parse_retry_after(e.response.headers.get("Retry-After"))
+                self.rate_limiter.throttle(pause)
+                logger.info(f"Exotel throttled a bulk send, retrying ({attempt + 1}/{self.max_retries})")
+    
+    async def make_call(self, from_number: str, to_number: str, caller_id: str,
+                        call_type: str = "trans", time_limit: int = 14400,
+                        status_callback: Optional[str] = None) -> Dict[str, Any]:
+        """Make an outbound call (see ExotelClient.make_call)"""
+        payload = self._call_payload(from_number, to_number, caller_id, call_type, time_limit, status_callback)
+        return await self._request("POST", "/Calls/connect.json", payload)
+    
+    async def send_sms(self, from_number: str, to_number: str, body: str,
+                       priority: str = "normal", encoding_type: str = "plain") -> Dict[str, Any]:
+        """Send SMS (see ExotelClient.send_sms)"""
+        payload = self._sms_payload(from_number, to_number, body, priority, encoding_type)
+        return await self._request("POST", "/Sms/send.json", payload)
+    
+    async def get_call_details(self, call_sid: str) -> Dict[str, Any]:
+        """Get details of a specific call"""
+        return await self._request("GET", f"/Calls/{call_sid}.json")
+    
+    async def get_call_recordings(self, call_sid: str) -> Dict[str, Any]:
+        """Get recordings for a specific call"""
+        return await self._request("GET", f"/Calls/{call_sid}/Recordings.json")
+    
+    async def create_applet(self, applet_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Create an Exotel Applet for call flow control"""
+        return await self._request("POST", "/Applets.json", applet_data)
+    
+    async def send_bulk_sms(self, from_number: str, recipients: List[str], body: str,
+                            priority: str = "normal", encoding_type: str = "plain",
+                            concurrency: Optional[int] = None) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Send the same SMS to many recipients
+        
+        Args:
+            from_number: Your ExoPhone number
+            recipients: Recipient numbers
+            body: SMS content
+            priority: SMS priority (normal, high)
+            encoding_type: Encoding type (plain, unicode)
+            concurrency: Sends in flight (defaults to EXOTEL_BULK_CONCURRENCY)
+        
+        Yields:
+            One result per recipient as it completes (see _send_all)
+        """
+        async def send(to_number: str):
+            payload = self._sms_payload(from_number, to_number, body, priority, encoding_type)
+            return await self._limited_request("POST", "/Sms/send.json", payload)
+        
+        async for result in self._send_all(recipients, send, concurrency):
+            yield result
+    
+    async def make_bulk_calls(self, from_numbers: List[str], to_number: str, caller_id: str,
+                              call_type: str = "trans", time_limit: int = 14400,
+                              status_callback: Optional[str] = None,
+                              concurrency: Optional[int] = None) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Connect many numbers to the same destination (e.g. reminder calls to patients)
+        
+        Args:
+            from_numbers: Numbers called first, one call each
+            to_number: The number each of them is connected to
+            caller_id: Your ExoPhone number
+            call_type: The type of call (trans, promo)
+            time_limit: Maximum call duration in seconds
+            status_callback: URL to receive call status updates
+            concurrency: Calls placed at once (defaults to EXOTEL_BULK_CONCURRENCY)
+        
+        Yields:
+            One result per number as it completes (see _send_all)
+        """
+        async def call(from_number: str):
+            payload = self._call_payload(from_number, to_number, caller_id, call_type, time_limit,
+                                         status_callback)
+            return await self._limited_request("POST", "/Calls/connect.json", payload)
+        
+        async for result in self._send_all(from_numbers, call, concurrency):
+            yield result
+    
+    async def _send_all(self, recipients: List[str], send: Callable[[str], Awaitable[Dict[str, Any]]],
+                        concurrency: Optional[int]) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Run one send per recipient on a bounded set of workers
+        
+        Yields:
+            {"index", "recipient", "ok", "response"} or, on failure,
+            {"index", "recipient", "ok", "status_code", "error"}, in completion order
+        """
+        queue: asyncio.Queue = asyncio.Queue()
+        pending = iter(enumerate(recipients))
+        finished = object()
+        
+        async def worker():
+            try:
+                for index, recipient in pending:
+                    result = {"index": index, "recipient": recipient}
+                    try:
+                        result.update(ok=True, response=await send(recipient))
+                    except httpx.HTTPStatusError as e:
+                        result.update(ok=False, status_code=e.response.status_code, error=e.response.text[:500])
+                    except Exception as e:
+                        # Transport errors, and bodies that are not JSON
+                        result.update(ok=False, status_code=None, error=str(e) or type(e).__name__)
+                    queue.put_nowait(result)
+            finally:
+                # Counted by the consumer, so a worker that dies cannot leave it waiting
+                queue.put_nowait(finished)
+        
+        workers = [asyncio.ensure_future(worker())
+                   for _ in range(min(len(recipients), concurrency or self.bulk_concurrency))]
+        try:
+            running = len(workers)
+            while running:
+                result = await queue.get()
+                if result is finished:
+                    running -= 1
+                else:
+                    yield result
+        finally:
+            for task in workers:
+                task.cancel()
@@ -0,0 +1,254 @@
+import os
+import json
+import time
+import logging
+import sqlite3
+import threading
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Call statuses after which Exotel sends no further updates
+TERMINAL_STATUSES = {"completed", "failed", "busy", "no-answer", "canceled"}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS calls (
+    sid TEXT PRIMARY KEY,
+    status TEXT,
+    call TEXT NOT NULL,
+    recordings TEXT,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS call_events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    sid TEXT NOT NULL,
+    status TEXT,
+    received_at REAL NOT NULL,
+    payload TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS call_events_sid ON call_events (sid, id);
+CREATE INDEX IF NOT EXISTS calls_status ON calls (status, updated_at);
+"""
+
+def default_call_db_path() -> str:
+    """SQLite file of the call state store (EXOTEL_CALL_DB, default data/exotel_calls.db)"""
+    return os.getenv("EXOTEL_CALL_DB") or os.path.join(
+        os.path.dirname(os.path.dirname(__file__)), "data", "exotel_calls.db")
+
+def _status(value: Optional[str]) -> Optional[str]:
+    return value.strip().lower() if value else None
+
+class CallStore:
+    """
+    Local index of Exotel call state, fed by status callbacks
+
+    Each callback is kept as an event and merged into the current state of
+    calls this app placed or looked up, so the details and recordings routes
+    can answer without asking Exotel. Callbacks can arrive out of order: once a call has reached a
+    terminal status, a late non-terminal one is recorded but does not
+    change its state.
+    """
+    def __init__(self, path: Optional[str] = None, max_age: Optional[float] = None):
+        """
+        Initialize the store, creating the file if needed
+
+        Args:
+            path: SQLite file (defaults to default_call_db_path())
+            max_age: Seconds the state of a call in progress is trusted without a
+                callback, in case its callbacks are lost (defaults to
+                EXOTEL_CALL_STATE_MAX_AGE or 600)
+        """
+        self.path = path or default_call_db_path()
+        self.max_age = max_age or float(os.getenv("EXOTEL_CALL_STATE_MAX_AGE", "600"))
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.callbacks = 0
+
+    def record_callback(self, payload: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Record a status callback and return the call's merged state
+
+        Only calls this app placed or looked up (see track and save_call) take
+        their state from callbacks; anyone able to reach the callback URL could
+        post one. A callback for any other call is kept as an event only, and is
+        applied if the call is tracked later.
+
+        Args:
+            payload: Callback fields as Exotel posts them (CallSid, Status, RecordingUrl, ...)
+
+        Returns:
+            The call's merged state, or None if the call is not tracked
+
+        Raises:
+            ValueError: If the payload has no CallSid
+        """
+        sid = payload.get("CallSid") or payload.get("Sid")
+        if not sid:
+            raise ValueError("Status callback without a CallSid")
+        now = time.time()
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                self._db.execute("INSERT INTO call_events (sid, status, received_at, payload) VALUES (?, ?, ?, ?)",
+                                 (sid, _status(payload.get("Status") or payload.get("CallStatus")), now,
+                                  json.dumps(payload)))
+                call = self._merge(sid, payload, now)
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+            self.callbacks += 1
+        if call is None:
+            logger.info(f"Status callback for untracked call {sid} recorded as an event only")
+        return call
+
+    def _merge(self, sid: str, payload: Dict[str, Any], now: float) -> Optional[Dict[str, Any]]:
+        """Merge a callback into a tracked call's state (caller holds the lock and a transaction)"""
+        row = self._db.execute("SELECT status, call, recordings FROM calls WHERE sid = ?", (sid,)).fetchone()
+        if row is None:
+            return None
+        current_status, call, recordings = row[0], json.loads(row[1]), row[2]
+        status = _status(payload.get("Status") or payload.get("CallStatus"))
+        if current_status in TERMINAL_STATUSES and status not in TERMINAL_STATUSES:
+            logger.info(f"Ignoring late '{status}' callback for call {sid}, already {current_status}")
+            return call
+        call.update({key: value for key, value in payload.items() if value not in (None, "")})
+        call["Sid"] = sid
+        if status:
+            call["Status"] = current_status = status
+        if payload.get("RecordingUrl"):
+            recordings = json.dumps({"Recordings": [{"CallSid": sid, "Url": payload["RecordingUrl"]}]})
+        self._db.execute("UPDATE calls SET status = ?, call = ?, recordings = ?, updated_at = ? WHERE sid = ?",
+                         (current_status, json.dumps(call), recordings, now, sid))
+        return call
+
+    def save_call(self, call: Dict[str, Any]):
+        """Store call details fetched from Exotel (the Call object of a details response)"""
+        sid = call.get("Sid")
+        if not sid:
+            return
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO calls (sid, status, call, updated_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (sid) DO UPDATE SET status = excluded.status, call = excluded.call, "
+                "updated_at = excluded.updated_at",
+                (sid, _status(call.get("Status")), json.dumps(call), time.time())
+            )
+
+    def track(self, call: Dict[str, Any]):
+        """
+        Start answering for a call just placed with a status callback
+
+        Its state as of placing it is stored, and its callbacks keep it current
+        from then on. Callbacks that arrived before it was tracked are applied.
+        """
+        sid = call.get("Sid")
+        if not sid:
+            return
+        now = time.time()
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                created = self._db.execute(
+                    "INSERT INTO calls (sid, status, call, updated_at) VALUES (?, ?, ?, ?) ON CONFLICT (sid) DO NOTHING",
+                    (sid, _status(call.get("Status")) or "queued", json.dumps(call), now)
+                ).rowcount
+                if created:
+                    for (payload,) in self._db.execute("SELECT payload FROM call_events WHERE sid = ? ORDER BY id",
+                                                       (sid,)).fetchall():
+                        self._merge(sid, json.loads(payload), now)
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+
+    def save_recordings(self, sid: str, recordings: Dict[str, Any]):
+        """Store a recordings response fetched from Exotel"""
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO calls (sid, call, recordings, updated_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (sid) DO UPDATE SET recordings = excluded.recordings",
+                (sid, json.dumps({"Sid": sid}), json.dumps(recordings), time.time())
+            )
+
+    def get_call(self, sid: str) -> Optional[Dict[str, Any]]:
+        """A call's current state, or None if nothing is known about it"""
+        with self._lock:
+            row = self._db.execute("SELECT status, call, updated_at FROM calls WHERE sid = ?", (sid,)).fetchone()
+            # A row created only to hold recordings has no details yet
+            if row is None or row[0] is None or (
+                    row[0] not in TERMINAL_STATUSES and time.time() - row[2] > self.max_age):
+                self.misses += 1
+                return None
+            self.hits += 1
+        return json.loads(row[1])
+
+    def get_recordings(self, sid: str) -> Optional[Dict[str, Any]]:
+        """A call's stored recordings response, or None"""
+        with self._lock:
+            row = self._db.execute("SELECT recordings FROM calls WHERE sid = ?", (sid,)).fetchone()
+            if row is None or row[0] is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return json.loads(row[0])
+
+    async def call_details(self, sid: str, fetch: Callable[[str], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+        """
+        A call's details response, from the store when known, else from `fetch`
+
+        Details fetched for a call that has ended are kept, as they no longer
+        change; a call still in progress is kept current by its callbacks.
+        """
+        call = self.get_call(sid)
+        if call is not None:
+            return {"Call": call}
+        response = await fetch(sid)
+        call = response.get("Call") or {}
+        if _status(call.get("Status")) in TERMINAL_STATUSES:
+            self.save_call(call)
+        return response
+
+    async def recordings(self, sid: str, fetch: Callable[[str], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+        """A call's recordings response, from the store when known, else from `fetch` (kept once the call ended)"""
+        recordings = self.get_recordings(sid)
+        if recordings is not None:
+            return recordings
+        response = await fetch(sid)
+        if self.is_terminal(sid):
+            self.save_recordings(sid, response)
+        return response
+
+    def is_terminal(self, sid: str) -> bool:
+        with self._lock:
+            row = self._db.execute("SELECT status FROM calls WHERE sid = ?", (sid,)).fetchone()
+        return row is not None and row[0] in TERMINAL_STATUSES
+
+    def events(self, sid: str) -> List[Dict[str, Any]]:
+        """Status transitions of a call, oldest first"""
+        with self._lock:
+            rows = self._db.execute("SELECT status, received_at FROM call_events WHERE sid = ? ORDER BY id",
+                                    (sid,)).fetchall()
+        return [{"status": row[0], "received_at": row[1]} for row in rows]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            calls = self._db.execute("SELECT COUNT(*) FROM calls").fetchone()[0]
+            lookups = self.hits + self.misses
+            return {
+                "calls": calls,
+                "callbacks": self.callbacks,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0
+            }
+
+    def close(self):
+        with self._lock:
+            self._db.close()
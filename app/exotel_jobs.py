@@ -0,0 +1,390 @@
+import os
+import json
+import time
+import uuid
+import asyncio
+import logging
+import sqlite3
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+from app.api.resilience import RetryPolicy, parse_retry_after
+
+logger = logging.getLogger(__name__)
+
+# Job kinds and the AsyncExotelClient method each runs
+JOB_METHODS = {
+    "call": "make_call",
+    "sms": "send_sms",
+}
+
+QUEUED, RUNNING, SUCCEEDED, FAILED = "queued", "running", "succeeded", "failed"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    idempotency_key TEXT,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    run_at REAL NOT NULL,
+    locked_until REAL,
+    claim TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    result TEXT,
+    error TEXT,
+    UNIQUE (kind, idempotency_key)
+);
+CREATE INDEX IF NOT EXISTS jobs_ready ON jobs (status, run_at);
+"""
+
+def default_job_db_path() -> str:
+    """SQLite file of the Exotel job queue (EXOTEL_JOB_DB, default data/exotel_jobs.db)"""
+    return os.getenv("EXOTEL_JOB_DB") or os.path.join(
+        os.path.dirname(os.path.dirname(__file__)), "data", "exotel_jobs.db")
+
+class JobQueue:
+    """
+    Durable queue of outbound Exotel requests in a SQLite file
+
+    Jobs survive restarts and can be worked from several processes sharing the
+    file. A worker claims a job with a lease and a claim token, and renews the
+    lease while it holds the job; a job whose lease runs out (its worker
+    crashed) is claimed again under a new token. Updates carrying an old token
+    are ignored, so a worker that lost its job cannot overwrite the outcome
+    recorded by the one that took it over. An idempotency key maps a retried
+    submit to the job it already created, so a client resubmitting after a
+    dropped response does not send twice.
+    """
+    def __init__(self, path: Optional[str] = None, lease: Optional[float] = None):
+        """
+        Initialize the queue, creating the file if needed
+
+        Args:
+            path: SQLite file (defaults to default_job_db_path())
+            lease: Seconds a claimed job stays with its worker without a renewal
+                (defaults to EXOTEL_JOB_LEASE or 120; keep it above EXOTEL_TIMEOUT)
+        """
+        self.path = path or default_job_db_path()
+        self.lease = lease or float(os.getenv("EXOTEL_JOB_LEASE", "120"))
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        # One connection, serialized by the lock; claims also hold SQLite's write lock against other processes
+        self._db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _job(row: Optional[sqlite3.Row]) -> Optional[Dict[str, Any]]:
+        if row is None:
+            return None
+        job = dict(row)
+        job["payload"] = json.loads(job["payload"])
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        del job["locked_until"], job["claim"]
+        return job
+
+    def enqueue(self, kind: str, payload: Dict[str, Any],
+                idempotency_key: Optional[str] = None) -> Tuple[Dict[str, Any], bool]:
+        """
+        Add a job
+
+        Args:
+            kind: Job kind (a key of JOB_METHODS)
+            payload: Keyword arguments of the client method
+            idempotency_key: Caller-chosen key; a second enqueue of the same kind with it
+                returns the first job
+
+        Returns:
+            (job, created), created being False when the key matched an existing job
+        """
+        if kind not in JOB_METHODS:
+            raise ValueError(f"Unknown job kind: {kind}")
+        now = time.time()
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            try:
+                self._db.execute(
+                    "INSERT INTO jobs (id, kind, payload, idempotency_key, status, run_at, created_at, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (job_id, kind, json.dumps(payload), idempotency_key, QUEUED, now, now, now)
+                )
+                created = True
+            except sqlite3.IntegrityError:
+                created = False
+            if created:
+                row = self._db.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            else:
+                row = self._db.execute("SELECT * FROM jobs WHERE kind = ? AND idempotency_key = ?",
+                                       (kind, idempotency_key)).fetchone()
+        return self._job(row), created
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            return self._job(self._db.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone())
+
+    def claim(self) -> Optional[Dict[str, Any]]:
+        """
+        Take the next due job (or one whose lease ran out) and lease it
+
+        Returns:
+            The job with its "claim" token, which renew() and the calls finishing
+            the job need, or None if no job is due
+        """
+        now = time.time()
+        claim = uuid.uuid4().hex
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._db.execute(
+                    "SELECT id FROM jobs WHERE status = ? AND run_at <= ? ORDER BY run_at LIMIT 1",
+                    (QUEUED, now)
+                ).fetchone() or self._db.execute(
+                    "SELECT id FROM jobs WHERE status = ? AND locked_until < ? LIMIT 1", (RUNNING, now)
+                ).fetchone()
+                if row is None:
+                    self._db.execute("COMMIT")
+                    return None
+                self._db.execute(
+                    "UPDATE jobs SET status = ?, attempts = attempts + 1, locked_until = ?, claim = ?, "
+                    "updated_at = ? WHERE id = ?",
+                    (RUNNING, now + self.lease, claim, now, row["id"])
+                )
+                job = self._db.execute("SELECT * FROM jobs WHERE id = ?", (row["id"],)).fetchone()
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+        job = self._job(job)
+        job["claim"] = claim
+        return job
+
+    def renew(self, job_id: str, claim: str) -> bool:
+        """Extend the lease of a claimed job; False if the claim is no longer current"""
+        now = time.time()
+        with self._lock:
+            cursor = self._db.execute(
+                "UPDATE jobs SET locked_until = ? WHERE id = ? AND claim = ? AND status = ?",
+                (now + self.lease, job_id, claim, RUNNING)
+            )
+        return cursor.rowcount == 1
+
+    def _finish(self, job_id: str, claim: str, status: str, result: Any = None, error: Optional[str] = None,
+                run_at: Optional[float] = None, attempts: int = 0) -> bool:
+        now = time.time()
+        with self._lock:
+            cursor = self._db.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, run_at = COALESCE(?, run_at), "
+                "attempts = attempts + ?, locked_until = NULL, claim = NULL, updated_at = ? "
+                "WHERE id = ? AND claim = ?",
+                (status, json.dumps(result) if result is not None else None, error, run_at, attempts, now,
+                 job_id, claim)
+            )
+        if cursor.rowcount == 0:
+            logger.warning(f"Exotel job {job_id} was claimed again after its lease ran out; not marking it {status}")
+            return False
+        return True
+
+    def complete(self, job_id: str, claim: str, result: Any) -> bool:
+        return self._finish(job_id, claim, SUCCEEDED, result=result)
+
+    def fail(self, job_id: str, claim: str, error: str) -> bool:
+        return self._finish(job_id, claim, FAILED, error=error)
+
+    def retry(self, job_id: str, claim: str, delay: float, error: str) -> bool:
+        """Put a job back in the queue to run again after `delay` seconds"""
+        return self._finish(job_id, claim, QUEUED, error=error, run_at=time.time() + delay)
+
+    def release(self, job_id: str, claim: str) -> bool:
+        """Return a job that was claimed but not run, without counting the attempt"""
+        return self._finish(job_id, claim, QUEUED, attempts=-1)
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._db.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return {status: 0 for status in (QUEUED, RUNNING, SUCCEEDED, FAILED)} | {row[0]: row[1] for row in rows}
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+class JobWorkers:
+    """
+    Async workers running queued Exotel jobs
+
+    `workers` tasks claim jobs and run them on the client, within its rate
+    budget. Throttled requests (429) and connection failures are retried with
+    backoff up to `max_attempts`; other errors fail the job at once. As with
+    AsyncExotelClient's bulk sends, a request that timed out or failed with a
+    5xx after being sent is not retried, as Exotel may have acted on it and a
+    retry could call or message someone twice. For the same reason a job
+    cancelled by stop() mid-request is failed rather than queued again.
+
+    A worker renews its job's lease while it waits for a rate token, which a
+    throttle can delay past the lease, and checks that it still holds the job
+    right before sending, so a job is never sent by two workers.
+    """
+    def __init__(self, queue: JobQueue, client, workers: Optional[int] = None,
+                 max_attempts: Optional[int] = None, poll_interval: Optional[float] = None,
+                 on_success: Optional[Callable[[Dict[str, Any], Any], None]] = None):
+        """
+        Initialize the workers, stopped
+
+        Args:
+            queue: Job queue to work
+            client: AsyncExotelClient the jobs are sent with
+            workers: Jobs run at once (defaults to EXOTEL_JOB_WORKERS or 4)
+            max_attempts: Attempts per job (defaults to EXOTEL_JOB_MAX_ATTEMPTS or 5)
+            poll_interval: Seconds an idle worker waits before looking for due retries
+                and jobs queued by other processes (defaults to EXOTEL_JOB_POLL_INTERVAL or 1)
+            on_success: Called with the job and Exotel's response after a job succeeds
+        """
+        self.queue = queue
+        self.client = client
+        self.workers = workers or int(os.getenv("EXOTEL_JOB_WORKERS", "4"))
+        self.max_attempts = max_attempts or int(os.getenv("EXOTEL_JOB_MAX_ATTEMPTS", "5"))
+        self.poll_interval = poll_interval or float(os.getenv("EXOTEL_JOB_POLL_INTERVAL", "1"))
+        self.retry_policy = RetryPolicy(
+            max_retries=self.max_attempts - 1,
+            base_delay=float(os.getenv("EXOTEL_JOB_RETRY_BASE_DELAY", "1")),
+            max_delay=float(os.getenv("EXOTEL_JOB_RETRY_MAX_DELAY", "60")),
+            max_retry_after=float(os.getenv("EXOTEL_JOB_MAX_RETRY_AFTER", "300"))
+        )
+        self.on_success = on_success
+        self.processed = 0
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._stopping = False
+
+    def notify(self):
+        """Wake idle workers after a job is queued"""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def start(self):
+        """Start the worker tasks on the running event loop"""
+        self._stopping = False
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.ensure_future(self._work()) for _ in range(self.workers)]
+        logger.info(f"Started {self.workers} Exotel job workers on {self.queue.path}")
+
+    async def stop(self, timeout: Optional[float] = None):
+        """
+        Stop claiming jobs and let running ones finish, cancelling them after `timeout` seconds
+
+        The default (EXOTEL_JOB_STOP_TIMEOUT, or 5s more than EXOTEL_TIMEOUT) lets a
+        request in flight run into its own timeout before it is cancelled.
+        """
+        if timeout is None:
+            timeout = float(os.getenv("EXOTEL_JOB_STOP_TIMEOUT", float(os.getenv("EXOTEL_TIMEOUT", "15")) + 5))
+        self._stopping = True
+        self.notify()
+        if self._tasks:
+            _, running = await asyncio.wait(self._tasks, timeout=timeout)
+            for task in running:
+                task.cancel()
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _work(self):
+        loop = asyncio.get_running_loop()
+        while not self._stopping:
+            try:
+                job = await loop.run_in_executor(None, self.queue.claim)
+                if job is None:
+                    await self._idle()
+                    continue
+                # Another job may be waiting; let an idle worker look for it
+                self._wakeup.set()
+                await self._run(job)
+            except Exception:
+                # E.g. "database is locked"; a claimed job goes back to the queue when its lease runs out
+                logger.exception("Exotel job worker error")
+                await self._idle()
+
+    async def _idle(self):
+        """Wait for a job to be queued, or the poll interval"""
+        self._wakeup.clear()
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _acquire_holding_lease(self, job: Dict[str, Any]) -> bool:
+        """
+        Wait for a rate token, renewing the job's lease meanwhile
+
+        Returns:
+            Whether the job is still ours; the lease was just renewed if so, so it
+            outlasts the request
+        """
+        loop = asyncio.get_running_loop()
+        token = asyncio.ensure_future(self.client.rate_limiter.acquire())
+        try:
+            while True:
+                done, _ = await asyncio.wait({token}, timeout=self.queue.lease / 3)
+                if not await loop.run_in_executor(None, self.queue.renew, job["id"], job["claim"]):
+                    token.cancel()
+                    logger.warning(f"Exotel {job['kind']} job {job['id']} was claimed by another worker, not sending it")
+                    return False
+                if done:
+                    return True
+        except BaseException:
+            token.cancel()
+            raise
+
+    async def _run(self, job: Dict[str, Any]):
+        loop = asyncio.get_running_loop()
+        method = getattr(self.client, JOB_METHODS[job["kind"]])
+        sent = False
+        try:
+            if not await self._acquire_holding_lease(job):
+                return
+            sent = True
+            result = await method(**job["payload"])
+        except asyncio.CancelledError:
+            if sent:
+                # Stopped mid-request: Exotel may have acted on it, so it must not run again
+                self.queue.fail(job["id"], job["claim"],
+                                "Cancelled at shutdown after the request was sent; it may have gone out")
+            else:
+                self.queue.release(job["id"], job["claim"])
+            raise
+        except httpx.HTTPStatusError as e:
+            status = e.response.status_code
+            error = f"HTTP {status}: {e.response.text[:500]}"
+            retry_after = parse_retry_after(e.response.headers.get("Retry-After"))
+            if status == 429:
+                self.client.rate_limiter.throttle(retry_after)
+            await loop.run_in_executor(None, self._retry_or_fail, job, error, status == 429, retry_after)
+        except (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout) as e:
+            # The request never reached Exotel
+            await loop.run_in_executor(None, self._retry_or_fail, job, f"{type(e).__name__}: {e}", True)
+        except Exception as e:
+            await loop.run_in_executor(None, self._retry_or_fail, job, f"{type(e).__name__}: {e}", False)
+        else:
+            recorded = await loop.run_in_executor(None, self.queue.complete, job["id"], job["claim"], result)
+            self.processed += 1
+            if self.on_success and recorded:
+                try:
+                    self.on_success(job, result)
+                except Exception:
+                    # The job is sent and recorded; tracking it is best effort
+                    logger.exception(f"Error in on_success for Exotel {job['kind']} job {job['id']}")
+            logger.info(f"Exotel {job['kind']} job {job['id']} succeeded after {job['attempts']} attempt(s)")
+
+    def _retry_or_fail(self, job: Dict[str, Any], error: str, retryable: bool, retry_after: Optional[float] = None):
+        delay = self.retry_policy.delay(job["attempts"], retry_after) if retryable else None
+        if delay is None:
+            self.queue.fail(job["id"], job["claim"], error)
+            self.processed += 1
+            logger.warning(f"Exotel {job['kind']} job {job['id']} failed after {job['attempts']} attempt(s): {error}")
+        else:
+            self.queue.retry(job["id"], job["claim"], delay, error)
+            logger.info(f"Exotel {job['kind']} job {job['id']} retrying in {delay:.1f}s: {error}")
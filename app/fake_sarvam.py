@@ -0,0 +1,96 @@
+"""
+Local stand-in for the Sarvam AI client
+
+Mimics the parts of SarvamAI used by the app (chat completions with optional
+streaming, speech-to-text and text-to-speech) with configurable latencies,
+so the voice pipeline can be run and benchmarked offline. Enable it in the
+app with SARVAM_FAKE=1.
+"""
+
+import io
+import os
+import time
+import wave
+import base64
+import uuid
+from types import SimpleNamespace
+from typing import Any, Dict, Iterator, List, Optional
+
+DEFAULT_REPLY = ("Sexual wellness is a part of your overall health. "
+                 "It is normal to have questions about it. "
+                 "A doctor can help you with any specific concerns. "
+                 "Please do not hesitate to reach out.")
+
+def silent_wav(duration: float = 0.2, sample_rate: int = 8000) -> bytes:
+    """Generate a silent mono 16-bit WAV clip"""
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(sample_rate)
+        wav_file.writeframes(b"\x00\x00" * int(duration * sample_rate))
+    return buffer.getvalue()
+
+class FakeSarvamAI:
+    """Offline Sarvam AI client with deterministic responses and simulated latency"""
+    def __init__(self, reply: str = DEFAULT_REPLY, transcript: str = "What is sexual wellness?",
+                 stt_latency: float = None, first_token_latency: float = None,
+                 token_latency: float = None, tts_latency: float = None):
+        """
+        Initialize the fake client
+
+        Args:
+            reply: Text returned by chat completions
+            transcript: Text returned by speech-to-text
+            stt_latency: Seconds spent per transcription
+            first_token_latency: Seconds before the first chat token
+            token_latency: Seconds between streamed chat tokens
+            tts_latency: Seconds spent per text-to-speech conversion
+        """
+        self.reply = reply
+        self.transcript = transcript
+        self.stt_latency = stt_latency if stt_latency is not None else float(os.getenv("FAKE_SARVAM_STT_LATENCY", "0.3"))
+        self.first_token_latency = (first_token_latency if first_token_latency is not None
+                                    else float(os.getenv("FAKE_SARVAM_FIRST_TOKEN_LATENCY", "0.3")))
+        self.token_latency = token_latency if token_latency is not None else float(os.getenv("FAKE_SARVAM_TOKEN_LATENCY", "0.02"))
+        self.tts_latency = tts_latency if tts_latency is not None else float(os.getenv("FAKE_SARVAM_TTS_LATENCY", "0.3"))
+
+        self.chat = SimpleNamespace(completions=self._chat_completions)
+        self.speech_to_text = SimpleNamespace(transcribe=self._transcribe)
+        self.text_to_speech = SimpleNamespace(convert=self._convert)
+
+    def _tokens(self) -> List[str]:
+        words = self.reply.split(" ")
+        return [word if i == len(words) - 1 else word + " " for i, word in enumerate(words)]
+
+    def _chat_completions(self, model: str = "sarvam-m", messages: Optional[List[Dict[str, str]]] = None,
+                          stream: bool = False, **kwargs) -> Any:
+        if stream:
+            return self._stream_completions()
+        time.sleep(self.first_token_latency + self.token_latency * len(self._tokens()))
+        return {
+            "id": f"fake-{uuid.uuid4()}",
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": self.reply}}],
+        }
+
+    def _stream_completions(self) -> Iterator[Dict[str, Any]]:
+        time.sleep(self.first_token_latency)
+        for i, token in enumerate(self._tokens()):
+            if i:
+                time.sleep(self.token_latency)
+            yield {"choices": [{"index": 0, "delta": {"content": token}}]}
+
+    def _transcribe(self, file: Any = None, model: str = "saarika:v2.5", language_code: str = "en-IN",
+                    **kwargs) -> Dict[str, Any]:
+        if isinstance(file, tuple):
+            file = file[1]
+        if file is not None and hasattr(file, "read"):
+            file.read()
+        time.sleep(self.stt_latency)
+        return {"request_id": f"fake-{uuid.uuid4()}", "transcript": self.transcript, "language_code": language_code}
+
+    def _convert(self, text: str, target_language_code: str = "en-IN", speaker: str = "Anushka",
+                 **kwargs) -> Dict[str, Any]:
+        time.sleep(self.tts_latency)
+        audio = silent_wav(duration=min(5.0, 0.05 * len(text.split())))
+        return {"request_id": f"fake-{uuid.uuid4()}", "audios": [base64.b64encode(audio).decode("utf-8")]}
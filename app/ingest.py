@@ -0,0 +1,56 @@
+"""
+Bulk knowledge ingestion CLI
+
+Streams a JSONL or CSV file of question/answer pairs into the sexual wellness
+vector database, embedding in large batches and persisting once at the end.
+
+Usage:
+    python -m app.ingest knowledge.jsonl --batch-size 256 --chunk-size 4096
+    python -m app.ingest knowledge.csv --format csv
+"""
+
+import sys
+import argparse
+import logging
+from typing import Any, Dict
+
+from app.knowledge_io import KNOWLEDGE_FORMATS, detect_format, iter_knowledge_records
+from app.vector_db import INDEX_TYPES, SexualWellnessVectorDB
+from app.embeddings import EMBEDDING_BACKENDS
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk-load question/answer pairs into the wellness vector DB")
+    parser.add_argument("path", help="JSONL or CSV file, or - for JSONL on stdin")
+    parser.add_argument("--format", choices=KNOWLEDGE_FORMATS, help="Input format (guessed from the extension)")
+    parser.add_argument("--batch-size", type=int, default=256, help="Encoder batch size")
+    parser.add_argument("--chunk-size", type=int, default=4096, help="Documents embedded and indexed per chunk")
+    parser.add_argument("--index-type", choices=INDEX_TYPES, help="Index backend (defaults to WELLNESS_INDEX_TYPE)")
+    parser.add_argument("--embedding-backend", choices=EMBEDDING_BACKENDS,
+                        help="Embedding backend (defaults to WELLNESS_EMBEDDING_BACKEND)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+
+    fmt = args.format or detect_format(args.path)
+    stats = {"skipped": 0}
+
+    def report(update: Dict[str, Any]):
+        print(f"added={update['added']} skipped={stats['skipped']} elapsed={update['elapsed']:.1f}s "
+              f"throughput={update['docs_per_sec']:.1f} docs/s", file=sys.stderr)
+
+    vector_db = SexualWellnessVectorDB(index_type=args.index_type, embedding_backend=args.embedding_backend)
+    if args.path == "-":
+        records = iter_knowledge_records(sys.stdin.buffer, fmt, stats=stats)
+        result = vector_db.add_documents_stream(records, batch_size=args.batch_size,
+                                                chunk_size=args.chunk_size, progress_callback=report)
+    else:
+        with open(args.path, "rb") as f:
+            records = iter_knowledge_records(f, fmt, stats=stats)
+            result = vector_db.add_documents_stream(records, batch_size=args.batch_size,
+                                                    chunk_size=args.chunk_size, progress_callback=report)
+
+    print(f"Done: added {result['added']} documents ({stats['skipped']} skipped) in {result['elapsed']:.1f}s, "
+          f"{result['docs_per_sec']:.1f} docs/s. Corpus size: {vector_db.count}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+import io
+import csv
+import json
+import logging
+from typing import Any, BinaryIO, Dict, Iterator, Optional, TextIO, Union
+
+logger = logging.getLogger(__name__)
+
+KNOWLEDGE_FORMATS = ("jsonl", "csv")
+
+def detect_format(filename: Optional[str], default: str = "jsonl") -> str:
+    """Guess the knowledge file format from its extension"""
+    if filename and filename.lower().endswith(".csv"):
+        return "csv"
+    if filename and filename.lower().endswith((".jsonl", ".ndjson")):
+        return "jsonl"
+    return default
+
+def iter_knowledge_records(stream: Union[BinaryIO, TextIO], fmt: str = "jsonl",
+                           stats: Optional[Dict[str, int]] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Stream question/answer records from a JSONL or CSV file without loading it into memory
+
+    Records without a non-empty string question and answer are skipped.
+
+    Args:
+        stream: A binary or text file object
+        fmt: "jsonl" (one JSON object per line) or "csv" (with question and answer columns)
+        stats: Optional dict whose "skipped" counter is incremented for invalid records
+
+    Yields:
+        Dicts with 'question' and 'answer' fields
+    """
+    if fmt not in KNOWLEDGE_FORMATS:
+        raise ValueError(f"Unsupported knowledge format: {fmt}. Expected one of {KNOWLEDGE_FORMATS}")
+
+    if isinstance(stream, io.TextIOBase):
+        text = stream
+    else:
+        text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+
+    if fmt == "csv":
+        rows = csv.DictReader(text)
+    else:
+        rows = _iter_json_lines(text, stats)
+
+    for row in rows:
+        question = row.get("question")
+        answer = row.get("answer")
+        if isinstance(question, str) and isinstance(answer, str):
+            question, answer = question.strip(), answer.strip()
+        if not isinstance(question, str) or not isinstance(answer, str) or not question or not answer:
+            if stats is not None:
+                stats["skipped"] = stats.get("skipped", 0) + 1
+            continue
+        yield {"question": question, "answer": answer}
+
+def _iter_json_lines(text: TextIO, stats: Optional[Dict[str, int]]) -> Iterator[Dict[str, Any]]:
+    for line_number, line in enumerate(text, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError:
+            logger.warning(f"Skipping invalid JSON on line {line_number}")
+            record = None
+        if not isinstance(record, dict):
+            if stats is not None:
+                stats["skipped"] = stats.get("skipped", 0) + 1
+            continue
+        yield record
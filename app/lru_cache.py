@@ -0,0 +1,79 @@
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+class LRUCache:
+    """
+    Bounded, thread-safe LRU cache with hit/miss counters and an optional time to live
+
+    The base of the query embedding and response caches. With a `ttl`, entries
+    expire that many seconds after they are stored.
+    """
+    def __init__(self, max_size: int = 10000, ttl: Optional[float] = None):
+        """
+        Initialize the cache
+
+        Args:
+            max_size: Maximum number of entries (0 disables caching)
+            ttl: Seconds an entry stays valid (None keeps entries until they are evicted)
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        # key -> (expiry on the monotonic clock or None, value)
+        self._entries: "OrderedDict[Hashable, Tuple[Optional[float], Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value, or None if missing or expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] is not None and entry[0] < time.monotonic():
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: Hashable, value: Any):
+        """Cache a value, evicting the least recently used entries if full"""
+        if self.max_size <= 0:
+            return
+        expires = time.monotonic() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            self._entries[key] = (expires, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def items(self) -> List[Tuple[Hashable, Any]]:
+        """Snapshot of the cached (key, value) pairs, least recently used first"""
+        with self._lock:
+            return [(key, entry[1]) for key, entry in self._entries.items()]
+
+    def clear(self):
+        """Drop all entries"""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and the current size"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            stats = {"size": len(self._entries), "max_size": self.max_size}
+            if self.ttl is not None:
+                stats["ttl"] = self.ttl
+            stats.update({
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0
+            })
+            return stats
@@ -0,0 +1,111 @@
+import os
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+class QueryBatcher:
+    """
+    Coalesce concurrent requests into batched calls
+
+    Requests submitted within a short window, or until the batch is full, are
+    handed to `handler` as one list and each caller gets back its own result.
+    When no batch is in flight a request is dispatched immediately, so an idle
+    service pays no batching delay; under load requests queue up behind the
+    running batch and are coalesced.
+    The handler is blocking (batched encode + search) and runs on a small
+    worker pool, so the event loop stays free while a batch is processed.
+    All batching state is only touched from the event loop thread.
+    """
+    def __init__(self, handler: Callable[[List[Any]], List[Any]],
+                 max_batch_size: Optional[int] = None,
+                 max_wait_ms: Optional[float] = None,
+                 max_concurrent_batches: int = 2):
+        """
+        Initialize the batcher
+
+        Args:
+            handler: Blocking function mapping a list of items to a list of results, in order
+            max_batch_size: Flush as soon as this many requests are waiting
+                (defaults to WELLNESS_BATCH_MAX_SIZE or 64)
+            max_wait_ms: Longest time the first request of a batch waits for company
+                (defaults to WELLNESS_BATCH_WINDOW_MS or 5)
+            max_concurrent_batches: Batches processed in parallel
+        """
+        self.handler = handler
+        self.max_batch_size = max_batch_size or int(os.getenv("WELLNESS_BATCH_MAX_SIZE", "64"))
+        if max_wait_ms is None:
+            max_wait_ms = float(os.getenv("WELLNESS_BATCH_WINDOW_MS", "5"))
+        self.max_wait = max_wait_ms / 1000
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrent_batches, thread_name_prefix="query-batch")
+        self._pending: List[Tuple[Any, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._in_flight = 0
+        self.batches = 0
+        self.items = 0
+
+    async def submit(self, item: Any) -> Any:
+        """Queue an item for the next batch and wait for its result"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((item, future))
+
+        if len(self._pending) >= self.max_batch_size or self._in_flight == 0:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+
+        return await future
+
+    def _flush(self):
+        """Hand the waiting requests to the handler as one batch"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        # Callers that gave up (cancelled) do not need a result
+        batch = [(item, future) for item, future in batch if not future.done()]
+        if not batch:
+            return
+
+        self.batches += 1
+        self.items += len(batch)
+        self._in_flight += 1
+        loop = asyncio.get_running_loop()
+        job = loop.run_in_executor(self._executor, self.handler, [item for item, _ in batch])
+        job.add_done_callback(lambda done: self._resolve(batch, done))
+
+    def _resolve(self, batch: List[Tuple[Any, asyncio.Future]], job: asyncio.Future):
+        """Deliver each result (or the batch's error) to its caller"""
+        self._in_flight -= 1
+        if self._pending and self._in_flight == 0:
+            self._flush()
+        if job.cancelled():
+            for _, future in batch:
+                future.cancel()
+            return
+        error = job.exception()
+        results = None if error else job.result()
+        if results is not None and len(results) != len(batch):
+            error = RuntimeError(f"Batch handler returned {len(results)} results for {len(batch)} items")
+        for i, (_, future) in enumerate(batch):
+            if future.done():
+                continue
+            if error:
+                future.set_exception(error)
+            else:
+                future.set_result(results[i])
+
+    def stats(self):
+        """Return the number of batches run and their average size"""
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "avg_batch_size": round(self.items / self.batches, 2) if self.batches else 0.0
+        }
+
+    def shutdown(self):
+        """Shut down the worker pool"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
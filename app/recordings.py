@@ -0,0 +1,479 @@
+"""
+Call recording transcription pipeline
+
+Streams Exotel call recordings (WAV or MP3) to disk, transcribes them with Sarvam
+speech-to-text in chunks short enough for the API, and indexes the
+transcript segments into a vector database for search.
+
+Usage:
+    python -m app.recordings CALL_SID RECORDING_URL [CALL_SID RECORDING_URL ...]
+"""
+
+import io
+import os
+import sys
+import time
+import uuid
+import wave
+import asyncio
+import logging
+import argparse
+import threading
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+from urllib.parse import urlsplit
+
+import httpx
+
+from app.sarvam_async import audio_file
+
+logger = logging.getLogger(__name__)
+
+# Sarvam's synchronous speech-to-text accepts up to 30 seconds of audio per request
+DEFAULT_CHUNK_SECONDS = 30.0
+
+def default_recordings_dir() -> str:
+    """Directory recordings are downloaded to (EXOTEL_RECORDINGS_DIR, default data/recordings)"""
+    return os.getenv("EXOTEL_RECORDINGS_DIR") or os.path.join(
+        os.path.dirname(os.path.dirname(__file__)), "data", "recordings")
+
+def default_transcript_db_path() -> str:
+    """
+    Vector database directory call transcripts are indexed into
+
+    EXOTEL_TRANSCRIPT_DB_PATH, default data/call_transcripts_db. Kept apart from
+    the wellness knowledge base by default, so what one caller said never comes
+    back as an answer to another.
+    """
+    return os.getenv("EXOTEL_TRANSCRIPT_DB_PATH") or os.path.join(
+        os.path.dirname(os.path.dirname(__file__)), "data", "call_transcripts_db")
+
+def default_recording_hosts() -> Set[str]:
+    """
+    Hosts recordings are downloaded from, with the Exotel credentials
+
+    EXOTEL_RECORDING_HOSTS (comma-separated), default Exotel's recordings host and
+    the API host of EXOTEL_BASE_URL. Recording URLs can arrive in status
+    callbacks, so any other host is refused rather than sent the credentials.
+    """
+    configured = os.getenv("EXOTEL_RECORDING_HOSTS")
+    if configured:
+        return {host.strip().lower() for host in configured.split(",") if host.strip()}
+    api_host = urlsplit(os.getenv("EXOTEL_BASE_URL", "https://api.exotel.com")).hostname or "api.exotel.com"
+    return {"recordings.exotel.com", api_host.lower()}
+
+# MPEG audio frame header tables: bitrates (kbps) by (MPEG-1, layer) and sample rates by version
+_MP3_BITRATES = {
+    (True, 1): (0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448),
+    (True, 2): (0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384),
+    (True, 3): (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    (False, 1): (0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256),
+    (False, 2): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+    (False, 3): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+_MP3_SAMPLE_RATES = {3: (44100, 48000, 32000), 2: (22050, 24000, 16000), 0: (11025, 12000, 8000)}
+
+AUDIO_CONTENT_TYPES = {".wav": "audio/wav", ".mp3": "audio/mpeg"}
+
+def audio_chunks(path: str, chunk_seconds: float) -> Iterator[Tuple[float, float, bytes, str]]:
+    """
+    Split a WAV or MP3 recording into standalone clips, reading one clip at a time
+
+    Yields:
+        (start seconds, end seconds, clip bytes, file extension) per clip
+
+    Raises:
+        ValueError: If the file is neither WAV nor MP3
+    """
+    with open(path, "rb") as f:
+        head = f.read(4)
+    if head == b"RIFF":
+        for start, end, clip in wav_chunks(path, chunk_seconds):
+            yield start, end, clip, ".wav"
+    elif head[:3] == b"ID3" or _mp3_frame(head) is not None:
+        for start, end, clip in mp3_chunks(path, chunk_seconds):
+            yield start, end, clip, ".mp3"
+    else:
+        raise ValueError(f"Unsupported recording format in {os.path.basename(path)}: expected WAV or MP3")
+
+def wav_chunks(path: str, chunk_seconds: float) -> Iterator[Tuple[float, float, bytes]]:
+    """
+    Split a WAV file into standalone WAV clips, reading one clip at a time
+
+    Yields:
+        (start seconds, end seconds, WAV bytes) per clip
+    """
+    with wave.open(path, "rb") as source:
+        rate = source.getframerate()
+        frames_per_chunk = max(1, int(chunk_seconds * rate))
+        start = 0
+        while True:
+            frames = source.readframes(frames_per_chunk)
+            count = len(frames) // (source.getsampwidth() * source.getnchannels())
+            if not count:
+                break
+            buffer = io.BytesIO()
+            with wave.open(buffer, "wb") as clip:
+                clip.setnchannels(source.getnchannels())
+                clip.setsampwidth(source.getsampwidth())
+                clip.setframerate(rate)
+                clip.writeframes(frames)
+            yield start / rate, (start + count) / rate, buffer.getvalue()
+            start += count
+
+def _mp3_frame(header: bytes) -> Optional[Tuple[int, float]]:
+    """(frame bytes, frame seconds) of an MPEG audio frame header, or None if it is not one"""
+    if len(header) < 4 or header[0] != 0xFF or header[1] & 0xE0 != 0xE0:
+        return None
+    version = (header[1] >> 3) & 0x3
+    layer = 4 - ((header[1] >> 1) & 0x3)
+    bitrate_index = header[2] >> 4
+    rate_index = (header[2] >> 2) & 0x3
+    if version == 1 or layer == 4 or bitrate_index in (0, 15) or rate_index == 3:
+        return None
+    mpeg1 = version == 3
+    bitrate = _MP3_BITRATES[(mpeg1, layer)][bitrate_index] * 1000
+    rate = _MP3_SAMPLE_RATES[version][rate_index]
+    padding = (header[2] >> 1) & 0x1
+    if layer == 1:
+        return (12 * bitrate // rate + padding) * 4, 384 / rate
+    samples = 1152 if mpeg1 or layer == 2 else 576
+    return samples // 8 * bitrate // rate + padding, samples / rate
+
+def mp3_chunks(path: str, chunk_seconds: float) -> Iterator[Tuple[float, float, bytes]]:
+    """
+    Split an MP3 file into clips at frame boundaries, reading one clip at a time
+
+    Each clip is a run of whole frames, which decoders play on their own; tags
+    and bytes that are not frame data are dropped.
+
+    Yields:
+        (start seconds, end seconds, MP3 bytes) per clip
+    """
+    with open(path, "rb") as f:
+        header = f.read(10)
+        if header[:3] == b"ID3" and len(header) == 10:
+            size = (header[6] << 21) | (header[7] << 14) | (header[8] << 7) | header[9]
+            f.seek(10 + size + (10 if header[5] & 0x10 else 0))
+        else:
+            f.seek(0)
+        start = end = 0.0
+        clip = bytearray()
+        while True:
+            header = f.read(4)
+            if len(header) < 4:
+                break
+            frame = _mp3_frame(header)
+            if frame is None:
+                # Not a frame (e.g. a trailing tag): resynchronize one byte on
+                f.seek(-3, os.SEEK_CUR)
+                continue
+            body = f.read(frame[0] - 4)
+            if len(body) < frame[0] - 4:
+                break
+            clip += header + body
+            end += frame[1]
+            if end - start >= chunk_seconds:
+                yield start, end, bytes(clip)
+                start, clip = end, bytearray()
+        if clip:
+            yield start, end, bytes(clip)
+
+class RecordingPipeline:
+    """
+    Download, transcribe and index call recordings
+
+    Recordings are streamed to disk in fixed-size chunks, so memory use does not
+    grow with call length, and are skipped if already downloaded. Each one is
+    split into clips of `chunk_seconds`, transcribed concurrently on the Sarvam
+    client's bounded speech-to-text pool (SARVAM_STT_CONCURRENCY), and its
+    segments are indexed in one batch. At most `concurrency` recordings are in
+    flight at once.
+    """
+    def __init__(self, sarvam, http_client: httpx.AsyncClient, auth: Optional[Tuple[str, str]] = None,
+                 index: Optional[Callable[[List[Dict[str, Any]]], Any]] = None,
+                 directory: Optional[str] = None, concurrency: Optional[int] = None,
+                 chunk_seconds: Optional[float] = None, download_chunk_size: int = 64 * 1024,
+                 language_code: str = "en-IN", model: str = "saarika:v2.5",
+                 hosts: Optional[Iterable[str]] = None):
+        """
+        Initialize the pipeline
+
+        Args:
+            sarvam: AsyncSarvamClient used for speech-to-text
+            http_client: Client recordings are downloaded with (the pooled Exotel one)
+            auth: Credentials recording URLs require (Exotel's API key and token)
+            index: Blocking function adding transcript documents to a vector database
+                (None skips indexing)
+            directory: Where recordings are saved (defaults to default_recordings_dir())
+            concurrency: Recordings processed at once (defaults to EXOTEL_RECORDING_CONCURRENCY or 4)
+            chunk_seconds: Audio per speech-to-text request (defaults to EXOTEL_STT_CHUNK_SECONDS or 30)
+            download_chunk_size: Bytes read from the network and written to disk at a time
+            language_code: Language of the calls
+            model: Speech-to-text model
+            hosts: Hosts recordings may be downloaded from (defaults to default_recording_hosts())
+        """
+        self.sarvam = sarvam
+        self.http = http_client
+        self.auth = auth
+        self.index = index
+        self.directory = directory or default_recordings_dir()
+        self.concurrency = concurrency or int(os.getenv("EXOTEL_RECORDING_CONCURRENCY", "4"))
+        self.chunk_seconds = chunk_seconds or float(os.getenv("EXOTEL_STT_CHUNK_SECONDS", str(DEFAULT_CHUNK_SECONDS)))
+        self.download_chunk_size = download_chunk_size
+        self.language_code = language_code
+        self.model = model
+        self.hosts = {host.lower() for host in hosts} if hosts is not None else default_recording_hosts()
+        self.recordings = 0
+        self.failures = 0
+        self.bytes_downloaded = 0
+        self.audio_seconds = 0.0
+        self.download_seconds = 0.0
+        self.transcribe_seconds = 0.0
+        self.index_seconds = 0.0
+        self.segments_indexed = 0
+        self._started: Optional[float] = None
+        os.makedirs(self.directory, exist_ok=True)
+
+    def recording_path(self, call_sid: str, url: str) -> str:
+        extension = os.path.splitext(url.split("?")[0])[1] or ".wav"
+        # SIDs come from callbacks, so keep them from naming a path outside the directory
+        name = "".join(c if c.isalnum() or c in "-_" else "_" for c in call_sid)
+        return os.path.join(self.directory, f"{name}{extension[:8]}")
+
+    async def download(self, call_sid: str, url: str) -> str:
+        """
+        Stream a recording to disk and return its path
+
+        The file is written under a temporary name and renamed when complete, so
+        an interrupted download is never mistaken for a recording.
+
+        Raises:
+            ValueError: If the URL is not on one of the recording hosts
+        """
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https") or (parts.hostname or "").lower() not in self.hosts:
+            raise ValueError(f"Refusing to download a recording from {parts.hostname or url}: not a recording host")
+        path = self.recording_path(call_sid, url)
+        if os.path.exists(path):
+            return path
+        # Unique, as the same call can be downloaded by a callback and the transcribe route at once
+        partial = f"{path}.{uuid.uuid4().hex}.part"
+        start = time.perf_counter()
+        try:
+            async with self.http.stream("GET", url, auth=self.auth) as response:
+                response.raise_for_status()
+                with open(partial, "wb") as f:
+                    async for chunk in response.aiter_bytes(self.download_chunk_size):
+                        f.write(chunk)
+                        self.bytes_downloaded += len(chunk)
+            os.replace(partial, path)
+        finally:
+            if os.path.exists(partial):
+                os.remove(partial)
+            self.download_seconds += time.perf_counter() - start
+        return path
+
+    async def transcribe(self, path: str) -> List[Dict[str, Any]]:
+        """
+        Transcribe a recording clip by clip
+
+        Clips are read from disk one at a time and submitted as they are read,
+        as many at once as the speech-to-text pool runs.
+
+        Returns:
+            Segments with start and end seconds and transcript, in order
+        """
+        async def one(start: float, end: float, audio: bytes, extension: str) -> Dict[str, Any]:
+            clip = audio_file(audio, f"{os.path.basename(path)}-{start:.0f}{extension}",
+                              AUDIO_CONTENT_TYPES[extension])
+            response = await self.sarvam.transcribe(file=clip, model=self.model, language_code=self.language_code)
+            transcript = response.get("transcript") if isinstance(response, dict) else getattr(response, "transcript", "")
+            return {"start": start, "end": end, "transcript": (transcript or "").strip()}
+
+        # Read the next clip only when a request slot frees up, so a long call is never all in memory
+        slots = asyncio.Semaphore(self.sarvam.limits["stt"])
+
+        async def bounded(clip: Tuple[float, float, bytes, str]) -> Dict[str, Any]:
+            try:
+                return await one(*clip)
+            finally:
+                slots.release()
+
+        start = time.perf_counter()
+        tasks = []
+        try:
+            for clip in audio_chunks(path, self.chunk_seconds):
+                tasks.append(asyncio.ensure_future(bounded(clip)))
+                await slots.acquire()
+            segments = await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            raise
+        finally:
+            self.transcribe_seconds += time.perf_counter() - start
+        self.audio_seconds += segments[-1]["end"] if segments else 0.0
+        return list(segments)
+
+    async def _index(self, call_sid: str, segments: List[Dict[str, Any]]) -> int:
+        documents = [
+            {
+                "question": segment["transcript"],
+                "answer": segment["transcript"],
+                "source": "call_recording",
+                "call_sid": call_sid,
+                "start": segment["start"],
+                "end": segment["end"]
+            }
+            for segment in segments if segment["transcript"]
+        ]
+        if not documents or self.index is None:
+            return 0
+        start = time.perf_counter()
+        await asyncio.get_running_loop().run_in_executor(None, self.index, documents)
+        self.index_seconds += time.perf_counter() - start
+        self.segments_indexed += len(documents)
+        return len(documents)
+
+    async def process(self, call_sid: str, url: str) -> Dict[str, Any]:
+        """
+        Download, transcribe and index one recording
+
+        Returns:
+            {"call_sid", "path", "segments", "transcript", "indexed", "elapsed"}
+        """
+        if self._started is None:
+            self._started = time.perf_counter()
+        start = time.perf_counter()
+        try:
+            path = await self.download(call_sid, url)
+            segments = await self.transcribe(path)
+            indexed = await self._index(call_sid, segments)
+        except Exception:
+            self.failures += 1
+            raise
+        self.recordings += 1
+        logger.info(f"Transcribed recording of call {call_sid}: {len(segments)} segments, {indexed} indexed")
+        return {
+            "call_sid": call_sid,
+            "path": path,
+            "segments": segments,
+            "transcript": " ".join(segment["transcript"] for segment in segments if segment["transcript"]),
+            "indexed": indexed,
+            "elapsed": round(time.perf_counter() - start, 3)
+        }
+
+    async def run(self, recordings: Iterable[Tuple[str, str]]) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Process many recordings, `concurrency` at a time
+
+        Args:
+            recordings: (call SID, recording URL) pairs
+
+        Yields:
+            The result of process() per recording, or {"call_sid", "url", "error"}, in completion order
+        """
+        queue: asyncio.Queue = asyncio.Queue()
+        pending = iter(recordings)
+        total = 0
+        done = object()
+
+        async def worker():
+            for call_sid, url in pending:
+                try:
+                    result = await self.process(call_sid, url)
+                except Exception as e:
+                    logger.warning(f"Recording of call {call_sid} failed: {e}")
+                    result = {"call_sid": call_sid, "url": url, "error": str(e) or type(e).__name__}
+                await queue.put(result)
+            await queue.put(done)
+
+        workers = [asyncio.ensure_future(worker()) for _ in range(self.concurrency)]
+        try:
+            while total < len(workers):
+                result = await queue.get()
+                if result is done:
+                    total += 1
+                    continue
+                yield result
+        finally:
+            for task in workers:
+                task.cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        """Throughput so far"""
+        elapsed = time.perf_counter() - self._started if self._started else 0.0
+        return {
+            "recordings": self.recordings,
+            "failures": self.failures,
+            "elapsed_s": round(elapsed, 3),
+            "recordings_per_min": round(60 * self.recordings / elapsed, 1) if elapsed else 0.0,
+            "audio_minutes": round(self.audio_seconds / 60, 2),
+            "audio_minutes_per_min": round(self.audio_seconds / elapsed, 2) if elapsed else 0.0,
+            "mb_downloaded": round(self.bytes_downloaded / 1e6, 2),
+            "download_s": round(self.download_seconds, 3),
+            "transcribe_s": round(self.transcribe_seconds, 3),
+            "index_s": round(self.index_seconds, 3),
+            "segments_indexed": self.segments_indexed
+        }
+
+def transcript_indexer(db_path: Optional[str] = None,
+                       encoder: Optional[Callable[[], Any]] = None) -> Callable[[List[Dict[str, Any]]], Any]:
+    """
+    add_documents of the call transcript vector database (see default_transcript_db_path)
+
+    The database is loaded on the first call, without the default wellness
+    entries. `encoder` returns an already loaded embedding model to share;
+    without it the database loads its own. Nothing searches the transcripts
+    yet, so the database is only written to.
+    """
+    vector_db = None
+    lock = threading.Lock()
+
+    def index(documents: List[Dict[str, Any]]):
+        nonlocal vector_db
+        with lock:
+            if vector_db is None:
+                from app.vector_db import SexualWellnessVectorDB
+                vector_db = SexualWellnessVectorDB(db_path=db_path or default_transcript_db_path(),
+                                                   encoder=encoder() if encoder else None, seed_defaults=False)
+        vector_db.add_documents(documents)
+
+    return index
+
+async def _main(args):
+    from dotenv import load_dotenv
+    from sarvamai import SarvamAI
+    from app.exotel import AsyncExotelClient, close_async_http_client
+    from app.sarvam_async import AsyncSarvamClient
+
+    load_dotenv()
+    exotel = AsyncExotelClient()
+    sarvam = AsyncSarvamClient(SarvamAI(api_subscription_key=os.getenv("SARVAM_API")))
+    pipeline = RecordingPipeline(sarvam, exotel.http, exotel.auth,
+                                 index=None if args.no_index else transcript_indexer(),
+                                 concurrency=args.concurrency, language_code=args.language_code)
+    pairs = list(zip(args.recordings[::2], args.recordings[1::2]))
+    try:
+        async for result in pipeline.run(pairs):
+            if "error" in result:
+                print(f"{result['call_sid']}: failed: {result['error']}", file=sys.stderr)
+            else:
+                print(f"{result['call_sid']}: {len(result['segments'])} segments in {result['elapsed']}s: "
+                      f"{result['transcript'][:200]}")
+    finally:
+        await close_async_http_client()
+        sarvam.shutdown()
+    print(pipeline.stats(), file=sys.stderr)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Download, transcribe and index Exotel call recordings")
+    parser.add_argument("recordings", nargs="+", help="Call SID and recording URL pairs")
+    parser.add_argument("--concurrency", type=int, help="Recordings processed at once")
+    parser.add_argument("--language-code", default="en-IN")
+    parser.add_argument("--no-index", action="store_true", help="Transcribe without indexing")
+    cli_args = parser.parse_args()
+    if len(cli_args.recordings) % 2:
+        parser.error("recordings must be CALL_SID URL pairs")
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    asyncio.run(_main(cli_args))
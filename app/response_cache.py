@@ -0,0 +1,29 @@
+from typing import Any, Optional
+
+from app.embedding_cache import normalize_query
+from app.lru_cache import LRUCache
+
+class ResponseCache(LRUCache):
+    """
+    Bounded LRU cache of normalized query text to response, with a time to live
+
+    Thread-safe, with hit/miss counters. Entries expire `ttl` seconds after they
+    are stored; the owner clears the cache when the corpus changes.
+    """
+    def __init__(self, max_size: int = 10000, ttl: float = 300.0):
+        """
+        Initialize the cache
+
+        Args:
+            max_size: Maximum number of cached responses (0 disables caching)
+            ttl: Seconds a response stays valid
+        """
+        super().__init__(max_size=max_size, ttl=ttl)
+
+    def get(self, text: str) -> Optional[Any]:
+        """Return the cached response for a query, or None if missing or expired"""
+        return super().get(normalize_query(text))
+
+    def put(self, text: str, response: Any):
+        """Cache the response to a query, evicting the least recently used entry if full"""
+        super().put(normalize_query(text), response)
@@ -0,0 +1,198 @@
+import os
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, AsyncIterator, BinaryIO, Callable, Dict, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+class AsyncSarvamClient:
+    """
+    Async execution layer around the synchronous Sarvam AI client.
+
+    Every Sarvam call runs on a dedicated, bounded thread pool per endpoint
+    (chat, speech-to-text, text-to-speech), so a slow upstream call never
+    blocks the event loop and a stuck endpoint cannot starve the others.
+    """
+    def __init__(self, client: Any,
+                 chat_concurrency: Optional[int] = None,
+                 stt_concurrency: Optional[int] = None,
+                 tts_concurrency: Optional[int] = None,
+                 timeout: Optional[float] = None):
+        """
+        Initialize the async Sarvam client
+
+        Args:
+            client: A synchronous SarvamAI client
+            chat_concurrency: Max concurrent chat completion calls
+            stt_concurrency: Max concurrent speech-to-text calls
+            tts_concurrency: Max concurrent text-to-speech calls
+            timeout: Seconds to wait for a call before giving up (None waits forever)
+
+        A call that times out keeps its worker slot until the SDK call actually
+        returns, so stuck calls count against the endpoint's limit and new calls
+        give up after the timeout instead of queueing behind them.
+        """
+        self.client = client
+        self.limits = {
+            "chat": chat_concurrency or int(os.getenv("SARVAM_CHAT_CONCURRENCY", "16")),
+            "stt": stt_concurrency or int(os.getenv("SARVAM_STT_CONCURRENCY", "8")),
+            "tts": tts_concurrency or int(os.getenv("SARVAM_TTS_CONCURRENCY", "8")),
+        }
+        if timeout is None and os.getenv("SARVAM_TIMEOUT"):
+            timeout = float(os.getenv("SARVAM_TIMEOUT"))
+        self.timeout = timeout
+        self._executors = {
+            name: ThreadPoolExecutor(max_workers=limit, thread_name_prefix=f"sarvam-{name}")
+            for name, limit in self.limits.items()
+        }
+        # Created on first use, inside the running event loop
+        self._slots: Dict[str, asyncio.Semaphore] = {}
+
+    async def _acquire(self, endpoint: str) -> asyncio.Semaphore:
+        """Wait (up to the timeout) for a free worker slot on the endpoint"""
+        slot = self._slots.get(endpoint)
+        if slot is None:
+            slot = self._slots[endpoint] = asyncio.Semaphore(self.limits[endpoint])
+        try:
+            await asyncio.wait_for(slot.acquire(), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"No free Sarvam {endpoint} worker within {self.timeout}s")
+            raise
+        return slot
+
+    def _submit(self, endpoint: str, slot: asyncio.Semaphore, func: Callable[[], Any],
+                on_done: Optional[Callable[[], Any]] = None) -> asyncio.Future:
+        """Start func on the endpoint's pool; the slot and on_done are released when the thread returns"""
+        future = asyncio.get_running_loop().run_in_executor(self._executors[endpoint], func)
+
+        def release(finished: asyncio.Future):
+            slot.release()
+            if not finished.cancelled():
+                # Retrieve the exception so a call nobody waits for any more is not reported as unhandled
+                finished.exception()
+            if on_done is not None:
+                on_done()
+
+        future.add_done_callback(release)
+        return future
+
+    async def _run(self, endpoint: str, func: Callable[..., Any],
+                   on_done: Optional[Callable[[], Any]] = None, **kwargs) -> Any:
+        """
+        Run a blocking Sarvam call on the endpoint's worker pool
+
+        Args:
+            endpoint: "chat", "stt" or "tts"
+            func: The blocking SDK method
+            on_done: Called once the SDK call has returned (or was never started),
+                     e.g. to close a file it is reading even if the caller timed out
+            **kwargs: Arguments for func
+        """
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        try:
+            slot = await self._acquire(endpoint)
+        except BaseException:
+            if on_done is not None:
+                on_done()
+            raise
+        future = self._submit(endpoint, slot, partial(func, **kwargs), on_done)
+        remaining = None if self.timeout is None else max(self.timeout - (loop.time() - start), 0)
+        try:
+            # Shielded: giving up on the call must not release the slot while the thread still runs
+            return await asyncio.wait_for(asyncio.shield(future), timeout=remaining)
+        except asyncio.TimeoutError:
+            logger.warning(f"Sarvam {endpoint} call timed out after {self.timeout}s")
+            raise
+
+    async def chat_completions(self, **kwargs) -> Dict[str, Any]:
+        """Async wrapper for sarvam_client.chat.completions"""
+        return await self._run("chat", self.client.chat.completions, **kwargs)
+
+    async def chat_completions_stream(self, **kwargs) -> AsyncIterator[str]:
+        """
+        Stream chat completion text deltas as they arrive
+
+        The blocking stream is consumed on the chat worker pool and handed to the
+        event loop chunk by chunk. If the underlying client does not support
+        streaming, or returns a full response anyway, the whole reply is yielded
+        as a single delta.
+        """
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        done = object()
+
+        def consume():
+            try:
+                try:
+                    stream = self.client.chat.completions(stream=True, **kwargs)
+                except TypeError:
+                    stream = [self.client.chat.completions(**kwargs)]
+                if _get(stream, "choices") is not None:
+                    # stream=True was accepted but a full response came back
+                    stream = [stream]
+                for chunk in stream:
+                    delta = _chunk_text(chunk)
+                    if delta:
+                        loop.call_soon_threadsafe(queue.put_nowait, delta)
+            except Exception as e:
+                loop.call_soon_threadsafe(queue.put_nowait, e)
+            finally:
+                loop.call_soon_threadsafe(queue.put_nowait, done)
+
+        slot = await self._acquire("chat")
+        worker = self._submit("chat", slot, consume)
+        while True:
+            item = await queue.get()
+            if item is done:
+                break
+            if isinstance(item, Exception):
+                raise item
+            yield item
+        await worker
+
+    async def transcribe(self, on_done: Optional[Callable[[], Any]] = None, **kwargs) -> Dict[str, Any]:
+        """
+        Async wrapper for sarvam_client.speech_to_text.transcribe
+
+        Pass on_done to close the audio file: it runs once the SDK has stopped
+        reading it, which after a timeout can be later than this call returns.
+        """
+        return await self._run("stt", self.client.speech_to_text.transcribe, on_done=on_done, **kwargs)
+
+    async def text_to_speech(self, **kwargs) -> Dict[str, Any]:
+        """Async wrapper for sarvam_client.text_to_speech.convert"""
+        return await self._run("tts", self.client.text_to_speech.convert, **kwargs)
+
+    def shutdown(self, wait: bool = False):
+        """Shut down the worker pools"""
+        for executor in self._executors.values():
+            executor.shutdown(wait=wait, cancel_futures=True)
+
+def audio_file(content: Union[bytes, BinaryIO], filename: str = "audio.wav",
+               content_type: str = "audio/wav") -> Tuple[str, Union[bytes, BinaryIO], str]:
+    """
+    Audio argument for transcribe(file=...) straight from memory
+
+    The SDK uploads a (filename, content, content_type) tuple as the multipart
+    file, so decoded bytes or an already-open buffer (such as an upload's spooled
+    file) are sent as they are, without a temporary file in between.
+    """
+    return filename, content, content_type
+
+def _get(obj: Any, key: str) -> Any:
+    """Read a field from either a dict-like or an attribute-style SDK response"""
+    if isinstance(obj, dict):
+        return obj.get(key)
+    return getattr(obj, key, None)
+
+def _chunk_text(chunk: Any) -> str:
+    """Extract the text from a streamed chunk or a full chat completion response"""
+    choices = _get(chunk, "choices") or []
+    if not choices:
+        return ""
+    choice = choices[0]
+    message = _get(choice, "delta") or _get(choice, "message")
+    return (_get(message, "content") if message is not None else None) or ""
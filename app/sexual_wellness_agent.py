@@ -1,9 +1,12 @@
 import os
 import json
 import logging
-from typing import List, Dict, Any, Optional
+import threading
+from typing import List, Dict, Any, Optional, Iterable, Mapping, Callable
 from pydantic import BaseModel
 from app.vector_db import SexualWellnessVectorDB
+from app.response_cache import ResponseCache
+from app.calibration import ensure_thresholds
 
 logger = logging.getLogger(__name__)
 
@@ -24,9 +27,30 @@ class SexualWellnessAgent:
     """
     An AI agent for sexual wellness guidance using a vector database
     """
-    def __init__(self):
-        """Initialize the sexual wellness agent"""
-        self.vector_db = SexualWellnessVectorDB()
+    def __init__(self, vector_db: Optional[SexualWellnessVectorDB] = None):
+        """
+        Initialize the sexual wellness agent
+        
+        Args:
+            vector_db: Vector database to answer from (a default one is created if omitted)
+        """
+        self.vector_db = vector_db or SexualWellnessVectorDB()
+        self.response_cache = ResponseCache(
+            max_size=int(os.getenv("WELLNESS_RESPONSE_CACHE_SIZE", "10000")),
+            ttl=float(os.getenv("WELLNESS_RESPONSE_CACHE_TTL", "300"))
+        )
+        # Calibrated against the labeled query set on first load, or with `python -m app.calibration`
+        thresholds = ensure_thresholds(self.vector_db)
+        self.answer_threshold = float(thresholds["answer_threshold"])
+        self.minimum_score = float(thresholds["minimum_score"])
+        if thresholds.get("hybrid", self.vector_db.hybrid) != self.vector_db.hybrid:
+            logger.warning("Confidence thresholds were calibrated with a different search mode; "
+                           "run python -m app.calibration again")
+        # Corpus generation the cached responses were built from
+        self._cache_generation = self.vector_db.generation
+        self.exact_hits = 0
+        self.exact_lookups = 0
+        self._stats_lock = threading.Lock()
         self.follow_up_questions = {
             "What is sexual wellness?": [
                 "How can I improve my sexual health?",
@@ -108,11 +132,70 @@ class SexualWellnessAgent:
         Returns:
             A response with answer, confidence, sources, and follow-up questions
         """
-        query = query_data.query.strip()
+        return self.process_queries([query_data])[0]
+        
+    def process_queries(self, queries: List[SexualWellnessQuery]) -> List[SexualWellnessResponse]:
+        """
+        Process several sexual wellness queries with one batched vector search
+        
+        Cached responses and queries repeating a stored question skip the search.
+        
+        Args:
+            queries: The query data
+            
+        Returns:
+            One response per query, in order
+        """
+        texts = [query_data.query.strip() for query_data in queries]
+        
+        # Cached responses are only valid for the corpus they were built from, which
+        # other workers may have changed since
+        self.vector_db.refresh()
+        generation = self.vector_db.generation
+        if generation != self._cache_generation:
+            self.response_cache.clear()
+            self._cache_generation = generation
+            
+        responses: List[Optional[SexualWellnessResponse]] = [None] * len(texts)
+        pending = []
+        exact_hits = 0
+        for i, text in enumerate(texts):
+            responses[i] = self.response_cache.get(text)
+            if responses[i] is not None:
+                continue
+            # A query repeating a stored question is answered at full confidence without a search
+            exact = self.vector_db.find_exact(text)
+            if exact is not None:
+                exact_hits += 1
+                responses[i] = self._build_response([exact])
+                self.response_cache.put(text, responses[i])
+            else:
+                pending.append(i)
+        with self._stats_lock:
+            self.exact_hits += exact_hits
+            self.exact_lookups += len(pending) + exact_hits
+            
+        if pending:
+            # Search the vector database
+            batch_results = self.vector_db.search_batch([texts[i] for i in pending], k=2)
+            for i, search_results in zip(pending, batch_results):
+                responses[i] = self._build_response(search_results)
+                self.response_cache.put(texts[i], responses[i])
+                
+        return responses
         
-        # Search the vector database
-        search_results = self.vector_db.search(query, k=2)
+    def stats(self) -> Dict[str, Any]:
+        """Hit ratios of the response cache and the exact question match"""
+        with self._stats_lock:
+            exact = {
+                "hits": self.exact_hits,
+                "lookups": self.exact_lookups,
+                "hit_ratio": round(self.exact_hits / self.exact_lookups, 4) if self.exact_lookups else 0.0
+            }
+        return {"response_cache": self.response_cache.stats(), "exact_match": exact}
         
+    def _build_response(self, search_results: List[Mapping[str, Any]]) -> SexualWellnessResponse:
+        """Build the response for one query from its search results"""
         if not search_results:
             # No results found
             return SexualWellnessResponse(
@@ -126,8 +209,17 @@ class SexualWellnessAgent:
         best_match = search_results[0]
         confidence = best_match["score"]
         
+        # Below the calibrated minimum the best match is most likely unrelated
+        if confidence < self.minimum_score:
+            return SexualWellnessResponse(
+                answer=f"I don't have specific information about that. {self._generate_disclaimer()}",
+                confidence=confidence,
+                sources=[],
+                follow_up_questions=self.default_follow_ups
+            )
+            
         # If confidence is too low, provide a generic response
-        if confidence < 0.6:
+        if confidence < self.answer_threshold:
             return SexualWellnessResponse(
                 answer=(f"I'm not entirely sure about that, but here's some related information: "
                        f"{best_match['answer']} {self._generate_disclaimer()}"),
@@ -159,7 +251,33 @@ class SexualWellnessAgent:
         """
         try:
             self.vector_db.add_documents([{"question": question, "answer": answer}])
+            self.response_cache.clear()
             return True
         except Exception as e:
             logger.error(f"Error adding knowledge: {str(e)}")
             return False
+            
+    def add_knowledge_bulk(self, records: Iterable[Dict[str, str]], batch_size: int = 256,
+                           chunk_size: int = 4096,
+                           progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+        """
+        Bulk-load question/answer pairs into the vector database
+        
+        Args:
+            records: Iterable of dicts with 'question' and 'answer' fields
+            batch_size: Encoder batch size
+            chunk_size: Records embedded and indexed per chunk
+            progress_callback: Called after every chunk with the running totals
+            
+        Returns:
+            Totals for the job: documents added, elapsed seconds and docs/s
+        """
+        try:
+            return self.vector_db.add_documents_stream(
+                records,
+                batch_size=batch_size,
+                chunk_size=chunk_size,
+                progress_callback=progress_callback
+            )
+        finally:
+            self.response_cache.clear()
@@ -1,10 +1,16 @@
-from fastapi import APIRouter, HTTPException, Depends, WebSocket, WebSocketDisconnect
+from fastapi import APIRouter, HTTPException, Depends, WebSocket, WebSocketDisconnect, UploadFile, File, Form
+from fastapi.responses import StreamingResponse, JSONResponse
 from pydantic import BaseModel
 from typing import List, Dict, Any, Optional
+import os
 import json
+import time
 import logging
 import asyncio
+import threading
 from app.sexual_wellness_agent import SexualWellnessAgent, SexualWellnessQuery, SexualWellnessResponse
+from app.query_batcher import QueryBatcher
+from app.knowledge_io import KNOWLEDGE_FORMATS, detect_format, iter_knowledge_records
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -12,8 +18,96 @@ logger = logging.getLogger(__name__)
 # Initialize router
 router = APIRouter(prefix="/api/sexual-wellness", tags=["Sexual Wellness"])
 
-# Initialize agent
-wellness_agent = SexualWellnessAgent()
+# Lazy agent loader
+class WellnessAgentLoader:
+    """
+    Loads the sexual wellness agent (embedding model and vector index) on first use
+    or in a background warm-up task, so importing this module and binding the
+    server port never wait for the model
+    """
+    def __init__(self):
+        self.agent: Optional[SexualWellnessAgent] = None
+        self.error: Optional[str] = None
+        self.load_seconds: Optional[float] = None
+        self._lock = threading.Lock()
+        self._warm_up_task: Optional[asyncio.Task] = None
+        
+    def load(self) -> SexualWellnessAgent:
+        """Load the agent if needed (blocking, safe to call from several threads)"""
+        if self.agent is not None:
+            return self.agent
+        with self._lock:
+            if self.agent is None:
+                start = time.perf_counter()
+                try:
+                    self.agent = SexualWellnessAgent()
+                except Exception as e:
+                    self.error = str(e)
+                    raise
+                self.error = None
+                self.load_seconds = time.perf_counter() - start
+                logger.info(f"Sexual wellness agent loaded in {self.load_seconds:.2f}s")
+        return self.agent
+        
+    async def get(self) -> SexualWellnessAgent:
+        """Return the agent, loading it off the event loop if needed"""
+        if self.agent is not None:
+            return self.agent
+        return await asyncio.get_running_loop().run_in_executor(None, self.load)
+        
+    def start_warm_up(self):
+        """Start loading the agent in the background"""
+        if self._warm_up_task is None and self.agent is None:
+            self._warm_up_task = asyncio.ensure_future(self._warm_up())
+            
+    async def _warm_up(self):
+        try:
+            await self.get()
+        except Exception as e:
+            logger.error(f"Error warming up sexual wellness agent: {str(e)}")
+            
+    @property
+    def loading(self) -> bool:
+        """Whether a load is in progress"""
+        return self.agent is None and self._lock.locked()
+        
+    def status(self) -> Dict[str, Any]:
+        """Report whether the model and index are loaded"""
+        if self.agent is not None:
+            return {"ready": True, "status": "ready", "load_seconds": round(self.load_seconds, 3)}
+        if self.error:
+            return {"ready": False, "status": "error", "error": self.error}
+        return {"ready": False, "status": "loading" if self._warm_up_task else "not_loaded"}
+
+# Initialize agent loader
+wellness_loader = WellnessAgentLoader()
+
+async def get_wellness_agent() -> SexualWellnessAgent:
+    """Dependency returning the loaded agent; 503 while it is loading or if loading fails"""
+    if wellness_loader.agent is not None:
+        return wellness_loader.agent
+    if wellness_loader.loading:
+        raise HTTPException(status_code=503, detail="Sexual wellness agent is still loading")
+    try:
+        return await wellness_loader.get()
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"Sexual wellness agent not available: {str(e)}")
+
+def process_queries(queries: List[SexualWellnessQuery]) -> List[SexualWellnessResponse]:
+    """Batch handler; the routes only submit queries once the agent is loaded"""
+    return wellness_loader.load().process_queries(queries)
+
+# Coalesce concurrent queries into one batched encode + search
+wellness_batcher = QueryBatcher(process_queries)
+
+@router.on_event("startup")
+async def warm_up_wellness_agent():
+    if os.getenv("WELLNESS_WARM_UP", "true").lower() in ("1", "true", "yes"):
+        wellness_loader.start_warm_up()
+
+@router.on_event("shutdown")
+def shutdown_wellness_batcher():
+    wellness_batcher.shutdown()
 
 # WebSocket connection manager
 class WellnessConnectionManager:
@@ -45,19 +139,41 @@ class AddKnowledgeRequest(BaseModel):
 
 # Routes
 @router.post("/query", response_model=SexualWellnessResponse)
-async def query_wellness_agent(query: SexualWellnessQuery):
+async def query_wellness_agent(query: SexualWellnessQuery, wellness_agent: SexualWellnessAgent = Depends(get_wellness_agent)):
     """
     Query the sexual wellness agent
     """
     try:
-        response = wellness_agent.process_query(query)
+        response = await wellness_batcher.submit(query)
         return response
     except Exception as e:
         logger.error(f"Error processing wellness query: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error processing query: {str(e)}")
 
+@router.get("/ready")
+async def wellness_ready():
+    """
+    Readiness of the sexual wellness agent: 200 once the model and index are loaded, 503 until then
+    """
+    status = wellness_loader.status()
+    return JSONResponse(status_code=200 if status["ready"] else 503, content=status)
+
+@router.get("/metrics")
+async def wellness_metrics():
+    """
+    Cache metrics for the sexual wellness agent
+    """
+    agent = wellness_loader.agent
+    agent_stats = agent.stats() if agent else {}
+    return {
+        "query_embedding_cache": agent.vector_db.query_cache.stats() if agent else None,
+        "response_cache": agent_stats.get("response_cache"),
+        "exact_match": agent_stats.get("exact_match"),
+        "query_batching": wellness_batcher.stats()
+    }
+
 @router.post("/add-knowledge")
-async def add_knowledge(request: AddKnowledgeRequest):
+async def add_knowledge(request: AddKnowledgeRequest, wellness_agent: SexualWellnessAgent = Depends(get_wellness_agent)):
     """
     Add new knowledge to the sexual wellness agent
     Requires an API key for security (should be set in environment variables)
@@ -73,6 +189,60 @@ async def add_knowledge(request: AddKnowledgeRequest):
         logger.error(f"Error adding knowledge: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error adding knowledge: {str(e)}")
 
+@router.post("/bulk-add-knowledge")
+async def bulk_add_knowledge(
+    file: UploadFile = File(...),
+    format: Optional[str] = Form(None),
+    batch_size: int = Form(256),
+    chunk_size: int = Form(4096),
+    api_key: Optional[str] = Form(None),
+    wellness_agent: SexualWellnessAgent = Depends(get_wellness_agent)
+):
+    """
+    Bulk-load knowledge from a JSONL or CSV file with question and answer fields
+    
+    The file is streamed, embedded in batches and persisted once at the end.
+    Progress is streamed back as newline-delimited JSON, one line per chunk,
+    followed by a final line with status "done" or "error".
+    """
+    # In a real application, validate the API key here
+    fmt = format or detect_format(file.filename)
+    if fmt not in KNOWLEDGE_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported format: {fmt}. Expected one of {KNOWLEDGE_FORMATS}")
+    if batch_size < 1 or chunk_size < 1:
+        raise HTTPException(status_code=400, detail="batch_size and chunk_size must be positive")
+        
+    loop = asyncio.get_running_loop()
+    progress: asyncio.Queue = asyncio.Queue()
+    stats = {"skipped": 0}
+    
+    def report(update: Dict[str, Any]):
+        loop.call_soon_threadsafe(progress.put_nowait, {"status": "running", **update, **stats})
+        
+    def ingest() -> Dict[str, Any]:
+        records = iter_knowledge_records(file.file, fmt, stats=stats)
+        return wellness_agent.add_knowledge_bulk(records, batch_size=batch_size, chunk_size=chunk_size,
+                                                 progress_callback=report)
+    
+    async def stream_progress():
+        job = loop.run_in_executor(None, ingest)
+        job.add_done_callback(lambda _: loop.call_soon_threadsafe(progress.put_nowait, None))
+        while True:
+            update = await progress.get()
+            if update is None:
+                break
+            yield json.dumps(update) + "\n"
+        try:
+            result = job.result()
+            yield json.dumps({"status": "done", **result, **stats}) + "\n"
+        except Exception as e:
+            logger.error(f"Error bulk-adding knowledge: {str(e)}")
+            yield json.dumps({"status": "error", "message": str(e), **stats}) + "\n"
+        finally:
+            await file.close()
+    
+    return StreamingResponse(stream_progress(), media_type="application/x-ndjson")
+
 @router.websocket("/ws/{client_id}")
 async def websocket_endpoint(websocket: WebSocket, client_id: str):
     """
@@ -93,7 +263,12 @@ async def websocket_endpoint(websocket: WebSocket, client_id: str):
                     
                     # Process the query
                     query = SexualWellnessQuery(query=query_text, user_id=user_id, context=context)
-                    response = wellness_agent.process_query(query)
+                    try:
+                        await get_wellness_agent()
+                    except HTTPException as e:
+                        await wellness_manager.send_message(client_id, json.dumps({"type": "error", "message": e.detail}))
+                        continue
+                    response = await wellness_batcher.submit(query)
                     
                     # Send response back
                     await wellness_manager.send_message(
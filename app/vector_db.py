@@ -1,48 +1,342 @@
 import os
-import json
+import time
+import atexit
+import threading
 import numpy as np
 import faiss
-from sentence_transformers import SentenceTransformer
-from typing import List, Dict, Any, Optional, Tuple
+from typing import List, Dict, Any, Optional, Tuple, Iterable, Iterator, Mapping, Callable
 import logging
+from app.vector_storage import AppendOnlyStorage, CorruptDatabaseError, DocumentStore
+from app.embedding_cache import EmbeddingCache
+from app.embeddings import create_encoder
+from app.bm25 import BM25Index, document_text
+from app.exact_match import QuestionIndex, normalize_question
 
 logger = logging.getLogger(__name__)
 
+INDEX_TYPES = ("flat", "hnsw", "ivf")
+
+def create_index(index_type: str, dimension: int, vectors: Optional[np.ndarray] = None,
+                 hnsw_m: int = 32, hnsw_ef_search: int = 64,
+                 nlist: Optional[int] = None, nprobe: int = 16) -> faiss.Index:
+    """
+    Create an inner-product FAISS index, optionally filled with vectors
+    
+    Args:
+        index_type: One of "flat", "hnsw" or "ivf"
+        dimension: Embedding dimension
+        vectors: L2-normalized vectors to add (required to train "ivf")
+        hnsw_m: Graph degree for HNSW
+        hnsw_ef_search: Search breadth for HNSW
+        nlist: Number of IVF cells (defaults to 4 * sqrt(n))
+        nprobe: Number of IVF cells visited per search
+        
+    Returns:
+        The FAISS index
+    """
+    if index_type == "flat":
+        index = faiss.IndexFlatIP(dimension)
+    elif index_type == "hnsw":
+        index = faiss.IndexHNSWFlat(dimension, hnsw_m, faiss.METRIC_INNER_PRODUCT)
+        index.hnsw.efConstruction = max(2 * hnsw_m, 40)
+        index.hnsw.efSearch = hnsw_ef_search
+    elif index_type == "ivf":
+        if vectors is None or len(vectors) == 0:
+            raise ValueError("An IVF index needs vectors to train on")
+        nlist = nlist or max(1, int(4 * np.sqrt(len(vectors))))
+        nlist = min(nlist, len(vectors))
+        quantizer = faiss.IndexFlatIP(dimension)
+        index = faiss.IndexIVFFlat(quantizer, dimension, nlist, faiss.METRIC_INNER_PRODUCT)
+        index.train(vectors)
+        index.nprobe = min(nprobe, nlist)
+    else:
+        raise ValueError(f"Unknown index type: {index_type}. Expected one of {INDEX_TYPES}")
+        
+    if vectors is not None and len(vectors):
+        index.add(vectors)
+    return index
+
+def index_kind(index: faiss.Index) -> str:
+    """Return the index type name ("flat", "hnsw" or "ivf") of a FAISS index"""
+    if isinstance(index, faiss.IndexHNSW):
+        return "hnsw"
+    if isinstance(index, faiss.IndexIVF):
+        return "ivf"
+    return "flat"
+
+def reconstruct_all(index: faiss.Index) -> np.ndarray:
+    """Read every stored vector back out of a FAISS index"""
+    if isinstance(index, faiss.IndexIVF):
+        index.make_direct_map()
+    return index.reconstruct_n(0, index.ntotal)
+
 class SexualWellnessVectorDB:
     """
     Vector database for sexual wellness information using FAISS
+        
+    The published index and documents are memory-mapped read-only, so all uvicorn
+    workers on a host share one copy through the OS page cache. Documents added
+    since the last published version are kept in a small in-memory delta index
+    that every worker replays from the append log and merges into its results.
     """
-    def __init__(self, model_name: str = "all-MiniLM-L6-v2"):
+    def __init__(self, model_name: str = "all-MiniLM-L6-v2", index_type: Optional[str] = None,
+                 ivf_threshold: Optional[int] = None, hnsw_m: int = 32, nprobe: int = 16,
+                 snapshot_interval: Optional[int] = None, query_cache_size: Optional[int] = None,
+                 query_cache_path: Optional[str] = None, db_path: Optional[str] = None,
+                 embedding_backend: Optional[str] = None, refresh_interval: Optional[float] = None,
+                 hybrid: Optional[bool] = None, rrf_k: Optional[int] = None, fusion_depth: Optional[int] = None,
+                 lexical_weight: Optional[float] = None, encoder: Optional[Any] = None,
+                 seed_defaults: bool = True):
         """
         Initialize the vector database
         
         Args:
             model_name: The sentence transformer model to use for embeddings
+            index_type: Index backend, "flat", "hnsw" or "ivf" (defaults to WELLNESS_INDEX_TYPE or "flat")
+            ivf_threshold: Corpus size at which an "ivf" database is trained (until then it stays flat)
+            hnsw_m: Graph degree for the "hnsw" backend
+            nprobe: Number of IVF cells visited per search
+            snapshot_interval: Documents appended between published versions
+                (defaults to WELLNESS_SNAPSHOT_INTERVAL or 1000)
+            query_cache_size: Maximum cached query embeddings (defaults to WELLNESS_QUERY_CACHE_SIZE or 10000)
+            query_cache_path: File the query embedding cache is persisted to between restarts
+                (defaults to WELLNESS_QUERY_CACHE_PATH; unset disables persistence)
+            db_path: Directory holding the database files (defaults to WELLNESS_DB_PATH or
+                static/sexual_wellness_db)
+            embedding_backend: "sentence-transformers", "onnx" or "onnx-int8"
+                (defaults to WELLNESS_EMBEDDING_BACKEND or "sentence-transformers")
+            refresh_interval: Seconds between checks for versions and documents written by other
+                processes (defaults to WELLNESS_REFRESH_INTERVAL or 1)
+            hybrid: Fuse BM25 lexical results with the dense results (defaults to WELLNESS_HYBRID_SEARCH or true)
+            rrf_k: Rank constant of reciprocal rank fusion (defaults to WELLNESS_RRF_K or 60)
+            fusion_depth: Candidates taken from each retriever before fusion
+                (defaults to WELLNESS_FUSION_DEPTH or 20)
+            lexical_weight: Share of the gap between a hybrid hit's cosine similarity and 1
+                that full query term coverage closes (defaults to WELLNESS_LEXICAL_WEIGHT or 0.5)
+            encoder: Already loaded encoder of `model_name` to share with another database
+                instead of loading the model again
+            seed_defaults: Fill a new database with the default sexual wellness entries
         """
-        self.model = SentenceTransformer(model_name)
+        self.index_type = (index_type or os.getenv("WELLNESS_INDEX_TYPE", "flat")).lower()
+        if self.index_type not in INDEX_TYPES:
+            raise ValueError(f"Unknown index type: {self.index_type}. Expected one of {INDEX_TYPES}")
+        self.ivf_threshold = ivf_threshold or int(os.getenv("WELLNESS_IVF_THRESHOLD", "10000"))
+        self.hnsw_m = hnsw_m
+        self.nprobe = nprobe
+        self.embedding_backend = (embedding_backend
+                                  or os.getenv("WELLNESS_EMBEDDING_BACKEND", "sentence-transformers")).lower()
+        self.model_name = model_name
+        self.model = encoder or create_encoder(self.embedding_backend, model_name)
+        self.seed_defaults = seed_defaults
         self.dimension = self.model.get_sentence_embedding_dimension()
-        self.index = faiss.IndexFlatL2(self.dimension)
-        self.documents = []
-        self.db_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "static", "sexual_wellness_db")
-        os.makedirs(self.db_path, exist_ok=True)
-        self.index_path = os.path.join(self.db_path, "faiss_index.bin")
-        self.documents_path = os.path.join(self.db_path, "documents.json")
+        self.refresh_interval = (refresh_interval if refresh_interval is not None
+                                 else float(os.getenv("WELLNESS_REFRESH_INTERVAL", "1")))
+        if hybrid is None:
+            hybrid = os.getenv("WELLNESS_HYBRID_SEARCH", "true").lower() in ("1", "true", "yes")
+        self.hybrid = hybrid
+        self.rrf_k = rrf_k or int(os.getenv("WELLNESS_RRF_K", "60"))
+        self.fusion_depth = fusion_depth or int(os.getenv("WELLNESS_FUSION_DEPTH", "20"))
+        self.lexical_weight = (lexical_weight if lexical_weight is not None
+                               else float(os.getenv("WELLNESS_LEXICAL_WEIGHT", "0.5")))
+        self._last_refresh = 0.0
+        self._set_version(None, self._new_index(), None, 0, BM25Index(), QuestionIndex())
+        # Guards the index and documents when writes run off the event loop (bulk ingestion).
+        # Writers take storage.write_lock() before this lock, never after.
+        self._lock = threading.RLock()
+        self.db_path = db_path or os.getenv("WELLNESS_DB_PATH") or os.path.join(
+            os.path.dirname(os.path.dirname(__file__)), "static", "sexual_wellness_db")
+        if query_cache_size is None:
+            query_cache_size = int(os.getenv("WELLNESS_QUERY_CACHE_SIZE", "10000"))
+        self.query_cache = EmbeddingCache(
+            max_size=query_cache_size,
+            path=query_cache_path or os.getenv("WELLNESS_QUERY_CACHE_PATH") or None,
+            model_name=f"{model_name}:{self.embedding_backend}"
+        )
+        if self.query_cache.path:
+            atexit.register(self.query_cache.save)
+        self.storage = AppendOnlyStorage(self.db_path, self.dimension, snapshot_interval=snapshot_interval)
         self._load_or_create_db()
         
+    @property
+    def count(self) -> int:
+        """Number of documents in the database"""
+        return self.base_count + len(self.delta_documents)
+        
+    def get_document(self, doc_id: int, **values: Any) -> Mapping[str, Any]:
+        """
+        Read a document by id
+        
+        Args:
+            doc_id: Document id
+            **values: Extra fields to attach, e.g. a search score
+        
+        Returns:
+            For published documents a read-only view that decodes fields on access,
+            otherwise a copy of the document
+        """
+        if doc_id < self.base_count:
+            return self.store.get(doc_id, **values)
+        return {**self.delta_documents[doc_id - self.base_count], **values}
+        
+    @property
+    def generation(self) -> Tuple[Optional[str], int]:
+        """Published version and document count, which change whenever the corpus does"""
+        return self.version, self.count
+        
+    def find_exact(self, query: str) -> Optional[Mapping[str, Any]]:
+        """
+        Find the newest document whose question matches a query exactly
+        
+        Matching ignores case, whitespace and trailing punctuation.
+        
+        Args:
+            query: The search query
+            
+        Returns:
+            The document with a score of 1.0, or None
+        """
+        self.refresh()
+        with self._lock:
+            doc_id = self.questions.lookup(query)
+            if doc_id is None:
+                return None
+            doc = self.get_document(doc_id, score=1.0)
+            if normalize_question(doc["question"]) != normalize_question(query):
+                return None
+            return doc
+        
+    def iter_documents(self) -> Iterator[Mapping[str, Any]]:
+        """Iterate over all documents in id order"""
+        for doc_id in range(self.count):
+            yield self.get_document(doc_id)
+        
     def _load_or_create_db(self):
-        """Load existing database or create a new one with default data"""
-        if os.path.exists(self.index_path) and os.path.exists(self.documents_path):
+        """
+        Load existing database or create a new one with default data
+        
+        Only files found to be corrupt are moved aside for a fresh database. Any
+        other error (a transient I/O failure, files this code cannot read) is
+        raised, so this worker fails instead of discarding the corpus the other
+        workers are serving.
+        """
+        with self.storage.write_lock(), self._lock:
             try:
-                self.index = faiss.read_index(self.index_path)
-                with open(self.documents_path, 'r', encoding='utf-8') as f:
-                    self.documents = json.load(f)
-                logger.info(f"Loaded existing vector database with {len(self.documents)} documents")
-            except Exception as e:
-                logger.error(f"Error loading vector database: {str(e)}")
+                self.storage.upgrade_layout()
+                if self.storage.exists():
+                    self._open_current()
+                    if self._needs_migration(self.index, self.count) or not self._indexes_saved():
+                        self._publish()
+                    logger.info(f"Loaded existing vector database with {self.count} documents "
+                                f"(version {self.version}, {len(self.delta_documents)} unpublished)")
+                    return
+            except CorruptDatabaseError as e:
+                logger.error(f"Vector database is corrupt, starting a fresh one: {str(e)}")
+                self.storage.discard()
+                self._set_version(None, self._new_index(), None, 0, BM25Index(), QuestionIndex())
+            if self.seed_defaults:
                 self._create_default_db()
-        else:
-            self._create_default_db()
-    
+        
+    def _set_version(self, version: Optional[str], index: faiss.Index, store: Optional[DocumentStore],
+                     log_offset: int, lexical: BM25Index, questions: QuestionIndex):
+        """Switch to a published version with an empty delta"""
+        self.version = version
+        self.index = index
+        self.store = store
+        self.lexical = lexical
+        self.questions = questions
+        self.base_count = len(store) if store is not None else 0
+        self.log_offset = log_offset
+        self.delta_index = faiss.IndexFlatIP(self.dimension)
+        self.delta_documents = []
+        
+    def _open_current(self, attempts: int = 5):
+        """Map the current published version and replay the log written after it (caller holds the lock)"""
+        for attempt in range(attempts):
+            last_attempt = attempt == attempts - 1
+            version = self.storage.current_version()
+            if version is None:
+                self._set_version(None, self._new_index(), None, 0, BM25Index(), QuestionIndex())
+            else:
+                try:
+                    index, store, manifest = self.storage.open_version(version)
+                    lexical, questions = self._open_secondary_indexes(version, store)
+                except FileNotFoundError:
+                    # Garbage-collected by a publish between reading CURRENT and opening it
+                    if last_attempt:
+                        raise
+                    continue
+                self._set_version(version, index, store, manifest["log_offset"], lexical, questions)
+            if self._read_tail(reembed=last_attempt):
+                return
+        
+    def _open_secondary_indexes(self, version: str, store: DocumentStore) -> Tuple[BM25Index, QuestionIndex]:
+        """Map the BM25 and question indexes of a version, building those it was published without"""
+        directory = self.storage.version_path(version)
+        indexes = []
+        for index_class in (BM25Index, QuestionIndex):
+            if index_class.exists(directory):
+                try:
+                    indexes.append(index_class.load(directory))
+                    continue
+                except CorruptDatabaseError as e:
+                    # Derived from the documents, so rebuild it rather than give up on the version
+                    logger.warning(f"Rebuilding corrupt {index_class.__name__} of version {version}: {str(e)}")
+            else:
+                logger.info(f"Building {index_class.__name__} for version {version} with {len(store)} documents")
+            indexes.append(index_class.build(store))
+        return tuple(indexes)
+        
+    def _indexes_saved(self) -> bool:
+        """Check whether the current version was published with all secondary indexes"""
+        if self.version is None:
+            return True
+        directory = self.storage.version_path(self.version)
+        return BM25Index.exists(directory) and QuestionIndex.exists(directory)
+        
+    def _read_tail(self, reembed: bool = True) -> bool:
+        """
+        Add documents appended to the log since the last read to the delta index
+        
+        Args:
+            reembed: Re-embed documents whose vectors are missing from the vector log,
+                instead of giving up when a newer version was published meanwhile
+        
+        Returns:
+            False if a newer version compacted the vector log and should be opened instead
+        """
+        documents, vectors, offset = self.storage.read_log(self.log_offset, self.count)
+        if not documents:
+            return True
+        if len(vectors) < len(documents):
+            if not reembed and self.storage.current_version() != self.version:
+                return False
+            missing = documents[len(vectors):]
+            logger.warning(f"Re-embedding {len(missing)} documents missing from the vector log")
+            embeddings = np.ascontiguousarray(self.model.encode([doc["question"] for doc in missing]),
+                                              dtype="float32")
+            faiss.normalize_L2(embeddings)
+            vectors = np.vstack([vectors, embeddings])
+        self.delta_index.add(vectors)
+        self._index_delta(documents)
+        self.delta_documents.extend(documents)
+        self.log_offset = offset
+        return True
+        
+    def refresh(self, force: bool = False):
+        """
+        Pick up versions published and documents appended by other processes
+        
+        Args:
+            force: Check now instead of at most once per refresh interval
+        """
+        now = time.monotonic()
+        if not force and now - self._last_refresh < self.refresh_interval:
+            return
+        with self._lock:
+            self._last_refresh = now
+            if self.storage.current_version() != self.version or not self._read_tail(reembed=False):
+                self._open_current()
+        
     def _create_default_db(self):
         """Create a default database with sexual wellness information"""
         logger.info("Creating default sexual wellness vector database")
@@ -94,6 +388,61 @@ class SexualWellnessVectorDB:
         # Add the default data to the database
         self.add_documents(default_data)
         
+    def _new_index(self, vectors: Optional[np.ndarray] = None) -> faiss.Index:
+        """Create an index of the configured type (IVF stays flat until the threshold is reached)"""
+        count = 0 if vectors is None else len(vectors)
+        index_type = self.index_type
+        if index_type == "ivf" and count < self.ivf_threshold:
+            index_type = "flat"
+        return create_index(index_type, self.dimension, vectors, hnsw_m=self.hnsw_m, nprobe=self.nprobe)
+        
+    def _needs_migration(self, index: faiss.Index, count: int) -> bool:
+        """
+        Check whether an index uses a different metric or backend than configured
+        
+        An "ivf" database that reached the IVF threshold while still flat needs
+        migrating too, which trains the IVF index.
+        """
+        if index.metric_type != faiss.METRIC_INNER_PRODUCT:
+            return True
+        expected = self.index_type
+        if expected == "ivf" and count < self.ivf_threshold:
+            expected = "flat"
+        return index_kind(index) != expected
+        
+    def _migrate_index(self, index: faiss.Index) -> faiss.Index:
+        """Rebuild an index as an inner-product index of the configured type"""
+        logger.info(f"Migrating {index_kind(index)} index (metric {index.metric_type}) with {index.ntotal} "
+                    f"vectors to {self.index_type} inner-product index")
+        try:
+            vectors = reconstruct_all(index)
+        except RuntimeError:
+            # Some index types cannot reconstruct their vectors, so re-embed the questions instead
+            vectors = self.model.encode([doc["question"] for doc in self.iter_documents()])
+        vectors = np.ascontiguousarray(vectors, dtype="float32")
+        faiss.normalize_L2(vectors)
+        return self._new_index(vectors)
+        
+    def _publish_due(self) -> bool:
+        return (len(self.delta_documents) >= self.storage.snapshot_interval
+                or self._needs_migration(self.index, self.count))
+        
+    def _publish(self):
+        """Fold the delta into a new published version and map it (caller holds both locks)"""
+        index = self.storage.read_index(self.version) if self.version else self._new_index()
+        if self.delta_documents:
+            index.add(reconstruct_all(self.delta_index))
+        if self._needs_migration(index, index.ntotal):
+            index = self._migrate_index(index)
+        try:
+            self.storage.publish(index, self.store, self.delta_documents, self.log_offset,
+                                 indexes=(self.lexical, self.questions))
+        except Exception as e:
+            # The documents are safe in the log; the next write retries the publish
+            logger.error(f"Error publishing vector database: {str(e)}")
+            return
+        self._open_current()
+        
     def add_documents(self, documents: List[Dict[str, str]]):
         """
         Add documents to the vector database
@@ -103,39 +452,149 @@ class SexualWellnessVectorDB:
         """
         if not documents:
             return
-            
+        
         # Extract questions for embedding
         questions = [doc["question"] for doc in documents]
         
         # Generate embeddings
         embeddings = self.model.encode(questions)
-        
-        # Add to FAISS index
         faiss.normalize_L2(embeddings)
-        self.index.add(embeddings)
         
-        # Store documents
-        start_idx = len(self.documents)
+        with self.storage.write_lock(), self._lock:
+            # Catch up with other writers first, so ids stay dense across processes
+            self.refresh(force=True)
+            self._append(documents, embeddings)
+        
+            # Publish a new version periodically instead of on every add
+            if self._publish_due():
+                self._publish()
+        
+        logger.info(f"Added {len(documents)} documents to vector database")
+        
+    def _append(self, documents: List[Dict[str, str]], embeddings: np.ndarray, sync: bool = True):
+        """Assign ids, log and index already-embedded documents (caller holds both locks)"""
+        start_idx = self.count
         for i, doc in enumerate(documents):
             doc["id"] = start_idx + i
-            self.documents.append(doc)
+        
+        # Append to the on-disk logs first, so a failed write leaves the database unchanged
+        self.log_offset = self.storage.append(documents, embeddings, self.log_offset, sync=sync)
+        
+        # Add to the delta and secondary indexes and store documents
+        self.delta_index.add(embeddings)
+        self._index_delta(documents)
+        self.delta_documents.extend(documents)
+        
+    def _index_delta(self, documents: List[Dict[str, Any]]):
+        """Add documents carrying their ids to the BM25 and question indexes"""
+        for doc in documents:
+            self.lexical.add(doc["id"], document_text(doc))
+            self.questions.add(doc["id"], doc["question"])
+        
+    def add_documents_stream(self, documents: Iterable[Dict[str, str]], batch_size: int = 256,
+                             chunk_size: int = 4096,
+                             progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+        """
+        Bulk-load documents from an iterable without holding the whole corpus in memory
+        
+        Documents are read in chunks, embedded in batches of `batch_size`, and added
+        to the index chunk by chunk. The write lock is held for the whole job, the
+        logs are fsynced once at the end, and a new version is published then if due.
+        
+        Args:
+            documents: Iterable of documents with 'question' and 'answer' fields
+            batch_size: Encoder batch size
+            chunk_size: Documents embedded and indexed per chunk
+            progress_callback: Called after every chunk with the running totals
+        
+        Returns:
+            Totals for the job: documents added, elapsed seconds and docs/s
+        """
+        start = time.perf_counter()
+        added = 0
+        
+        def report() -> Dict[str, Any]:
+            elapsed = time.perf_counter() - start
+            return {
+                "added": added,
+                "elapsed": round(elapsed, 3),
+                "docs_per_sec": round(added / elapsed, 1) if elapsed > 0 else 0.0
+            }
+        
+        with self.storage.write_lock():
+            self.refresh(force=True)
+            chunk = []
+            iterator = iter(documents)
+            while True:
+                for doc in iterator:
+                    chunk.append(doc)
+                    if len(chunk) >= chunk_size:
+                        break
+                if not chunk:
+                    break
+        
+                embeddings = self.model.encode([doc["question"] for doc in chunk], batch_size=batch_size)
+                embeddings = np.ascontiguousarray(embeddings, dtype="float32")
+                faiss.normalize_L2(embeddings)
+                with self._lock:
+                    self._append(chunk, embeddings, sync=False)
+                added += len(chunk)
+                chunk = []
+        
+                if progress_callback:
+                    progress_callback(report())
+        
+            with self._lock:
+                if added:
+                    self.storage.sync()
+                    if self._publish_due():
+                        self._publish()
+        
+        stats = report()
+        logger.info(f"Bulk-loaded {added} documents in {stats['elapsed']}s ({stats['docs_per_sec']} docs/s)")
+        return stats
+        
+    def encode_queries(self, queries: List[str]) -> np.ndarray:
+        """
+        Embed search queries in one batch, skipping the model for recently seen queries
+        
+        Args:
+            queries: The search queries
             
-        # Save the updated database
-        self._save_db()
+        Returns:
+            A (len(queries), dimension) array of normalized query embeddings
+        """
+        embeddings = np.empty((len(queries), self.dimension), dtype="float32")
+        misses = []
+        for i, query in enumerate(queries):
+            cached = self.query_cache.get(query)
+            if cached is None:
+                misses.append(i)
+            else:
+                embeddings[i] = cached
+                
+        if misses:
+            encoded = np.ascontiguousarray(self.model.encode([queries[i] for i in misses]), dtype="float32")
+            faiss.normalize_L2(encoded)
+            for row, i in enumerate(misses):
+                embeddings[i] = encoded[row]
+                self.query_cache.put(queries[i], encoded[row])
+                
+        return embeddings
         
-        logger.info(f"Added {len(documents)} documents to vector database")
+    def encode_query(self, query: str) -> np.ndarray:
+        """
+        Embed a search query, skipping the model for recently seen queries
         
-    def _save_db(self):
-        """Save the database to disk"""
-        try:
-            faiss.write_index(self.index, self.index_path)
-            with open(self.documents_path, 'w', encoding='utf-8') as f:
-                json.dump(self.documents, f, ensure_ascii=False, indent=2)
-            logger.info(f"Saved vector database with {len(self.documents)} documents")
-        except Exception as e:
-            logger.error(f"Error saving vector database: {str(e)}")
+        Args:
+            query: The search query
             
-    def search(self, query: str, k: int = 3) -> List[Dict[str, Any]]:
+        Returns:
+            A (1, dimension) array holding the normalized query embedding
+        """
+        return self.encode_queries([query])
+        
+    def search(self, query: str, k: int = 3) -> List[Mapping[str, Any]]:
         """
         Search the vector database for relevant documents
         
@@ -144,26 +603,126 @@ class SexualWellnessVectorDB:
             k: Number of results to return
             
         Returns:
-            List of matching documents with similarity scores
+            List of matching documents with similarity scores. Published documents are
+            read-only views whose fields are decoded on first access
+        """
+        return self.search_batch([query], k=k)[0]
+        
+    def search_batch(self, queries: List[str], k: int = 3) -> List[List[Mapping[str, Any]]]:
+        """
+        Search the vector database for several queries with one encode and one index search
+        
+        With hybrid search, reciprocal rank fusion of the dense and BM25 candidates
+        picks the k hits. Each hit's "score" is then its cosine similarity raised
+        towards 1 by the IDF-weighted share of query terms it contains (see _fuse),
+        and hits are returned best score first, so the top hit's score is the best
+        in the list. The cosine similarity is reported as "dense_score". Without
+        hybrid search, "score" is the cosine similarity.
+        
+        Args:
+            queries: The search queries
+            k: Number of results to return per query
+            
+        Returns:
+            For every query, a list of matching documents with scores, best first
         """
-        if not self.documents:
-            return []
+        self.refresh()
+        if not self.count or not queries:
+            return [[] for _ in queries]
             
-        # Generate query embedding
-        query_embedding = self.model.encode([query])
-        faiss.normalize_L2(query_embedding)
+        # Generate query embeddings
+        query_embeddings = self.encode_queries(queries)
         
-        # Search the index
-        distances, indices = self.index.search(query_embedding, min(k, len(self.documents)))
+        with self._lock:
+            k = min(k, self.count)
+            depth = max(k, self.fusion_depth) if self.hybrid else k
+            dense_hits = self._dense_search(query_embeddings, min(depth, self.count))
+            
+            # Format results
+            batch_results = []
+            for query, query_embedding, row_hits in zip(queries, query_embeddings, dense_hits):
+                if self.hybrid:
+                    hits = self._fuse(query, query_embedding, row_hits, self.lexical.search(query, depth), k)
+                else:
+                    # Inner product of normalized vectors is cosine similarity
+                    hits = [(doc_id, {"score": score}) for score, doc_id in row_hits[:k]]
+                batch_results.append([self.get_document(doc_id, **fields) for doc_id, fields in hits])
+                
+        return batch_results
         
-        # Format results
-        results = []
-        for i, idx in enumerate(indices[0]):
-            if idx < 0 or idx >= len(self.documents):
+    def _dense_search(self, query_embeddings: np.ndarray, k: int) -> List[List[Tuple[float, int]]]:
+        """Search the published index and the delta, and merge the hits by score (caller holds the lock)"""
+        hits = [[] for _ in range(len(query_embeddings))]
+        for index, first_id in ((self.index, 0), (self.delta_index, self.base_count)):
+            if index.ntotal == 0:
                 continue
-                
-            doc = self.documents[idx].copy()
-            doc["score"] = float(1 - distances[0][i])  # Convert distance to similarity score
-            results.append(doc)
+            distances, indices = index.search(query_embeddings, min(k, index.ntotal))
+            for row in range(len(query_embeddings)):
+                hits[row].extend((float(distance), first_id + int(idx))
+                                 for distance, idx in zip(distances[row], indices[row]) if idx >= 0)
+        return [sorted(row_hits, key=lambda hit: -hit[0])[:k] for row_hits in hits]
+        
+    def _fuse(self, query: str, query_embedding: np.ndarray, dense_hits: List[Tuple[float, int]],
+              lexical_hits: List[Tuple[int, float, float]], k: int) -> List[Tuple[int, Dict[str, Any]]]:
+        """
+        Reciprocal rank fusion of dense and lexical hits, scored on both signals
+        
+        RRF selects the k hits. Each is scored as
+        cosine + lexical_weight * coverage * (1 - cosine), which is never below its
+        cosine similarity, equals it when no query term matches, and reaches 1 only
+        for an exact embedding match or full coverage at a weight of 1. The hits are
+        returned ordered by that score.
+        
+        Args:
+            query: The query text
+            query_embedding: The normalized query embedding
+            dense_hits: (cosine similarity, doc id) pairs, best first
+            lexical_hits: (doc id, BM25 score, coverage) tuples, best first
+            k: Number of results
+            
+        Returns:
+            (doc id, fields) pairs, best "score" first
+        """
+        fused = {}
+        for rank, (score, doc_id) in enumerate(dense_hits):
+            fields = fused.setdefault(doc_id, {"rrf": 0.0})
+            fields["rrf"] += 1.0 / (self.rrf_k + rank + 1)
+            fields["dense_score"] = score
+        for rank, (doc_id, score, coverage) in enumerate(lexical_hits):
+            fields = fused.setdefault(doc_id, {"rrf": 0.0})
+            fields["rrf"] += 1.0 / (self.rrf_k + rank + 1)
+            fields["lexical_score"] = score
+            fields["lexical_coverage"] = coverage
+        ranked = sorted(fused.items(), key=lambda item: (-item[1]["rrf"], -item[1].get("lexical_coverage", 0.0)))[:k]
+        
+        # Hits found by only one retriever lack the other's score
+        missing = [doc_id for doc_id, fields in ranked if "dense_score" not in fields]
+        for doc_id, vector in zip(missing, self._stored_vectors(missing)):
+            fused[doc_id]["dense_score"] = float(np.dot(query_embedding, vector))
+        missing = [doc_id for doc_id, fields in ranked if "lexical_coverage" not in fields]
+        for doc_id, (score, coverage) in zip(missing, self.lexical.score_documents(query, missing)):
+            fused[doc_id]["lexical_score"] = score
+            fused[doc_id]["lexical_coverage"] = coverage
             
-        return results
+        for _, fields in ranked:
+            cosine = fields["dense_score"]
+            fields["score"] = cosine + self.lexical_weight * fields["lexical_coverage"] * (1.0 - cosine)
+        return sorted(ranked, key=lambda item: -item[1]["score"])
+        
+    def _stored_vectors(self, doc_ids: List[int]) -> np.ndarray:
+        """Normalized embeddings of documents, read from the indexes or re-embedded (caller holds the lock)"""
+        vectors = np.empty((len(doc_ids), self.dimension), dtype="float32")
+        try:
+            for row, doc_id in enumerate(doc_ids):
+                if doc_id < self.base_count:
+                    if isinstance(self.index, faiss.IndexIVF) and self.index.direct_map.no():
+                        self.index.make_direct_map()
+                    vectors[row] = self.index.reconstruct(doc_id)
+                else:
+                    vectors[row] = self.delta_index.reconstruct(doc_id - self.base_count)
+        except RuntimeError:
+            # Some index types cannot reconstruct their vectors, so re-embed the questions instead
+            vectors = np.ascontiguousarray(
+                self.model.encode([self.get_document(doc_id)["question"] for doc_id in doc_ids]), dtype="float32")
+            faiss.normalize_L2(vectors)
+        return vectors
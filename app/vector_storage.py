@@ -0,0 +1,570 @@
+import os
+import json
+import mmap
+import shutil
+import struct
+import logging
+import threading
+from contextlib import contextmanager
+from collections.abc import Mapping
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+import numpy as np
+import faiss
+
+try:
+    import fcntl
+except ImportError:  # Windows: run a single worker, there is no other process to lock out
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+class CorruptDatabaseError(ValueError):
+    """Database files that were read successfully but are inconsistent or malformed"""
+
+# Header of the vector log: magic, embedding dimension, id of the first logged vector
+_VECTOR_MAGIC = b"DGV1"
+_VECTOR_HEADER = struct.Struct("<4sIQ")
+
+# Files of a published version (plus a .bin and .idx file per document column)
+INDEX_FILE = "index.faiss"
+MANIFEST_FILE = "manifest.json"
+
+# Document columns: the question, the answer, and the JSON of any other fields
+COLUMNS = ("question", "answer", "extra")
+
+def _fsync_dir(path: str):
+    """Flush a directory entry so renames inside it survive a crash"""
+    if not hasattr(os, "O_DIRECTORY"):
+        return
+    fd = os.open(path, os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+def _fsync_file(path: str):
+    with open(path, "rb+") as f:
+        os.fsync(f.fileno())
+
+def _atomic_replace(tmp_path: str, path: str):
+    """Durably move a fully written temporary file over its target"""
+    _fsync_file(tmp_path)
+    os.replace(tmp_path, path)
+    _fsync_dir(os.path.dirname(path))
+
+def map_file(path: str):
+    """Map a file read-only (empty files cannot be mapped and read as b"")"""
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return b""
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+def read_index(path: str, mmap_index: bool = True) -> faiss.Index:
+    """
+    Read a FAISS index, memory-mapped and read-only where the index type supports it
+
+    Args:
+        path: Index file
+        mmap_index: Map the vectors instead of copying them onto the heap
+
+    Returns:
+        The FAISS index
+    """
+    if mmap_index:
+        # IO_FLAG_MMAP maps IVF lists, IO_FLAG_MMAP_IFC flat and HNSW storage. Older FAISS
+        # releases (such as 1.7.4) lack the latter and read those indexes onto the heap.
+        flags = faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY | getattr(faiss, "IO_FLAG_MMAP_IFC", 0)
+        try:
+            return faiss.read_index(path, flags)
+        except RuntimeError as e:
+            logger.warning(f"Cannot memory-map {path}, reading it into memory: {str(e)}")
+    return faiss.read_index(path)
+
+def _column_files(column: str) -> Tuple[str, str]:
+    return f"{column}.bin", f"{column}.idx"
+
+class LazyDocument(Mapping):
+    """
+    Read-only view of a stored document that decodes each field on first access
+
+    Search hits are returned as views, so the answer of a hit is only read from
+    the store if the caller uses it. dict(document) materializes every field.
+    """
+    def __init__(self, store: "DocumentStore", doc_id: int, **values: Any):
+        self._store = store
+        self._doc_id = doc_id
+        self._values = {"id": doc_id, **values}
+        self._extra = None
+
+    def _extra_fields(self) -> Dict[str, Any]:
+        if self._extra is None:
+            self._extra = self._store.extra(self._doc_id)
+        return self._extra
+
+    def __getitem__(self, key: str) -> Any:
+        if key in self._values:
+            return self._values[key]
+        if key in ("question", "answer"):
+            self._values[key] = self._store.value(key, self._doc_id)
+            return self._values[key]
+        return self._extra_fields()[key]
+
+    def __iter__(self) -> Iterator[str]:
+        keys = ["id", "question", "answer"] + list(self._extra_fields())
+        return iter(keys + [key for key in self._values if key not in keys])
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def copy(self) -> Dict[str, Any]:
+        return dict(self)
+
+    def __repr__(self) -> str:
+        return f"LazyDocument(id={self._doc_id})"
+
+class DocumentStore:
+    """
+    Read-only, memory-mapped columnar document store
+
+    Every column holds its UTF-8 values back to back in <column>.bin, with the
+    little-endian uint64 offset of each value plus the end offset in
+    <column>.idx. Opening a store only maps the files, a value is decoded only
+    when it is read, and all worker processes share one copy in the OS page cache.
+    """
+    def __init__(self, directory: str):
+        """
+        Map a document store
+
+        Args:
+            directory: Version directory holding the column files
+        """
+        self.directory = directory
+        self._data = {}
+        self._offsets = {}
+        for column in COLUMNS:
+            data_file, offsets_file = _column_files(column)
+            self._data[column] = map_file(os.path.join(directory, data_file))
+            self._offsets[column] = np.frombuffer(map_file(os.path.join(directory, offsets_file)), dtype="<u8")
+        lengths = {len(offsets) for offsets in self._offsets.values()}
+        if len(lengths) != 1 or 0 in lengths:
+            raise CorruptDatabaseError(f"Inconsistent document columns in {directory}")
+        for column in COLUMNS:
+            if int(self._offsets[column][-1]) != len(self._data[column]):
+                raise CorruptDatabaseError(f"Column {column} in {directory} does not match its offsets")
+        self._count = lengths.pop() - 1
+
+    def __len__(self) -> int:
+        return self._count
+
+    def value(self, column: str, doc_id: int) -> str:
+        """Decode one value of a column"""
+        offsets = self._offsets[column]
+        return self._data[column][int(offsets[doc_id]):int(offsets[doc_id + 1])].decode("utf-8")
+
+    def extra(self, doc_id: int) -> Dict[str, Any]:
+        """Decode the fields of a document other than id, question and answer"""
+        value = self.value("extra", doc_id)
+        return json.loads(value) if value else {}
+
+    def get(self, doc_id: int, **values: Any) -> LazyDocument:
+        """
+        Read a document lazily
+
+        Args:
+            doc_id: Document id
+            **values: Extra fields to attach to the view, e.g. a search score
+
+        Returns:
+            A read-only view decoding fields on access
+        """
+        if not 0 <= doc_id < self._count:
+            raise IndexError(f"Document {doc_id} out of range")
+        return LazyDocument(self, doc_id, **values)
+
+    def __iter__(self) -> Iterator[LazyDocument]:
+        for doc_id in range(self._count):
+            yield self.get(doc_id)
+
+    @staticmethod
+    def files() -> List[str]:
+        """Names of the files making up a store"""
+        return [name for column in COLUMNS for name in _column_files(column)]
+
+    @staticmethod
+    def write(directory: str, documents: Iterable[Mapping[str, Any]],
+              base: Optional["DocumentStore"] = None) -> int:
+        """
+        Write a document store, optionally extending an existing one
+
+        Args:
+            directory: Target directory
+            documents: Documents to write (after those of `base`)
+            base: Store whose documents come first, copied without decoding them
+
+        Returns:
+            The number of documents in the new store
+        """
+        values = {column: [] for column in COLUMNS}
+        for doc in documents:
+            values["question"].append(doc["question"].encode("utf-8"))
+            values["answer"].append(doc["answer"].encode("utf-8"))
+            extra = {key: value for key, value in doc.items() if key not in ("id", "question", "answer")}
+            values["extra"].append(json.dumps(extra, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+                                   if extra else b"")
+
+        for column in COLUMNS:
+            data_file, offsets_file = _column_files(column)
+            data_path = os.path.join(directory, data_file)
+            offsets = [np.zeros(1, dtype="<u8")]
+            if base is not None:
+                shutil.copyfile(os.path.join(base.directory, data_file), data_path)
+                offsets = [base._offsets[column]]
+            with open(data_path, "ab") as f:
+                position = f.tell()
+                ends = []
+                for value in values[column]:
+                    position += f.write(value)
+                    ends.append(position)
+            offsets.append(np.array(ends, dtype="<u8"))
+            with open(os.path.join(directory, offsets_file), "wb") as f:
+                f.write(np.concatenate(offsets).tobytes())
+        return (len(base) if base is not None else 0) + len(values["question"])
+
+class AppendOnlyStorage:
+    """
+    Crash-safe persistence for the vector database, shared by all worker processes
+
+    Files in the database directory:
+        documents.jsonl: one document per line, appended on every add. A document
+            is only committed once its line is complete.
+        vectors.f32: embeddings of documents added since the last published
+            version, prefixed with a header holding the id of its first vector.
+        versions/vNNNNNN/: an immutable published version: the FAISS index, the
+            documents in a columnar DocumentStore, and a manifest with the
+            document count and the log offset the version covers.
+        CURRENT: name of the current version, replaced atomically on publish.
+        .write.lock: serializes writers across processes.
+
+    Readers map the current version read-only and replay the short log tail
+    after it. Writers append to the logs under the write lock, and every
+    `snapshot_interval` documents publish a new version that readers swap in.
+    """
+    def __init__(self, db_path: str, dimension: int, snapshot_interval: Optional[int] = None):
+        """
+        Initialize the storage
+
+        Args:
+            db_path: Directory holding the database files
+            dimension: Embedding dimension
+            snapshot_interval: Documents to log between published versions
+        """
+        self.db_path = db_path
+        self.dimension = dimension
+        self.snapshot_interval = snapshot_interval or int(os.getenv("WELLNESS_SNAPSHOT_INTERVAL", "1000"))
+        self.documents_path = os.path.join(db_path, "documents.jsonl")
+        self.vectors_path = os.path.join(db_path, "vectors.f32")
+        self.versions_path = os.path.join(db_path, "versions")
+        self.current_path = os.path.join(db_path, "CURRENT")
+        self.lock_path = os.path.join(db_path, ".write.lock")
+        # Layout written by earlier releases, converted by upgrade_layout()
+        self.legacy_index_path = os.path.join(db_path, "faiss_index.bin")
+        self.legacy_documents_path = os.path.join(db_path, "documents.json")
+        self.row_bytes = 4 * dimension
+        self._thread_lock = threading.RLock()
+        self._lock_file = None
+        self._lock_depth = 0
+        os.makedirs(self.versions_path, exist_ok=True)
+
+    def exists(self) -> bool:
+        """Check whether a published version or a document log exists"""
+        return os.path.exists(self.current_path) or os.path.exists(self.documents_path)
+
+    @contextmanager
+    def write_lock(self):
+        """Hold the database write lock, reentrantly within this process"""
+        with self._thread_lock:
+            if self._lock_depth == 0:
+                self._lock_file = open(self.lock_path, "a+b")
+                if fcntl is not None:
+                    fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_EX)
+            self._lock_depth += 1
+            try:
+                yield
+            finally:
+                self._lock_depth -= 1
+                if self._lock_depth == 0:
+                    # Closing the file releases the flock
+                    self._lock_file.close()
+                    self._lock_file = None
+
+    def current_version(self) -> Optional[str]:
+        """Name of the current published version, or None if nothing was published yet"""
+        try:
+            with open(self.current_path, "r", encoding="utf-8") as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def open_version(self, name: str, mmap_index: bool = True) -> Tuple[faiss.Index, DocumentStore, Dict[str, Any]]:
+        """
+        Open a published version
+
+        Args:
+            name: Version name
+            mmap_index: Map the index read-only instead of reading it onto the heap
+
+        Returns:
+            The index, the document store and the version manifest
+        """
+        directory = os.path.join(self.versions_path, name)
+        with open(os.path.join(directory, MANIFEST_FILE), "r", encoding="utf-8") as f:
+            try:
+                manifest = json.load(f)
+            except json.JSONDecodeError as e:
+                raise CorruptDatabaseError(f"Unreadable manifest of version {name}: {str(e)}")
+        index = read_index(os.path.join(directory, INDEX_FILE), mmap_index=mmap_index)
+        store = DocumentStore(directory)
+        if index.ntotal != len(store) or len(store) != manifest["count"]:
+            raise CorruptDatabaseError(f"Version {name} has {index.ntotal} vectors and {len(store)} documents, "
+                             f"expected {manifest['count']}")
+        return index, store, manifest
+
+    def read_index(self, name: str) -> faiss.Index:
+        """Read a writable in-memory copy of a published version's index"""
+        return read_index(os.path.join(self.versions_path, name, INDEX_FILE), mmap_index=False)
+
+    def read_log(self, offset: int, first_id: int) -> Tuple[List[Dict[str, Any]], np.ndarray, int]:
+        """
+        Read the documents committed to the log after `offset` and their logged vectors
+
+        An incomplete last line is left alone: it is either being written by
+        another process or left by a crash, and the next writer truncates it.
+
+        Args:
+            offset: Log offset to read from
+            first_id: Id of the first document after `offset`
+
+        Returns:
+            The documents, their vectors, and the log offset after the last
+            committed document. There may be fewer vectors than documents if the
+            vector log was lost or compacted by a newer version.
+        """
+        try:
+            with open(self.documents_path, "rb") as f:
+                f.seek(offset)
+                data = f.read()
+        except FileNotFoundError:
+            return [], np.empty((0, self.dimension), dtype="float32"), offset
+        committed = data.rfind(b"\n") + 1
+        try:
+            documents = [json.loads(line) for line in data[:committed].splitlines() if line.strip()]
+        except json.JSONDecodeError as e:
+            raise CorruptDatabaseError(f"Unreadable committed document in {self.documents_path}: {str(e)}")
+        return documents, self._read_vectors(first_id, len(documents)), offset + committed
+
+    def _vector_log_header(self) -> Optional[Tuple[int, int]]:
+        """Return the id of the first logged vector and the number of logged rows, if the log is valid"""
+        try:
+            with open(self.vectors_path, "rb") as f:
+                header = f.read(_VECTOR_HEADER.size)
+                size = os.fstat(f.fileno()).st_size
+        except FileNotFoundError:
+            return None
+        if len(header) < _VECTOR_HEADER.size:
+            return None
+        magic, dimension, base = _VECTOR_HEADER.unpack(header)
+        if magic != _VECTOR_MAGIC or dimension != self.dimension:
+            logger.warning(f"Unexpected vector log header in {self.vectors_path}")
+            return None
+        return base, (size - _VECTOR_HEADER.size) // self.row_bytes
+
+    def _read_vectors(self, first_id: int, count: int) -> np.ndarray:
+        """Read up to `count` logged vectors starting at id `first_id`"""
+        header = self._vector_log_header()
+        if header is None or header[0] > first_id or count == 0:
+            return np.empty((0, self.dimension), dtype="float32")
+        base, rows = header
+        available = max(0, min(count, base + rows - first_id))
+        with open(self.vectors_path, "rb") as f:
+            f.seek(_VECTOR_HEADER.size + (first_id - base) * self.row_bytes)
+            data = f.read(available * self.row_bytes)
+        rows = len(data) // self.row_bytes
+        return np.frombuffer(data[:rows * self.row_bytes], dtype="float32").reshape(rows, self.dimension).copy()
+
+    def _reset_vector_log(self, base: int, vectors: np.ndarray):
+        """Atomically rewrite the vector log to start at `base`"""
+        tmp_path = self.vectors_path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(_VECTOR_HEADER.pack(_VECTOR_MAGIC, self.dimension, base))
+            f.write(np.ascontiguousarray(vectors, dtype="float32").tobytes())
+        _atomic_replace(tmp_path, self.vectors_path)
+
+    def _compact_vector_log(self, base: int):
+        """Drop logged vectors of documents before `base`"""
+        header = self._vector_log_header()
+        if header is not None and header[0] == base:
+            return
+        count = header[0] + header[1] - base if header is not None else 0
+        self._reset_vector_log(base, self._read_vectors(base, max(0, count)))
+
+    def append(self, documents: List[Dict[str, Any]], embeddings: np.ndarray, log_offset: int,
+               sync: bool = True) -> int:
+        """
+        Append documents and their embeddings to the logs (caller holds the write lock)
+
+        Vectors are written before documents, so a document line is the commit
+        record for its vector. Bytes past `log_offset` and vectors past the last
+        committed document were left by a crashed writer and are dropped first;
+        if this append fails, what it wrote to either log is truncated again.
+
+        Args:
+            documents: Documents to log, already carrying their ids
+            embeddings: Normalized embeddings, one row per document
+            log_offset: Log offset after the last committed document
+            sync: Whether to fsync before returning
+
+        Returns:
+            The log offset after the appended documents
+        """
+        first_id = documents[0]["id"]
+        header = self._vector_log_header()
+        if header is None or header[0] > first_id or header[0] + header[1] < first_id:
+            # Vectors of earlier documents are missing, so restart the log here; readers re-embed the gap
+            self._reset_vector_log(first_id, np.empty((0, self.dimension), dtype="float32"))
+            header = (first_id, 0)
+        vector_offset = _VECTOR_HEADER.size + (first_id - header[0]) * self.row_bytes
+        if header[0] + header[1] > first_id:
+            with open(self.vectors_path, "rb+") as f:
+                f.truncate(vector_offset)
+
+        try:
+            with open(self.vectors_path, "ab") as f:
+                f.write(np.ascontiguousarray(embeddings, dtype="float32").tobytes())
+                f.flush()
+                if sync:
+                    os.fsync(f.fileno())
+
+            lines = "".join(json.dumps(doc, ensure_ascii=False) + "\n" for doc in documents)
+            with open(self.documents_path, "ab") as f:
+                if f.tell() > log_offset:
+                    logger.warning(f"Discarding {f.tell() - log_offset} bytes of an incomplete document write")
+                    f.truncate(log_offset)
+                    f.seek(log_offset)
+                f.write(lines.encode("utf-8"))
+                f.flush()
+                if sync:
+                    os.fsync(f.fileno())
+                return f.tell()
+        except Exception:
+            self._truncate_logs(vector_offset, log_offset)
+            raise
+
+    def _truncate_logs(self, vector_offset: int, log_offset: int):
+        """Drop a failed append from both logs, so neither holds rows the other lacks"""
+        for path, offset in ((self.vectors_path, vector_offset), (self.documents_path, log_offset)):
+            try:
+                with open(path, "rb+") as f:
+                    if os.fstat(f.fileno()).st_size > offset:
+                        f.truncate(offset)
+            except OSError as e:
+                # The next append drops whatever is left past the committed offsets
+                logger.error(f"Error rolling back {path}: {str(e)}")
+
+    def sync(self):
+        """Flush both logs to disk"""
+        for path in (self.vectors_path, self.documents_path):
+            if os.path.exists(path):
+                _fsync_file(path)
+
+    def _version_numbers(self) -> List[int]:
+        numbers = []
+        for name in os.listdir(self.versions_path):
+            if name.startswith("v") and name[1:].isdigit():
+                numbers.append(int(name[1:]))
+        return sorted(numbers)
+
+    def version_path(self, name: str) -> str:
+        """Directory of a published version"""
+        return os.path.join(self.versions_path, name)
+
+    def publish(self, index: faiss.Index, base: Optional[DocumentStore], documents: List[Dict[str, Any]],
+                log_offset: int, indexes: Sequence[Any] = ()) -> str:
+        """
+        Write a new version and atomically make it current (caller holds the write lock)
+
+        Args:
+            index: Index holding a vector for every document of the version
+            base: Document store of the previous version, or None
+            documents: Documents added since the previous version
+            log_offset: Log offset after the last of `documents`
+            indexes: Secondary indexes over all documents of the version, each saved
+                alongside through its save(directory) method
+
+        Returns:
+            The new version name
+        """
+        self.sync()
+        numbers = self._version_numbers()
+        name = f"v{(numbers[-1] + 1 if numbers else 1):06d}"
+        directory = os.path.join(self.versions_path, name)
+        tmp_directory = directory + ".tmp"
+        shutil.rmtree(tmp_directory, ignore_errors=True)
+        os.makedirs(tmp_directory)
+
+        faiss.write_index(index, os.path.join(tmp_directory, INDEX_FILE))
+        count = DocumentStore.write(tmp_directory, documents, base=base)
+        if count != index.ntotal:
+            shutil.rmtree(tmp_directory, ignore_errors=True)
+            raise ValueError(f"Cannot publish {index.ntotal} vectors with {count} documents")
+        files = [INDEX_FILE, MANIFEST_FILE] + DocumentStore.files()
+        for secondary in indexes:
+            files += secondary.save(tmp_directory)
+        with open(os.path.join(tmp_directory, MANIFEST_FILE), "w", encoding="utf-8") as f:
+            json.dump({"count": count, "log_offset": log_offset}, f)
+        for filename in files:
+            _fsync_file(os.path.join(tmp_directory, filename))
+        os.replace(tmp_directory, directory)
+        _fsync_dir(self.versions_path)
+
+        tmp_path = self.current_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(name)
+        _atomic_replace(tmp_path, self.current_path)
+
+        self._compact_vector_log(count)
+        self._collect_garbage()
+        logger.info(f"Published vector database version {name} with {count} documents")
+        return name
+
+    def _collect_garbage(self, keep: int = 2):
+        """Delete all but the newest `keep` versions; processes still mapping them keep their pages"""
+        for number in self._version_numbers()[:-keep]:
+            shutil.rmtree(os.path.join(self.versions_path, f"v{number:06d}"), ignore_errors=True)
+
+    def upgrade_layout(self):
+        """Publish a documents.json + faiss_index.bin database from an earlier release as the first version (caller holds the write lock)"""
+        if self.current_version() is not None or not os.path.exists(self.legacy_index_path) \
+                or not os.path.exists(self.legacy_documents_path):
+            return
+        logger.info("Converting legacy documents.json database to the versioned format")
+        index = faiss.read_index(self.legacy_index_path)
+        with open(self.legacy_documents_path, "r", encoding="utf-8") as f:
+            documents = json.load(f)
+        tmp_path = self.documents_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for doc in documents:
+                f.write(json.dumps(doc, ensure_ascii=False) + "\n")
+        _atomic_replace(tmp_path, self.documents_path)
+        self.publish(index, None, documents, os.path.getsize(self.documents_path))
+        os.remove(self.legacy_index_path)
+
+    def discard(self):
+        """Move corrupt database files aside so a fresh database can be created"""
+        for path in (self.current_path, self.documents_path, self.vectors_path,
+                     self.legacy_index_path, self.versions_path):
+            if os.path.exists(path):
+                if os.path.isdir(path + ".corrupt"):
+                    shutil.rmtree(path + ".corrupt")
+                os.replace(path, path + ".corrupt")
+                logger.warning(f"Moved corrupt {path} to {path}.corrupt")
+        os.makedirs(self.versions_path, exist_ok=True)
@@ -0,0 +1,119 @@
+import re
+import asyncio
+import logging
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from app.sarvam_async import AsyncSarvamClient
+
+logger = logging.getLogger(__name__)
+
+# Sentence terminators, including the Devanagari danda used in Hindi replies
+_SENTENCE_END = re.compile(r"(?<=[.!?।])\s+")
+
+class SentenceSplitter:
+    """
+    Incrementally split streamed LLM text into complete sentences
+    """
+    def __init__(self, max_chars: int = 240):
+        """
+        Initialize the splitter
+
+        Args:
+            max_chars: Force a split (at the last comma or space) once a sentence
+                grows past this many characters, so run-on replies still reach TTS
+        """
+        self.max_chars = max_chars
+        self.buffer = ""
+
+    def feed(self, text: str) -> List[str]:
+        """Add streamed text and return any sentences it completed"""
+        self.buffer += text
+        parts = _SENTENCE_END.split(self.buffer)
+        self.buffer = parts.pop()
+        sentences = [part.strip() for part in parts if part.strip()]
+
+        while len(self.buffer) > self.max_chars:
+            cut = max(self.buffer.rfind(",", 0, self.max_chars), self.buffer.rfind(" ", 0, self.max_chars))
+            if cut <= 0:
+                cut = self.max_chars
+            sentences.append(self.buffer[:cut + 1].strip())
+            self.buffer = self.buffer[cut + 1:]
+
+        return sentences
+
+    def flush(self) -> Optional[str]:
+        """Return whatever text is left once the stream has ended"""
+        tail = self.buffer.strip()
+        self.buffer = ""
+        return tail or None
+
+async def stream_speech_reply(sarvam: AsyncSarvamClient,
+                              messages: List[Dict[str, str]],
+                              target_language_code: str = "en-IN",
+                              speaker: str = "Anushka",
+                              model: str = "sarvam-m",
+                              temperature: float = 0.7) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Stream a spoken reply sentence by sentence
+
+    LLM tokens are split into sentences as they arrive and every completed
+    sentence is sent to TTS immediately, while the LLM keeps generating. Chunks
+    are yielded in sentence order, so time-to-first-audio is roughly the time
+    to generate and synthesize the first sentence.
+
+    Args:
+        sarvam: The async Sarvam client
+        messages: Conversation history to complete
+        target_language_code: Language of the generated speech
+        speaker: TTS voice
+        model: Chat completion model
+        temperature: Sampling temperature
+
+    Yields:
+        Dicts with the sentence index, its text and the base64 encoded audio
+    """
+    pending: asyncio.Queue = asyncio.Queue()
+
+    async def synthesize(sentence: str) -> str:
+        response = await sarvam.text_to_speech(
+            text=sentence,
+            target_language_code=target_language_code,
+            speaker=speaker
+        )
+        return response["audios"][0]
+
+    async def produce():
+        splitter = SentenceSplitter()
+        try:
+            async for delta in sarvam.chat_completions_stream(model=model, messages=messages,
+                                                              temperature=temperature):
+                for sentence in splitter.feed(delta):
+                    await pending.put((sentence, asyncio.ensure_future(synthesize(sentence))))
+            tail = splitter.flush()
+            if tail:
+                await pending.put((tail, asyncio.ensure_future(synthesize(tail))))
+        finally:
+            await pending.put(None)
+
+    producer = asyncio.ensure_future(produce())
+    tts_tasks = []
+    try:
+        index = 0
+        while True:
+            item = await pending.get()
+            if item is None:
+                break
+            sentence, task = item
+            tts_tasks.append(task)
+            yield {"index": index, "text": sentence, "audio": await task}
+            index += 1
+        # Surface LLM errors raised after the last complete sentence
+        await producer
+    finally:
+        producer.cancel()
+        while not pending.empty():
+            item = pending.get_nowait()
+            if item is not None:
+                tts_tasks.append(item[1])
+        for task in tts_tasks:
+            task.cancel()
@@ -0,0 +1,77 @@
+"""
+ANN index benchmark
+
+Measures build time, per-query search latency and recall@k of the flat, HNSW
+and IVF backends of SexualWellnessVectorDB on synthetic normalized embeddings.
+Recall is measured against exact inner-product search.
+
+Usage:
+    python -m benchmarks.ann_index --sizes 10000 100000 1000000 --k 5
+"""
+
+import time
+import argparse
+
+import numpy as np
+import faiss
+
+from app.vector_db import INDEX_TYPES, create_index
+
+def synthetic_embeddings(count: int, dimension: int, clusters: int, rng: np.random.Generator) -> np.ndarray:
+    """Clustered unit vectors, which resemble sentence embeddings more than uniform noise"""
+    centroids = rng.standard_normal((clusters, dimension)).astype("float32")
+    assignments = rng.integers(0, clusters, size=count)
+    vectors = centroids[assignments] + 0.6 * rng.standard_normal((count, dimension)).astype("float32")
+    faiss.normalize_L2(vectors)
+    return vectors
+
+def recall_at_k(found: np.ndarray, truth: np.ndarray) -> float:
+    hits = sum(len(set(f) & set(t)) for f, t in zip(found, truth))
+    return hits / truth.size
+
+def bench(index_type: str, corpus: np.ndarray, queries: np.ndarray, truth: np.ndarray, k: int, args):
+    start = time.perf_counter()
+    index = create_index(index_type, corpus.shape[1], corpus, hnsw_m=args.hnsw_m,
+                         hnsw_ef_search=args.ef_search, nprobe=args.nprobe)
+    build = time.perf_counter() - start
+
+    latencies = []
+    found = np.empty((len(queries), k), dtype="int64")
+    for i, query in enumerate(queries):
+        start = time.perf_counter()
+        _, indices = index.search(query[None, :], k)
+        latencies.append(time.perf_counter() - start)
+        found[i] = indices[0]
+
+    latencies = np.array(latencies) * 1000
+    print(f"  {index_type:<5} build={build:8.2f}s p50={np.percentile(latencies, 50):7.3f}ms "
+          f"p99={np.percentile(latencies, 99):7.3f}ms recall@{k}={recall_at_k(found, truth):.3f}")
+
+def main(args):
+    rng = np.random.default_rng(args.seed)
+    faiss.omp_set_num_threads(args.threads)
+    for size in args.sizes:
+        corpus = synthetic_embeddings(size, args.dimension, max(16, size // 500), rng)
+        queries = corpus[rng.integers(0, size, size=args.queries)]
+        queries = queries + 0.05 * rng.standard_normal(queries.shape).astype("float32")
+        faiss.normalize_L2(queries)
+
+        exact = create_index("flat", args.dimension, corpus)
+        _, truth = exact.search(queries, args.k)
+        print(f"{size} documents, dimension {args.dimension}, {args.queries} queries")
+        for index_type in args.index_types:
+            bench(index_type, corpus, queries, truth, args.k, args)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recall vs latency of the vector DB index backends")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--index-types", nargs="+", choices=INDEX_TYPES, default=list(INDEX_TYPES))
+    parser.add_argument("--dimension", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--hnsw-m", type=int, default=32)
+    parser.add_argument("--ef-search", type=int, default=64)
+    parser.add_argument("--nprobe", type=int, default=16)
+    parser.add_argument("--threads", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    main(parser.parse_args())
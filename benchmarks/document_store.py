@@ -0,0 +1,101 @@
+"""
+Document store benchmark
+
+Compares the columnar, memory-mapped DocumentStore with the documents.json
+list of dicts it replaced, on a synthetic corpus. Each format is loaded in a
+fresh process, which reports load time, RSS growth caused by the load, and
+the latency of fetching search hits: the question and score of k hits plus
+the answer of the best one, as SexualWellnessAgent does.
+
+Usage:
+    python -m benchmarks.document_store --docs 100000
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+import tempfile
+
+import numpy as np
+
+from app.vector_storage import DocumentStore
+from benchmarks.embedding_backends import peak_rss_mb
+
+FORMATS = ("json", "columnar")
+
+def build(workdir: str, docs: int):
+    documents = [{"id": i, "question": f"Synthetic question {i} about sexual wellness?",
+                  "answer": f"Synthetic answer {i}. " + "Please talk to a qualified doctor about this. " * 10}
+                 for i in range(docs)]
+    with open(os.path.join(workdir, "documents.json"), "w", encoding="utf-8") as f:
+        json.dump(documents, f, ensure_ascii=False, indent=2)
+    DocumentStore.write(workdir, documents)
+
+def run_format(fmt: str, workdir: str, lookups: int, k: int):
+    """Load one format in this process and print its results as JSON"""
+    baseline = peak_rss_mb()
+    start = time.perf_counter()
+    if fmt == "json":
+        with open(os.path.join(workdir, "documents.json"), "r", encoding="utf-8") as f:
+            documents = json.load(f)
+
+        def get_hit(doc_id, score):
+            doc = documents[doc_id].copy()
+            doc["score"] = score
+            return doc
+    else:
+        store = DocumentStore(workdir)
+        documents = store
+
+        def get_hit(doc_id, score):
+            return store.get(doc_id, score=score)
+    load = time.perf_counter() - start
+    rss = peak_rss_mb() - baseline
+
+    rng = np.random.default_rng(0)
+    latencies = []
+    for ids in rng.integers(0, len(documents), size=(lookups, k)):
+        start = time.perf_counter()
+        hits = [get_hit(int(doc_id), 0.9) for doc_id in ids]
+        [(hit["question"], hit["score"]) for hit in hits]
+        hits[0]["answer"]
+        latencies.append(time.perf_counter() - start)
+
+    latencies = np.array(latencies) * 1e6
+    print(json.dumps({
+        "format": fmt,
+        "load_ms": round(load * 1000, 1),
+        "rss_mb": round(rss, 1),
+        "p50_us": round(float(np.percentile(latencies, 50)), 1),
+        "p99_us": round(float(np.percentile(latencies, 99)), 1),
+    }))
+
+def main(args):
+    workdir = tempfile.mkdtemp(prefix="document-store-bench-")
+    build(workdir, args.docs)
+    sizes = {"json": os.path.getsize(os.path.join(workdir, "documents.json")),
+             "columnar": sum(os.path.getsize(os.path.join(workdir, name)) for name in DocumentStore.files())}
+    print(f"{args.docs} documents, {args.lookups} lookups of {args.k} hits")
+    for fmt in FORMATS:
+        output = subprocess.run([sys.executable, "-m", "benchmarks.document_store", "--single", fmt,
+                                 "--workdir", workdir, "--lookups", str(args.lookups), "--k", str(args.k)],
+                                capture_output=True, text=True, check=True)
+        r = json.loads(output.stdout.strip().splitlines()[-1])
+        print(f"  {fmt:<9} on disk={sizes[fmt] / 2**20:7.1f}MB load={r['load_ms']:9.1f}ms "
+              f"RSS +{r['rss_mb']:7.1f}MB hit fetch p50={r['p50_us']:6.1f}us p99={r['p99_us']:6.1f}us")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load time, RSS and hit fetch latency of document formats")
+    parser.add_argument("--docs", type=int, default=100000)
+    parser.add_argument("--lookups", type=int, default=10000)
+    parser.add_argument("--k", type=int, default=2)
+    parser.add_argument("--single", choices=FORMATS, help=argparse.SUPPRESS)
+    parser.add_argument("--workdir", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.single:
+        run_format(args.single, args.workdir, args.lookups, args.k)
+    else:
+        main(args)
@@ -0,0 +1,112 @@
+"""
+Embedding backend benchmark and parity check
+
+Exports the ONNX models first if they are missing. For each backend, runs in
+a fresh process and reports model load time, single-query encode latency
+(p50/p99), batch throughput and peak RSS. Then checks cosine agreement of the
+ONNX backends against sentence-transformers and exits non-zero if any backend
+falls below its threshold.
+
+Usage:
+    python -m benchmarks.embedding_backends
+    python -m benchmarks.embedding_backends --backends sentence-transformers onnx-int8
+"""
+
+import os
+import sys
+import json
+import time
+import resource
+import argparse
+import subprocess
+import tempfile
+
+import numpy as np
+
+from app.embeddings import EMBEDDING_BACKENDS, PARITY_SENTENCES, PARITY_THRESHOLDS, \
+    check_parity, create_encoder, export_onnx
+
+def corpus(size: int):
+    return [f"{PARITY_SENTENCES[i % len(PARITY_SENTENCES)]} (variant {i})" for i in range(size)]
+
+def peak_rss_mb() -> float:
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+def run_backend(backend: str, model: str, queries: int, batch_docs: int, batch_size: int, output: str):
+    """Benchmark one backend in this process and write its results (and parity embeddings)"""
+    start = time.perf_counter()
+    encoder = create_encoder(backend, model)
+    load = time.perf_counter() - start
+
+    encoder.encode(PARITY_SENTENCES[:2])
+    latencies = []
+    for text in corpus(queries):
+        start = time.perf_counter()
+        encoder.encode([text])
+        latencies.append(time.perf_counter() - start)
+
+    docs = corpus(batch_docs)
+    start = time.perf_counter()
+    encoder.encode(docs, batch_size=batch_size)
+    throughput = len(docs) / (time.perf_counter() - start)
+
+    np.save(output + ".npy", encoder.encode(PARITY_SENTENCES + docs[:200]))
+    latencies = np.array(latencies) * 1000
+    with open(output + ".json", "w") as f:
+        json.dump({
+            "backend": backend,
+            "load_s": round(load, 2),
+            "p50_ms": round(float(np.percentile(latencies, 50)), 2),
+            "p99_ms": round(float(np.percentile(latencies, 99)), 2),
+            "docs_per_sec": round(throughput, 1),
+            "peak_rss_mb": round(peak_rss_mb(), 1),
+        }, f)
+
+def main(args):
+    workdir = tempfile.mkdtemp(prefix="embedding-bench-")
+    results = {}
+    if any(backend.startswith("onnx") for backend in args.backends):
+        export_onnx(args.model, quantize="onnx-int8" in args.backends)
+    for backend in args.backends:
+        output = os.path.join(workdir, backend)
+        subprocess.run([sys.executable, "-m", "benchmarks.embedding_backends", "--single", backend,
+                        "--model", args.model, "--queries", str(args.queries), "--batch-docs", str(args.batch_docs),
+                        "--batch-size", str(args.batch_size), "--output", output], check=True)
+        with open(output + ".json") as f:
+            results[backend] = json.load(f)
+        r = results[backend]
+        print(f"{backend:<22} load={r['load_s']:6.2f}s p50={r['p50_ms']:7.2f}ms p99={r['p99_ms']:7.2f}ms "
+              f"throughput={r['docs_per_sec']:8.1f} docs/s peak RSS={r['peak_rss_mb']:7.1f}MB")
+
+    if "sentence-transformers" not in results:
+        return
+    reference = np.load(os.path.join(workdir, "sentence-transformers.npy"))
+    failed = False
+    for backend, threshold in PARITY_THRESHOLDS.items():
+        if backend not in results:
+            continue
+        embeddings = np.load(os.path.join(workdir, backend + ".npy"))
+        try:
+            parity = check_parity(backend, reference, embeddings)
+            print(f"parity {backend:<15} mean cosine={parity['mean']:.5f} min={parity['min']:.5f} "
+                  f"(threshold {threshold}) OK")
+        except RuntimeError as e:
+            failed = True
+            print(f"parity {backend:<15} FAIL: {str(e)}")
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare embedding backends for latency, throughput, RSS and parity")
+    parser.add_argument("--backends", nargs="+", choices=EMBEDDING_BACKENDS, default=list(EMBEDDING_BACKENDS))
+    parser.add_argument("--model", default="all-MiniLM-L6-v2")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--batch-docs", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--single", choices=EMBEDDING_BACKENDS, help=argparse.SUPPRESS)
+    parser.add_argument("--output", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.single:
+        run_backend(args.single, args.model, args.queries, args.batch_docs, args.batch_size, args.output)
+    else:
+        main(args)
@@ -0,0 +1,81 @@
+"""
+Exotel bulk SMS benchmark
+
+Sends one SMS to each of --recipients numbers through a local mock Exotel
+server, first one requests.post after another (a fresh connection per send,
+as ExotelClient used to), then with AsyncExotelClient.send_bulk_sms (what
+/api/exotel/sms/bulk streams) at several concurrency levels. The rate budget
+(EXOTEL_RATE_LIMIT) is set from --rate-limit; set it below --server-rate to
+see the limiter keep a campaign clear of 429s.
+
+Usage:
+    python -m benchmarks.exotel_bulk --recipients 500 --latency-ms 100 --concurrency 8 32
+"""
+
+import os
+import time
+import asyncio
+import argparse
+
+import requests
+
+from app.exotel import AsyncExotelClient, close_async_http_client
+from benchmarks.mock_exotel import MockExotelServer
+
+def sequential(base_url: str, recipients) -> int:
+    url = f"{base_url}/v1/Accounts/benchmark/Sms/send.json"
+    sent = 0
+    for to_number in recipients:
+        response = requests.post(url, auth=("benchmark", "benchmark"),
+                                 data={"From": "08000000000", "To": to_number, "Body": "Reminder"})
+        sent += response.ok
+    return sent
+
+async def bulk(recipients, concurrency: int):
+    client = AsyncExotelClient()
+    first = None
+    results = []
+    start = time.perf_counter()
+    async for result in client.send_bulk_sms("08000000000", recipients, "Reminder", concurrency=concurrency):
+        first = first or time.perf_counter() - start
+        results.append(result)
+    await close_async_http_client()
+    return results, first
+
+def main(args):
+    os.environ.setdefault("EXOTEL_API_KEY", "benchmark")
+    os.environ.setdefault("EXOTEL_API_TOKEN", "benchmark")
+    os.environ.setdefault("EXOTEL_SID", "benchmark")
+    os.environ.setdefault("EXOTEL_POOL_SIZE", str(max(args.concurrency)))
+    os.environ["EXOTEL_RATE_LIMIT"] = str(args.rate_limit)
+    os.environ.setdefault("EXOTEL_RATE_BURST", str(max(args.concurrency)))
+    recipients = [f"+9190000{i:05d}" for i in range(args.recipients)]
+    with MockExotelServer(latency=args.latency_ms / 1000, rate_limit=args.server_rate) as server:
+        os.environ["EXOTEL_BASE_URL"] = server.url
+        print(f"{args.recipients} SMS, {args.latency_ms}ms per send, rate limit {args.rate_limit}/s, "
+              f"server limit {args.server_rate or 'none'}/s")
+
+        start = time.perf_counter()
+        sent = sequential(server.url, recipients)
+        elapsed = time.perf_counter() - start
+        print(f"  sequential      sent={sent}/{args.recipients} in {elapsed:6.2f}s "
+              f"({args.recipients / elapsed:7.1f} SMS/s)")
+
+        for concurrency in args.concurrency:
+            throttled = server.requests_throttled
+            start = time.perf_counter()
+            results, first = asyncio.run(bulk(recipients, concurrency))
+            elapsed = time.perf_counter() - start
+            sent = sum(result["ok"] for result in results)
+            print(f"  bulk x{concurrency:<9} sent={sent}/{args.recipients} in {elapsed:6.2f}s "
+                  f"({args.recipients / elapsed:7.1f} SMS/s) first result after {1000 * first:6.1f}ms "
+                  f"server 429s={server.requests_throttled - throttled}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sequential vs concurrent bulk SMS through Exotel")
+    parser.add_argument("--recipients", type=int, default=500)
+    parser.add_argument("--latency-ms", type=float, default=100)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[8, 32])
+    parser.add_argument("--rate-limit", type=float, default=1000, help="Client-side sends per second budget")
+    parser.add_argument("--server-rate", type=int, default=0, help="Requests per second the mock answers")
+    main(parser.parse_args())
@@ -0,0 +1,110 @@
+"""
+Exotel call polling benchmark
+
+Places --calls calls on a local mock Exotel server, which completes each one
+after --call-seconds and posts the final status to a local callback receiver.
+Pollers then fetch every call's details and recordings each --interval-ms
+for --poll-seconds, as a dashboard or the client apps do, in two modes:
+
+    upstream   every poll asks Exotel (the previous routes)
+    store      polls go through CallStore, fed by the status callbacks
+
+Reports the requests that reached Exotel and poll latency for each mode.
+
+Usage:
+    python -m benchmarks.exotel_callbacks --calls 50 --call-seconds 1 --poll-seconds 3 --latency-ms 50
+"""
+
+import os
+import time
+import asyncio
+import argparse
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+import numpy as np
+
+from app.exotel import AsyncExotelClient, close_async_http_client
+from app.exotel_calls import CallStore
+from benchmarks.mock_exotel import MockExotelServer
+
+class CallbackHandler(BaseHTTPRequestHandler):
+    """Stand-in for /api/exotel/status-callback, recording into the server's store"""
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0)).decode("utf-8")
+        self.server.store.record_callback({key: values[-1] for key, values in parse_qs(body).items()})
+        self.send_response(200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+async def poll(client: AsyncExotelClient, store, sids, args) -> np.ndarray:
+    latencies = []
+
+    async def poller(sid: str):
+        deadline = time.perf_counter() + args.poll_seconds
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            if store:
+                await store.call_details(sid, client.get_call_details)
+                await store.recordings(sid, client.get_call_recordings)
+            else:
+                await client.get_call_details(sid)
+                await client.get_call_recordings(sid)
+            latencies.append(time.perf_counter() - start)
+            await asyncio.sleep(args.interval_ms / 1000)
+
+    await asyncio.gather(*(poller(sid) for sid in sids))
+    return np.array(latencies) * 1000
+
+async def run(mode: str, args, server: MockExotelServer, receiver, tmp: str):
+    store = CallStore(os.path.join(tmp, f"calls-{mode}.db"))
+    receiver.store = store
+    client = AsyncExotelClient()
+    callback_url = f"http://127.0.0.1:{receiver.server_address[1]}/api/exotel/status-callback"
+    sids = []
+    for i in range(args.calls):
+        response = await client.make_call("08000000000", f"+9190000{i:05d}", "08000000000",
+                                          status_callback=callback_url)
+        if mode == "store":
+            store.track(response["Call"])
+        sids.append(response["Call"]["Sid"])
+    served = server.requests_served
+    latencies = await poll(client, store if mode == "store" else None, sids, args)
+    upstream = server.requests_served - served
+    await close_async_http_client()
+    print(f"  {mode:<9} polls={len(latencies)} upstream requests={upstream} "
+          f"p50={np.percentile(latencies, 50):7.2f}ms p99={np.percentile(latencies, 99):7.2f}ms "
+          f"callbacks={store.callbacks}")
+    store.close()
+
+def main(args):
+    os.environ.setdefault("EXOTEL_API_KEY", "benchmark")
+    os.environ.setdefault("EXOTEL_API_TOKEN", "benchmark")
+    os.environ.setdefault("EXOTEL_SID", "benchmark")
+    os.environ.setdefault("EXOTEL_POOL_SIZE", str(args.calls * 2))
+    receiver = ThreadingHTTPServer(("127.0.0.1", 0), CallbackHandler)
+    receiver.daemon_threads = True
+    threading.Thread(target=receiver.serve_forever, daemon=True).start()
+    with MockExotelServer(latency=args.latency_ms / 1000, call_duration=args.call_seconds) as server, \
+            tempfile.TemporaryDirectory() as tmp:
+        os.environ["EXOTEL_BASE_URL"] = server.url
+        print(f"{args.calls} calls of {args.call_seconds}s polled every {args.interval_ms}ms for "
+              f"{args.poll_seconds}s, {args.latency_ms}ms per Exotel response")
+        for mode in ("upstream", "store"):
+            asyncio.run(run(mode, args, server, receiver, tmp))
+    receiver.shutdown()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Exotel requests and latency of call polling, with and without "
+                                                 "the callback-fed call store")
+    parser.add_argument("--calls", type=int, default=50)
+    parser.add_argument("--call-seconds", type=float, default=1.0)
+    parser.add_argument("--poll-seconds", type=float, default=3.0)
+    parser.add_argument("--interval-ms", type=float, default=250)
+    parser.add_argument("--latency-ms", type=float, default=50)
+    main(parser.parse_args())
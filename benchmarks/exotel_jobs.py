@@ -0,0 +1,69 @@
+"""
+Exotel job queue benchmark
+
+Queues --jobs SMS in a fresh SQLite job queue and drains it with JobWorkers
+against a local mock Exotel server, for several worker counts. Reports how
+long a submit takes (what /api/exotel/sms now waits for, instead of the
+upstream call) and the drain throughput, which should grow with the number
+of workers until the rate budget or the server is the limit.
+
+Usage:
+    python -m benchmarks.exotel_jobs --jobs 500 --latency-ms 100 --workers 1 4 16 32
+"""
+
+import os
+import time
+import asyncio
+import argparse
+import tempfile
+
+import numpy as np
+
+from app.exotel import AsyncExotelClient, close_async_http_client
+from app.exotel_jobs import JobQueue, JobWorkers
+from benchmarks.mock_exotel import MockExotelServer
+
+async def drain(queue: JobQueue, workers: int, total: int) -> float:
+    runner = JobWorkers(queue, AsyncExotelClient(), workers=workers, poll_interval=0.05)
+    start = time.perf_counter()
+    runner.start()
+    while runner.processed < total:
+        await asyncio.sleep(0.01)
+    elapsed = time.perf_counter() - start
+    await runner.stop()
+    await close_async_http_client()
+    return elapsed
+
+def main(args):
+    os.environ.setdefault("EXOTEL_API_KEY", "benchmark")
+    os.environ.setdefault("EXOTEL_API_TOKEN", "benchmark")
+    os.environ.setdefault("EXOTEL_SID", "benchmark")
+    os.environ.setdefault("EXOTEL_POOL_SIZE", str(max(args.workers)))
+    os.environ["EXOTEL_RATE_LIMIT"] = str(args.rate_limit)
+    os.environ.setdefault("EXOTEL_RATE_BURST", str(max(args.workers)))
+    with MockExotelServer(latency=args.latency_ms / 1000) as server, tempfile.TemporaryDirectory() as tmp:
+        os.environ["EXOTEL_BASE_URL"] = server.url
+        print(f"{args.jobs} SMS jobs, {args.latency_ms}ms per send, rate limit {args.rate_limit}/s")
+        for workers in args.workers:
+            queue = JobQueue(os.path.join(tmp, f"jobs-{workers}.db"))
+            submits = []
+            for i in range(args.jobs):
+                start = time.perf_counter()
+                queue.enqueue("sms", {"from_number": "08000000000", "to_number": f"+9190000{i:05d}",
+                                      "body": "Reminder"}, idempotency_key=f"reminder-{i}")
+                submits.append(time.perf_counter() - start)
+            submits = np.array(submits) * 1000
+            elapsed = asyncio.run(drain(queue, workers, args.jobs))
+            counts = queue.counts()
+            print(f"  workers={workers:<4} submit p50={np.percentile(submits, 50):6.3f}ms "
+                  f"p99={np.percentile(submits, 99):6.3f}ms  drained in {elapsed:6.2f}s "
+                  f"({args.jobs / elapsed:7.1f} jobs/s) succeeded={counts['succeeded']} failed={counts['failed']}")
+            queue.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Submit latency and drain throughput of the Exotel job queue")
+    parser.add_argument("--jobs", type=int, default=500)
+    parser.add_argument("--latency-ms", type=float, default=100)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 16, 32])
+    parser.add_argument("--rate-limit", type=float, default=1000, help="Client-side sends per second budget")
+    main(parser.parse_args())
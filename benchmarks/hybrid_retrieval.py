@@ -0,0 +1,93 @@
+"""
+Hybrid retrieval benchmark
+
+Evaluates dense-only, BM25-only and hybrid (fused dense and BM25) retrieval
+on a labeled query set. Reports hit@1, MRR, how many in-domain queries are
+answered correctly above the confidence threshold, how many out-of-domain
+queries are wrongly accepted, and per-query latency of each path.
+
+The database is created in a temporary directory with the default documents,
+plus an optional knowledge file (JSONL or CSV) as extra distractors.
+
+Usage:
+    python -m benchmarks.hybrid_retrieval
+    python -m benchmarks.hybrid_retrieval --knowledge knowledge.jsonl --threshold 0.8
+"""
+
+import time
+import argparse
+import tempfile
+
+import numpy as np
+
+from app.calibration import DEFAULT_ANSWER_THRESHOLD, default_labeled_queries_path, load_labeled_queries
+from app.knowledge_io import detect_format, iter_knowledge_records
+from app.vector_db import SexualWellnessVectorDB
+
+
+def evaluate(name: str, labeled, search, threshold: float, k: int):
+    hits_at_1 = reciprocal_ranks = answered = false_accepts = 0
+    in_domain = [item for item in labeled if item["question"]]
+    latencies = []
+    for item in labeled:
+        start = time.perf_counter()
+        results = search(item["query"], k)
+        latencies.append(time.perf_counter() - start)
+        confident = bool(results) and results[0]["score"] >= threshold
+        if not item["question"]:
+            false_accepts += confident
+            continue
+        questions = [result["question"] for result in results]
+        if item["question"] in questions:
+            rank = questions.index(item["question"]) + 1
+            reciprocal_ranks += 1.0 / rank
+            hits_at_1 += rank == 1
+            answered += rank == 1 and confident
+
+    latencies = np.array(latencies) * 1000
+    out_of_domain = len(labeled) - len(in_domain)
+    print(f"  {name:<8} hit@1={hits_at_1 / len(in_domain):.3f} MRR={reciprocal_ranks / len(in_domain):.3f} "
+          f"answered={answered}/{len(in_domain)} false accepts={false_accepts}/{out_of_domain} "
+          f"p50={np.percentile(latencies, 50):7.3f}ms p99={np.percentile(latencies, 99):7.3f}ms")
+
+def main(args):
+    labeled = load_labeled_queries(args.queries)
+    vector_db = SexualWellnessVectorDB(db_path=tempfile.mkdtemp(prefix="hybrid-bench-"), query_cache_size=0)
+    if args.knowledge:
+        with open(args.knowledge, "rb") as f:
+            vector_db.add_documents_stream(iter_knowledge_records(f, detect_format(args.knowledge)))
+    print(f"{vector_db.count} documents, {len(labeled)} labeled queries, threshold {args.threshold}")
+
+    def dense(query, k):
+        vector_db.hybrid = False
+        return vector_db.search(query, k)
+
+    def hybrid(query, k):
+        vector_db.hybrid = True
+        return vector_db.search(query, k)
+
+    def lexical(query, k):
+        return [vector_db.get_document(doc_id, score=coverage)
+                for doc_id, _, coverage in vector_db.lexical.search(query, k)]
+
+    for name, search in (("dense", dense), ("bm25", lexical), ("hybrid", hybrid)):
+        evaluate(name, labeled, search, args.threshold, args.k)
+
+    # Lexical lookup alone, without fetching documents
+    latencies = []
+    for _ in range(args.repeat):
+        for item in labeled:
+            start = time.perf_counter()
+            vector_db.lexical.search(item["query"], vector_db.fusion_depth)
+            latencies.append(time.perf_counter() - start)
+    latencies = np.array(latencies) * 1e6
+    print(f"  BM25 lookup p50={np.percentile(latencies, 50):.1f}us p99={np.percentile(latencies, 99):.1f}us")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Dense vs BM25 vs hybrid retrieval on a labeled query set")
+    parser.add_argument("--queries", default=default_labeled_queries_path(), help="Labeled JSONL query set")
+    parser.add_argument("--knowledge", help="Extra JSONL or CSV documents to load as distractors")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_ANSWER_THRESHOLD)
+    parser.add_argument("--k", type=int, default=2)
+    parser.add_argument("--repeat", type=int, default=20, help="Passes over the queries for BM25 lookup timing")
+    main(parser.parse_args())
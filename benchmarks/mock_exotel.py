@@ -0,0 +1,263 @@
+"""
+Local stand-in for the Exotel API, for benchmarks and load tests
+
+Accepts the form posts ExotelClient sends (connect calls, send SMS) and answers
+with Exotel-shaped JSON after a fixed delay, with HTTP/1.1 keep-alive so
+pooled clients can reuse connections. Placed calls are remembered, so call
+details can be fetched back; each call completes after --call-seconds, and
+then, if it was placed with a StatusCallback, the server posts the final
+status there as Exotel does. Its recording is served from /recordings/, from
+--recordings-dir WAV fixtures if given, else a synthesized --recording-seconds tone.
+
+Usage:
+    python -m benchmarks.mock_exotel --port 8766 --latency-ms 100
+    EXOTEL_BASE_URL=http://127.0.0.1:8766 EXOTEL_API_KEY=x EXOTEL_API_TOKEN=x EXOTEL_SID=x uvicorn main:app
+"""
+
+import io
+import os
+import json
+import math
+import time
+import wave
+import struct
+import uuid
+import random
+import argparse
+import threading
+import urllib.request
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qs, urlencode, urlparse
+
+def tone_wav(seconds: float, sample_rate: int = 8000, frequency: float = 440.0) -> bytes:
+    """A mono 16-bit WAV sine tone, the format telephony recordings come in"""
+    period = [struct.pack("<h", int(8000 * math.sin(2 * math.pi * frequency * i / sample_rate)))
+              for i in range(sample_rate)]
+    frames = b"".join(period) * int(seconds) + b"".join(period[:int(sample_rate * (seconds % 1))])
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(sample_rate)
+        wav_file.writeframes(frames)
+    return buffer.getvalue()
+
+class MockExotelHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out as separate writes; without this, keep-alive responses hit delayed ACKs
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status: int, body: Dict[str, Any], headers: Optional[Dict[str, str]] = None):
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _form(self) -> Dict[str, str]:
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length).decode("utf-8") if length else ""
+        return {key: values[-1] for key, values in parse_qs(body).items()}
+
+    def _send_recording(self, name: str):
+        """Stream a recording in chunks, as a file download"""
+        fixtures = self.server.recording_files
+        if fixtures:
+            with open(fixtures[sum(name.encode("utf-8")) % len(fixtures)], "rb") as f:
+                audio = f.read()
+        else:
+            audio = self.server.recording
+        self.send_response(200)
+        self.send_header("Content-Type", "audio/wav")
+        self.send_header("Content-Length", str(len(audio)))
+        self.end_headers()
+        for offset in range(0, len(audio), 64 * 1024):
+            self.wfile.write(audio[offset:offset + 64 * 1024])
+
+    def _throttled(self) -> bool:
+        """Whether the request exceeds the server's rate limit (a fixed one-second window)"""
+        if not self.server.rate_limit:
+            return False
+        with self.server.lock:
+            window = int(time.monotonic())
+            if window != self.server.window:
+                self.server.window, self.server.window_requests = window, 0
+            self.server.window_requests += 1
+            return self.server.window_requests > self.server.rate_limit
+
+    def _handle(self, method: str):
+        with self.server.lock:
+            self.server.requests_served += 1
+        form = self._form() if method == "POST" else {}
+        if self._throttled():
+            with self.server.lock:
+                self.server.requests_throttled += 1
+            self._send(429, {"RestException": {"Status": 429, "Message": "Too many requests"}}, {"Retry-After": "1"})
+            return
+        if self.server.failure_rate and random.random() < self.server.failure_rate:
+            self._send(503, {"RestException": {"Status": 503, "Message": "Service unavailable"}})
+            return
+        if self.server.latency:
+            time.sleep(self.server.latency)
+
+        parts = [part for part in urlparse(self.path).path.split("/") if part]
+        if method == "GET" and len(parts) == 2 and parts[0] == "recordings":
+            self._send_recording(parts[1])
+            return
+        # /v1/Accounts/{sid}/...
+        parts = parts[3:]
+        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        if method == "POST" and parts == ["Sms", "send.json"]:
+            with self.server.lock:
+                self.server.messages_sent += 1
+            self._send(200, {"SMSMessage": {"Sid": uuid.uuid4().hex, "From": form.get("From"),
+                                            "To": form.get("To"), "Body": form.get("Body"),
+                                            "Status": "queued", "DateCreated": now}})
+        elif method == "POST" and parts == ["Calls", "connect.json"]:
+            call = {"Sid": uuid.uuid4().hex, "From": form.get("From"), "To": form.get("To"),
+                    "PhoneNumberSid": form.get("CallerId"), "Status": "in-progress", "DateCreated": now,
+                    "StatusCallback": form.get("StatusCallback")}
+            with self.server.lock:
+                self.server.calls[call["Sid"]] = call
+            self._send(200, {"Call": call})
+            timer = threading.Timer(self.server.call_duration, self.server.complete_call, (call["Sid"],))
+            timer.daemon = True
+            timer.start()
+        elif method == "GET" and len(parts) == 2 and parts[0] == "Calls" and parts[1].endswith(".json"):
+            call = self.server.calls.get(parts[1][:-len(".json")])
+            if call:
+                self._send(200, {"Call": call})
+            else:
+                self._send(404, {"RestException": {"Status": 404, "Message": "Call not found"}})
+        elif method == "GET" and len(parts) == 3 and parts[0] == "Calls" and parts[2] == "Recordings.json":
+            call = self.server.calls.get(parts[1], {})
+            self._send(200, {"Recordings": [{"CallSid": parts[1], "Url": call["RecordingUrl"]}]
+                             if call.get("RecordingUrl") else []})
+        else:
+            self._send(404, {"RestException": {"Status": 404, "Message": "Not found"}})
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_POST(self):
+        self._handle("POST")
+
+class MockExotelHTTPServer(ThreadingHTTPServer):
+    def complete_call(self, sid: str):
+        """End a call and post its final status to its StatusCallback"""
+        with self.lock:
+            call = self.calls[sid]
+            call.update(Status="completed", RecordingUrl=f"{self.url}/recordings/{sid}.wav",
+                        DateUpdated=datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+            callback = call.get("StatusCallback")
+        if not callback:
+            return
+        data = urlencode({"CallSid": sid, "Status": "completed", "RecordingUrl": call["RecordingUrl"],
+                          "DateUpdated": call["DateUpdated"], "EventType": "terminal"}).encode("utf-8")
+        try:
+            urllib.request.urlopen(urllib.request.Request(callback, data=data), timeout=5).close()
+            with self.lock:
+                self.callbacks_sent += 1
+        except OSError as e:
+            print(f"Status callback to {callback} failed: {e}")
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+class MockExotelServer:
+    """
+    Exotel stand-in running on a background thread
+    """
+    def __init__(self, port: int = 0, latency: float = 0.0, rate_limit: int = 0, failure_rate: float = 0.0,
+                 call_duration: float = 1.0, recording_seconds: float = 60.0,
+                 recordings_dir: Optional[str] = None):
+        """
+        Initialize the server
+
+        Args:
+            port: Port to listen on (0 picks a free one)
+            latency: Seconds each response is delayed
+            rate_limit: Requests per second answered before the server returns 429 (0 is unlimited)
+            failure_rate: Share of requests answered with 503
+            call_duration: Seconds from placing a call until it completes
+            recording_seconds: Length of the synthesized recording served for every call
+            recordings_dir: Directory of WAV fixtures served as recordings instead
+        """
+        self.httpd = MockExotelHTTPServer(("127.0.0.1", port), MockExotelHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.latency = latency
+        self.httpd.rate_limit = rate_limit
+        self.httpd.failure_rate = failure_rate
+        self.httpd.requests_served = 0
+        self.httpd.requests_throttled = 0
+        self.httpd.messages_sent = 0
+        self.httpd.calls = {}
+        self.httpd.call_duration = call_duration
+        self.httpd.callbacks_sent = 0
+        self.httpd.recording_files: List[str] = sorted(
+            os.path.join(recordings_dir, name) for name in os.listdir(recordings_dir) if name.lower().endswith(".wav")
+        ) if recordings_dir else []
+        self.httpd.recording = b"" if self.httpd.recording_files else tone_wav(recording_seconds)
+        self.httpd.window = 0
+        self.httpd.window_requests = 0
+        self.httpd.lock = threading.Lock()
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        return self.httpd.url
+
+    @property
+    def requests_served(self) -> int:
+        return self.httpd.requests_served
+
+    @property
+    def requests_throttled(self) -> int:
+        return self.httpd.requests_throttled
+
+    @property
+    def messages_sent(self) -> int:
+        return self.httpd.messages_sent
+
+    @property
+    def callbacks_sent(self) -> int:
+        return self.httpd.callbacks_sent
+
+    @property
+    def calls(self) -> Dict[str, Dict[str, Any]]:
+        return self.httpd.calls
+
+    def __enter__(self) -> "MockExotelServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve a local stand-in for the Exotel API")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--latency-ms", type=float, default=100)
+    parser.add_argument("--rate-limit", type=int, default=0, help="Requests per second before answering 429")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Share of requests answered with 503")
+    parser.add_argument("--call-seconds", type=float, default=1.0, help="Seconds until a placed call completes")
+    parser.add_argument("--recording-seconds", type=float, default=60.0, help="Length of the synthesized recording")
+    parser.add_argument("--recordings-dir", help="Serve the WAV files in this directory as recordings")
+    args = parser.parse_args()
+    with MockExotelServer(args.port, args.latency_ms / 1000, args.rate_limit, args.failure_rate,
+                          args.call_seconds, args.recording_seconds, args.recordings_dir) as server:
+        print(f"Mock Exotel API on {server.url}")
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,172 @@
+"""
+Local stand-in for the Practo API, for benchmarks and load tests
+
+Serves the endpoints PractoClient calls with synthetic JSON after a fixed
+delay, with HTTP/1.1 keep-alive so pooled clients can reuse connections.
+Optionally serves HTTPS with a given certificate, so TLS handshakes are
+part of what is measured.
+
+Usage:
+    python -m benchmarks.mock_practo --port 8765 --latency-ms 20
+    PRACTO_BASE_URL=http://127.0.0.1:8765 PRACTO_CLIENT_ID=x PRACTO_API_KEY=x uvicorn main:app
+"""
+
+import ssl
+import json
+import time
+import random
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional
+from urllib.parse import parse_qs, urlparse
+
+PAGE_SIZE = 10
+
+class MockPractoHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out as separate writes; without this, keep-alive responses hit delayed ACKs
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status: int, body: Dict[str, Any], headers: Optional[Dict[str, str]] = None):
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _listing(self, kind: str, page: int) -> Dict[str, Any]:
+        total = self.server.total_records
+        first = (page - 1) * PAGE_SIZE
+        records = [{"id": i + 1, "name": f"{kind[:-1].title()} {i + 1}", "city": "Bangalore"}
+                   for i in range(first, min(first + PAGE_SIZE, total))]
+        return {kind: records, "page": page, "total_pages": -(-total // PAGE_SIZE), "total": total}
+
+    def _throttled(self) -> bool:
+        """Whether the request exceeds the server's rate limit (a fixed one-second window)"""
+        if not self.server.rate_limit:
+            return False
+        with self.server.window_lock:
+            window = int(time.monotonic())
+            if window != self.server.window:
+                self.server.window, self.server.window_requests = window, 0
+            self.server.window_requests += 1
+            return self.server.window_requests > self.server.rate_limit
+
+    def do_GET(self):
+        self.server.requests_served += 1
+        if self._throttled():
+            self.server.requests_throttled += 1
+            self._send(429, {"error": "rate limit exceeded"}, {"Retry-After": "1"})
+            return
+        if self.server.failure_rate and random.random() < self.server.failure_rate:
+            self._send(503, {"error": "service unavailable"})
+            return
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        url = urlparse(self.path)
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        parts = [part for part in url.path.split("/") if part]
+
+        if parts in (["doctors"], ["practices"]):
+            self._send(200, self._listing(parts[0], int(params.get("page", 1))))
+        elif parts == ["doctors", "phone_number"]:
+            self._send(200, {"relation_id": params.get("relation_id"), "phone_number": "+910000000000"})
+        elif len(parts) == 2 and parts[0] in ("doctors", "practices") and parts[1].isdigit():
+            self._send(200, {"id": int(parts[1]), "name": f"{parts[0][:-1].title()} {parts[1]}"})
+        elif parts == ["search"]:
+            offset, limit = int(params.get("offset", 0)), int(params.get("limit", 10))
+            ids = range(offset + 1, min(offset + limit, self.server.total_records) + 1)
+            self._send(200, {"doctors": [{"id": i, "name": f"Doctor {i}", "city": params.get("city"),
+                                          "speciality": params.get("speciality")} for i in ids],
+                             "total": self.server.total_records})
+        elif parts == ["meta", "countries"]:
+            self._send(200, {"countries": [{"id": 1, "name": "India"}]})
+        elif parts == ["meta", "cities"]:
+            self._send(200, {"cities": [{"id": 1, "name": "Bangalore"}, {"id": 2, "name": "Mumbai"}]})
+        elif len(parts) == 3 and parts[:2] == ["meta", "cities"]:
+            self._send(200, {"localities": ["Indiranagar"], "specialties": ["Sexologist"]})
+        else:
+            self._send(404, {"error": "not found"})
+
+class MockPractoServer:
+    """
+    Practo stand-in running on a background thread
+    """
+    def __init__(self, port: int = 0, latency: float = 0.0, total_records: int = 200,
+                 certfile: Optional[str] = None, keyfile: Optional[str] = None,
+                 rate_limit: int = 0, failure_rate: float = 0.0):
+        """
+        Initialize the server
+
+        Args:
+            port: Port to listen on (0 picks a free one)
+            latency: Seconds each response is delayed
+            total_records: Doctors and practices in the paginated listings
+            certfile: Certificate to serve HTTPS with
+            keyfile: Private key of the certificate
+            rate_limit: Requests per second answered before the server returns 429 (0 is unlimited)
+            failure_rate: Share of requests answered with 503
+        """
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", port), MockPractoHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.latency = latency
+        self.httpd.total_records = total_records
+        self.httpd.requests_served = 0
+        self.httpd.requests_throttled = 0
+        self.httpd.rate_limit = rate_limit
+        self.httpd.failure_rate = failure_rate
+        self.httpd.window = 0
+        self.httpd.window_requests = 0
+        self.httpd.window_lock = threading.Lock()
+        self.scheme = "http"
+        if certfile:
+            context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+            context.load_cert_chain(certfile, keyfile)
+            self.httpd.socket = context.wrap_socket(self.httpd.socket, server_side=True)
+            self.scheme = "https"
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        return f"{self.scheme}://127.0.0.1:{self.httpd.server_address[1]}"
+
+    @property
+    def requests_served(self) -> int:
+        return self.httpd.requests_served
+
+    @property
+    def requests_throttled(self) -> int:
+        return self.httpd.requests_throttled
+
+    def __enter__(self) -> "MockPractoServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve a local stand-in for the Practo API")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=20)
+    parser.add_argument("--records", type=int, default=200, help="Records in the paginated listings")
+    parser.add_argument("--rate-limit", type=int, default=0, help="Requests per second before answering 429")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Share of requests answered with 503")
+    parser.add_argument("--certfile", help="Serve HTTPS with this certificate")
+    parser.add_argument("--keyfile")
+    args = parser.parse_args()
+    with MockPractoServer(args.port, args.latency_ms / 1000, args.records, args.certfile, args.keyfile,
+                          args.rate_limit, args.failure_rate) as server:
+        print(f"Mock Practo API on {server.url}")
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            pass
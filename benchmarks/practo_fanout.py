@@ -0,0 +1,62 @@
+"""
+Practo fan-out pagination benchmark
+
+Collects a full search result set from a local mock Practo server, first page
+by page in sequence (one round trip after another, as callers had to before),
+then with AsyncPractoClient.iter_search at several concurrency levels. The
+shared rate budget (PRACTO_RATE_LIMIT) is set from --rate-limit, high enough
+by default not to be the bottleneck.
+
+Usage:
+    python -m benchmarks.practo_fanout --records 5000 --latency-ms 50
+"""
+
+import os
+import time
+import asyncio
+import argparse
+
+from app.api.practo import SEARCH_PAGE_LIMIT, AsyncPractoClient, close_async_http_client
+from benchmarks.mock_practo import MockPractoServer
+
+async def sequential(client: AsyncPractoClient) -> int:
+    count = offset = 0
+    while True:
+        page = await client.search(city="Bangalore", offset=offset, limit=SEARCH_PAGE_LIMIT)
+        count += len(page["doctors"])
+        if len(page["doctors"]) < SEARCH_PAGE_LIMIT:
+            return count
+        offset += SEARCH_PAGE_LIMIT
+
+async def fan_out(client: AsyncPractoClient, concurrency: int) -> int:
+    return len([record async for record in client.iter_search(city="Bangalore", concurrency=concurrency)])
+
+async def run(args):
+    client = AsyncPractoClient()
+    start = time.perf_counter()
+    count = await sequential(client)
+    print(f"  sequential          {count} records in {time.perf_counter() - start:6.2f}s")
+    for concurrency in args.concurrency:
+        start = time.perf_counter()
+        count = await fan_out(client, concurrency)
+        print(f"  fan-out x{concurrency:<9} {count} records in {time.perf_counter() - start:6.2f}s")
+    await close_async_http_client()
+
+def main(args):
+    os.environ.setdefault("PRACTO_CLIENT_ID", "benchmark")
+    os.environ.setdefault("PRACTO_API_KEY", "benchmark")
+    os.environ.setdefault("PRACTO_POOL_SIZE", str(max(args.concurrency)))
+    os.environ["PRACTO_RATE_LIMIT"] = str(args.rate_limit)
+    os.environ.setdefault("PRACTO_RATE_BURST", str(max(args.concurrency)))
+    with MockPractoServer(latency=args.latency_ms / 1000, total_records=args.records) as server:
+        os.environ["PRACTO_BASE_URL"] = server.url
+        print(f"{args.records} search results, {args.latency_ms}ms per page, rate limit {args.rate_limit}/s")
+        asyncio.run(run(args))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sequential vs concurrent pagination of Practo search")
+    parser.add_argument("--records", type=int, default=5000)
+    parser.add_argument("--latency-ms", type=float, default=50)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[4, 8, 16])
+    parser.add_argument("--rate-limit", type=float, default=1000, help="Requests per second budget")
+    main(parser.parse_args())
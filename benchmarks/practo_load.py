@@ -0,0 +1,99 @@
+"""
+Practo route load test
+
+Drives /api/practo/search at increasing concurrency against a local mock
+Practo server with a fixed response delay, through two in-process apps:
+
+    blocking   an async route calling the synchronous PractoClient (the previous routes)
+    async      the real Practo router, awaiting AsyncPractoClient
+
+The blocking route stalls the event loop for every upstream call, so its
+throughput stays flat as concurrency grows; the async route should scale
+until PRACTO_CONCURRENCY or the connection pool is reached.
+
+Usage:
+    python -m benchmarks.practo_load --latency-ms 50 --concurrency 1 8 32 64
+"""
+
+import os
+import time
+import asyncio
+import argparse
+
+import httpx
+import numpy as np
+from fastapi import FastAPI
+
+from app.api.practo import PractoClient, close_async_http_client, close_http_client
+from benchmarks.mock_practo import MockPractoServer
+
+def blocking_app() -> FastAPI:
+    app = FastAPI()
+    client = PractoClient()
+
+    @app.get("/api/practo/search")
+    async def search(city: str, speciality: str = None):
+        return client.search(city=city, speciality=speciality)
+
+    return app
+
+def async_app() -> FastAPI:
+    from app.api.practo_routes import router
+    app = FastAPI()
+    app.include_router(router)
+    return app
+
+async def run_level(app: FastAPI, concurrency: int, total: int):
+    latencies = []
+    errors = 0
+    queue = asyncio.Queue()
+    for _ in range(total):
+        queue.put_nowait(None)
+
+    async def worker(client: httpx.AsyncClient):
+        nonlocal errors
+        while not queue.empty():
+            queue.get_nowait()
+            start = time.perf_counter()
+            response = await client.get("/api/practo/search", params={"city": "Bangalore", "speciality": "Sexologist"})
+            latencies.append(time.perf_counter() - start)
+            errors += response.status_code != 200
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    latencies = np.array(latencies) * 1000
+    return total / elapsed, float(np.percentile(latencies, 50)), float(np.percentile(latencies, 99)), errors
+
+async def run(args, base_url: str):
+    os.environ["PRACTO_BASE_URL"] = base_url
+    for name, app in (("blocking", blocking_app()), ("async", async_app())):
+        print(f"  {name}")
+        for concurrency in args.concurrency:
+            total = max(args.requests, concurrency * 4)
+            qps, p50, p99, errors = await run_level(app, concurrency, total)
+            print(f"    concurrency={concurrency:<4} throughput={qps:8.1f} req/s p50={p50:8.1f}ms "
+                  f"p99={p99:8.1f}ms errors={errors}")
+    await close_async_http_client()
+    close_http_client()
+
+def main(args):
+    os.environ.setdefault("PRACTO_CLIENT_ID", "benchmark")
+    os.environ.setdefault("PRACTO_API_KEY", "benchmark")
+    # Measure the client, not the shared rate budget
+    os.environ.setdefault("PRACTO_RATE_LIMIT", "1000000")
+    os.environ.setdefault("PRACTO_RATE_BURST", "1000000")
+    os.environ.setdefault("PRACTO_POOL_SIZE", str(max(args.concurrency)))
+    os.environ.setdefault("PRACTO_CONCURRENCY", str(max(args.concurrency)))
+    with MockPractoServer(latency=args.latency_ms / 1000) as server:
+        print(f"Mock Practo at {server.url}, {args.latency_ms}ms per response, "
+              f"PRACTO_CONCURRENCY={os.environ['PRACTO_CONCURRENCY']}")
+        asyncio.run(run(args, server.url))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Concurrent /api/practo/search throughput, blocking vs async")
+    parser.add_argument("--latency-ms", type=float, default=50)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32, 64])
+    parser.add_argument("--requests", type=int, default=100, help="Requests per concurrency level (at least 4 per worker)")
+    main(parser.parse_args())
@@ -0,0 +1,74 @@
+"""
+Practo connection pooling benchmark
+
+Sends sequential requests to a local mock Practo server and compares a new
+connection per request (the previous requests.get behaviour) with
+PractoClient on the shared keep-alive pool. The difference is the TCP (and,
+with --certfile, TLS) setup saved per request; the mock's fixed latency is
+the same for both.
+
+Usage:
+    python -m benchmarks.practo_pooling --requests 500
+    openssl req -x509 -newkey rsa:2048 -nodes -subj /CN=127.0.0.1 -keyout key.pem -out cert.pem
+    python -m benchmarks.practo_pooling --certfile cert.pem --keyfile key.pem
+"""
+
+import os
+import time
+import argparse
+
+import httpx
+import numpy as np
+import requests
+
+from app.api.practo import PractoClient, close_http_client, http_client_options
+from benchmarks.mock_practo import MockPractoServer
+
+def measure(name: str, call, count: int) -> float:
+    call()
+    latencies = []
+    for _ in range(count):
+        start = time.perf_counter()
+        call()
+        latencies.append(time.perf_counter() - start)
+    latencies = np.array(latencies) * 1000
+    print(f"  {name:<22} mean={latencies.mean():7.3f}ms p50={np.percentile(latencies, 50):7.3f}ms "
+          f"p99={np.percentile(latencies, 99):7.3f}ms")
+    return float(latencies.mean())
+
+def main(args):
+    os.environ.setdefault("PRACTO_CLIENT_ID", "benchmark")
+    os.environ.setdefault("PRACTO_API_KEY", "benchmark")
+    # Measure the client, not the shared rate budget
+    os.environ.setdefault("PRACTO_RATE_LIMIT", "1000000")
+    os.environ.setdefault("PRACTO_RATE_BURST", "1000000")
+    with MockPractoServer(latency=args.latency_ms / 1000, certfile=args.certfile, keyfile=args.keyfile) as server:
+        verify = not args.certfile
+        if not verify:
+            requests.packages.urllib3.disable_warnings()
+        params = {"city": "Bangalore", "speciality": "Sexologist", "limit": 10}
+        headers = {"X-CLIENT-ID": "benchmark", "X-API-KEY": "benchmark"}
+        print(f"{args.requests} sequential /search requests against {server.url}, "
+              f"{args.latency_ms}ms server latency, http2={http_client_options()['http2']}")
+
+        def per_request():
+            requests.get(f"{server.url}/search", headers=headers, params=params, verify=verify).json()
+
+        client = PractoClient(http_client=httpx.Client(verify=verify, **http_client_options()), base_url=server.url)
+
+        def pooled():
+            client.search(**params)
+
+        fresh = measure("new connection", per_request, args.requests)
+        reused = measure("pooled PractoClient", pooled, args.requests)
+        print(f"  saved {fresh - reused:.3f}ms per request ({(fresh - reused) / fresh:.0%})")
+        client.http.close()
+    close_http_client()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Per-request latency of pooled vs fresh Practo connections")
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Mock server delay per response")
+    parser.add_argument("--certfile", help="Serve HTTPS with this certificate (measures TLS handshakes too)")
+    parser.add_argument("--keyfile")
+    main(parser.parse_args())
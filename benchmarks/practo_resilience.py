@@ -0,0 +1,83 @@
+"""
+Practo burst resilience benchmark
+
+Fires a burst of concurrent searches at a local mock Practo server that
+answers 429 (Retry-After: 1) beyond --server-rate requests per second and 503
+for a share of requests, through AsyncPractoClient in two configurations:
+
+    passthrough   no client-side budget and no retries (how errors used to reach users)
+    resilient     shared token bucket below the server's limit, retries with backoff
+
+Reports errors, latency and the client's request metrics for each.
+
+Usage:
+    python -m benchmarks.practo_resilience --burst 200 --server-rate 50 --failure-rate 0.05
+"""
+
+import os
+import time
+import asyncio
+import argparse
+
+import numpy as np
+from fastapi import HTTPException
+
+from app.api import rate_limit, resilience
+from app.api.practo import AsyncPractoClient, close_async_http_client
+from benchmarks.mock_practo import MockPractoServer
+
+async def burst(size: int):
+    client = AsyncPractoClient()
+    latencies = []
+    errors = {}
+
+    async def one(i: int):
+        start = time.perf_counter()
+        try:
+            await client.search(city="Bangalore", offset=i)
+        except HTTPException as e:
+            errors[e.status_code] = errors.get(e.status_code, 0) + 1
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(size)))
+    elapsed = time.perf_counter() - start
+    await close_async_http_client()
+    return elapsed, np.array(latencies) * 1000, errors, client.metrics.stats()
+
+def run(name: str, args, env):
+    os.environ.update(env)
+    # Fresh shared limiter, breaker and metrics for each configuration
+    rate_limit._shared_bucket = None
+    resilience._shared.clear()
+    with MockPractoServer(latency=args.latency_ms / 1000, rate_limit=args.server_rate,
+                          failure_rate=args.failure_rate) as server:
+        os.environ["PRACTO_BASE_URL"] = server.url
+        elapsed, latencies, errors, metrics = asyncio.run(burst(args.burst))
+        print(f"  {name:<12} ok={args.burst - sum(errors.values())}/{args.burst} errors={errors or 0} "
+              f"elapsed={elapsed:5.2f}s p50={np.percentile(latencies, 50):7.1f}ms "
+              f"p99={np.percentile(latencies, 99):7.1f}ms server 429s={server.requests_throttled}")
+        print(f"  {'':<12} retries={metrics['retries']} throttled={metrics['throttled']} "
+              f"limiter waits={metrics['limiter_waits']} avg wait={metrics['limiter_avg_wait_ms']}ms "
+              f"max wait={metrics['limiter_max_wait_ms']}ms")
+
+def main(args):
+    os.environ.setdefault("PRACTO_CLIENT_ID", "benchmark")
+    os.environ.setdefault("PRACTO_API_KEY", "benchmark")
+    os.environ.setdefault("PRACTO_POOL_SIZE", "64")
+    print(f"Burst of {args.burst} searches; server allows {args.server_rate}/s, "
+          f"fails {args.failure_rate:.0%} with 503, {args.latency_ms}ms per response")
+    run("passthrough", args, {"PRACTO_RATE_LIMIT": "1000000", "PRACTO_RATE_BURST": "1000000",
+                              "PRACTO_MAX_RETRIES": "0", "PRACTO_BREAKER_THRESHOLD": "1000000"})
+    run("resilient", args, {"PRACTO_RATE_LIMIT": str(args.server_rate * 0.9),
+                            "PRACTO_RATE_BURST": str(max(1, args.server_rate // 2)),
+                            "PRACTO_MAX_RETRIES": "3", "PRACTO_BREAKER_THRESHOLD": "5"})
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Errors and latency of a burst of Practo calls, with and without "
+                                                 "client-side rate limiting and retries")
+    parser.add_argument("--burst", type=int, default=200)
+    parser.add_argument("--server-rate", type=int, default=50, help="Requests per second the mock answers")
+    parser.add_argument("--failure-rate", type=float, default=0.05, help="Share of requests failing with 503")
+    parser.add_argument("--latency-ms", type=float, default=20)
+    main(parser.parse_args())
@@ -0,0 +1,80 @@
+"""
+Query micro-batching benchmark
+
+Measures wellness query throughput at several client concurrencies, with
+each request searched on its own versus coalesced by QueryBatcher.
+
+The "model" backend runs the real SexualWellnessVectorDB (sentence-transformers
++ FAISS) in a temporary directory with the query cache disabled. The "stub"
+backend replaces it with a fixed per-call overhead plus a per-query cost,
+which needs no model download.
+
+Usage:
+    python -m benchmarks.query_batching --concurrency 1 8 64 256
+    python -m benchmarks.query_batching --backend stub
+"""
+
+import time
+import asyncio
+import argparse
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+from app.query_batcher import QueryBatcher
+
+class StubSearch:
+    """Batched search cost model: fixed overhead per call plus a small cost per query"""
+    def __init__(self, call_overhead: float = 0.004, per_query: float = 0.0002):
+        self.call_overhead = call_overhead
+        self.per_query = per_query
+
+    def search_batch(self, queries, k=2):
+        time.sleep(self.call_overhead + self.per_query * len(queries))
+        return [[] for _ in queries]
+
+def load_backend(name: str):
+    if name == "stub":
+        return StubSearch()
+    from app.vector_db import SexualWellnessVectorDB
+    return SexualWellnessVectorDB(db_path=tempfile.mkdtemp(prefix="wellness-bench-"), query_cache_size=0)
+
+async def run(concurrency: int, total: int, search_one, label: str):
+    counter = iter(range(total))
+
+    async def client():
+        for n in counter:
+            await search_one(f"How can I improve my sexual health? variant {n}")
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<10} {total / elapsed:9.1f} queries/s")
+
+async def main(args):
+    backend = load_backend(args.backend)
+    single_pool = ThreadPoolExecutor(max_workers=2)
+
+    async def unbatched(query):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(single_pool, backend.search_batch, [query], 2)
+
+    for concurrency in args.concurrency:
+        total = max(args.requests, concurrency * 4)
+        batcher = QueryBatcher(lambda queries: backend.search_batch(queries, k=2),
+                               max_batch_size=args.max_batch_size, max_wait_ms=args.window_ms)
+        print(f"{concurrency} concurrent clients, {total} queries")
+        await run(concurrency, total, unbatched, "unbatched")
+        await run(concurrency, total, batcher.submit, "batched")
+        print(f"  avg batch size {batcher.stats()['avg_batch_size']}")
+        batcher.shutdown()
+
+    single_pool.shutdown()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Throughput of batched vs unbatched wellness queries")
+    parser.add_argument("--backend", choices=("model", "stub"), default="model")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 64, 256])
+    parser.add_argument("--requests", type=int, default=512)
+    parser.add_argument("--max-batch-size", type=int, default=64)
+    parser.add_argument("--window-ms", type=float, default=5)
+    asyncio.run(main(parser.parse_args()))
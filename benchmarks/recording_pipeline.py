@@ -0,0 +1,116 @@
+"""
+Call recording pipeline benchmark
+
+Serves --recordings recordings from a local mock Exotel server (synthesized
+tones, or the WAV files in --fixtures) and transcribes them with a fake Sarvam
+client whose speech-to-text time grows with the audio length, first one
+recording after another (whole download buffered in memory, one request per
+recording), then through RecordingPipeline at several concurrency levels.
+
+Reports throughput (recordings and audio minutes per minute) and peak Python
+memory of each run. Transcripts are collected in memory unless --index-db is
+given, which indexes them into a vector database at that path.
+
+Usage:
+    python -m benchmarks.recording_pipeline --recordings 20 --recording-seconds 120 --concurrency 1 4
+    python -m benchmarks.recording_pipeline --fixtures tests/audio --concurrency 4
+"""
+
+import io
+import os
+import time
+import wave
+import asyncio
+import argparse
+import tempfile
+import tracemalloc
+from urllib.parse import urlsplit
+
+import httpx
+import requests
+
+from app.fake_sarvam import FakeSarvamAI
+from app.recordings import RecordingPipeline, transcript_indexer
+from app.sarvam_async import AsyncSarvamClient
+from benchmarks.mock_exotel import MockExotelServer
+
+class TimedSarvamAI(FakeSarvamAI):
+    """Fake Sarvam client taking a base latency plus a share of the audio's length to transcribe"""
+    def __init__(self, base_latency: float, realtime_factor: float):
+        super().__init__(stt_latency=base_latency)
+        self.realtime_factor = realtime_factor
+
+    def _transcribe(self, file=None, **kwargs):
+        content = file[1] if isinstance(file, tuple) else file.read()
+        with wave.open(io.BytesIO(content), "rb") as audio:
+            seconds = audio.getnframes() / audio.getframerate()
+        time.sleep(self.stt_latency + self.realtime_factor * seconds)
+        return {"transcript": f"{seconds:.0f} seconds of conversation about sexual wellness"}
+
+def sequential(sarvam: TimedSarvamAI, urls, directory: str) -> float:
+    """The straightforward way: buffer each download, write it, transcribe it whole"""
+    audio_seconds = 0.0
+    for i, url in enumerate(urls):
+        content = requests.get(url).content
+        path = os.path.join(directory, f"sequential-{i}.wav")
+        with open(path, "wb") as f:
+            f.write(content)
+        with open(path, "rb") as f:
+            sarvam.speech_to_text.transcribe(file=f)
+        with wave.open(path, "rb") as audio:
+            audio_seconds += audio.getnframes() / audio.getframerate()
+    return audio_seconds
+
+async def pipelined(sarvam: AsyncSarvamClient, urls, directory: str, concurrency: int, index) -> dict:
+    async with httpx.AsyncClient() as http:
+        pipeline = RecordingPipeline(sarvam, http, index=index, directory=directory, concurrency=concurrency,
+                                     hosts={urlsplit(urls[0]).hostname})
+        async for result in pipeline.run((f"call{i}", url) for i, url in enumerate(urls)):
+            if "error" in result:
+                print(f"    {result['call_sid']} failed: {result['error']}")
+        return pipeline.stats()
+
+def measure(run):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = run()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, elapsed, peak / 1e6
+
+def main(args):
+    fake = TimedSarvamAI(args.stt_base_ms / 1000, args.realtime_factor)
+    with MockExotelServer(recording_seconds=args.recording_seconds, recordings_dir=args.fixtures) as server, \
+            tempfile.TemporaryDirectory() as tmp:
+        urls = [f"{server.url}/recordings/call{i}.wav" for i in range(args.recordings)]
+        print(f"{args.recordings} recordings ({args.fixtures or f'{args.recording_seconds:.0f}s tones'}), "
+              f"STT {args.stt_base_ms:.0f}ms + {args.realtime_factor}x audio length per request")
+
+        audio_seconds, elapsed, peak = measure(lambda: sequential(fake, urls, tmp))
+        print(f"  sequential     {elapsed:6.2f}s  {60 * args.recordings / elapsed:7.1f} recordings/min  "
+              f"{audio_seconds / elapsed:6.1f} audio min/min  peak memory {peak:6.1f}MB")
+
+        documents = []
+        index = transcript_indexer(args.index_db) if args.index_db else documents.extend
+        for concurrency in args.concurrency:
+            sarvam = AsyncSarvamClient(fake, stt_concurrency=args.stt_concurrency)
+            directory = os.path.join(tmp, f"pipeline-{concurrency}")
+            stats, elapsed, peak = measure(lambda: asyncio.run(pipelined(sarvam, urls, directory, concurrency, index)))
+            sarvam.shutdown()
+            print(f"  pipeline x{concurrency:<3} {elapsed:6.2f}s  {60 * stats['recordings'] / elapsed:7.1f} "
+                  f"recordings/min  {stats['audio_minutes'] * 60 / elapsed:6.1f} audio min/min  "
+                  f"peak memory {peak:6.1f}MB  segments={stats['segments_indexed']} failures={stats['failures']}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Throughput of downloading and transcribing call recordings")
+    parser.add_argument("--recordings", type=int, default=20)
+    parser.add_argument("--recording-seconds", type=float, default=120)
+    parser.add_argument("--fixtures", help="Directory of WAV files served as recordings")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4])
+    parser.add_argument("--stt-concurrency", type=int, default=8, help="Speech-to-text requests at once")
+    parser.add_argument("--stt-base-ms", type=float, default=200, help="Speech-to-text latency per request")
+    parser.add_argument("--realtime-factor", type=float, default=0.02,
+                        help="Speech-to-text seconds per second of audio")
+    parser.add_argument("--index-db", help="Index transcripts into a vector database at this path")
+    main(parser.parse_args())
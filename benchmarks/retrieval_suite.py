@@ -0,0 +1,192 @@
+"""
+Retrieval benchmark and regression suite for the wellness agent
+
+For each corpus size, builds a SexualWellnessVectorDB from a synthetic corpus
+(benchmarks.synthetic) in a temporary directory and runs labeled paraphrase
+queries against it, reporting:
+
+    encode latency      p50/p95/p99 of embedding one query
+    search latency      p50/p95/p99 of search() with the query embedding cached
+    agent latency       p50/p95/p99 of SexualWellnessAgent.process_query (caches cleared)
+    QPS                 search_batch throughput over all queries in batches
+    recall@k, MRR       of the expected document among the top k
+    memory              build time, RSS growth of the build, and peak RSS
+
+Results are written as JSON. With --baseline, the run is compared against an
+earlier result file and the suite exits non-zero on a regression beyond the
+thresholds.
+
+Usage:
+    python -m benchmarks.retrieval_suite --sizes 1000 10000 --output results.json
+    python -m benchmarks.retrieval_suite --sizes 10000 --baseline results.json --output new.json
+"""
+
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+from typing import Any, Dict, List
+
+import numpy as np
+
+from app.vector_db import INDEX_TYPES, SexualWellnessVectorDB
+from app.embeddings import EMBEDDING_BACKENDS
+from app.sexual_wellness_agent import SexualWellnessAgent, SexualWellnessQuery
+from benchmarks.embedding_backends import peak_rss_mb
+from benchmarks.synthetic import generate
+
+# Metric name -> whether higher is better
+METRICS = {
+    "encode_p50_ms": False, "encode_p95_ms": False, "encode_p99_ms": False,
+    "search_p50_ms": False, "search_p95_ms": False, "search_p99_ms": False,
+    "agent_p50_ms": False, "agent_p95_ms": False, "agent_p99_ms": False,
+    "qps": True,
+    "recall_at_k": True, "mrr": True,
+    "build_s": False, "build_rss_mb": False, "peak_rss_mb": False,
+}
+QUALITY_METRICS = ("recall_at_k", "mrr")
+MEMORY_METRICS = ("build_rss_mb", "peak_rss_mb")
+
+def percentiles(prefix: str, latencies: List[float]) -> Dict[str, float]:
+    latencies = np.array(latencies) * 1000
+    return {f"{prefix}_p{p}_ms": round(float(np.percentile(latencies, p)), 3) for p in (50, 95, 99)}
+
+def run_size(size: int, args) -> Dict[str, Any]:
+    documents, labeled = generate(size, args.queries, seed=args.seed)
+    queries = [item["query"] for item in labeled]
+
+    rss_before = peak_rss_mb()
+    start = time.perf_counter()
+    vector_db = SexualWellnessVectorDB(db_path=tempfile.mkdtemp(prefix="retrieval-suite-"),
+                                       index_type=args.index_type, embedding_backend=args.embedding_backend,
+                                       hybrid=args.hybrid, query_cache_size=len(queries) + 16,
+                                       snapshot_interval=size)
+    vector_db.add_documents_stream(documents, batch_size=args.batch_size)
+    build = time.perf_counter() - start
+    results: Dict[str, Any] = {"documents": vector_db.count, "queries": len(queries),
+                               "build_s": round(build, 2), "build_rss_mb": round(peak_rss_mb() - rss_before, 1)}
+
+    # Encode latency, straight through the model
+    vector_db.model.encode(queries[:2])
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        vector_db.model.encode([query])
+        latencies.append(time.perf_counter() - start)
+    results.update(percentiles("encode", latencies))
+
+    # Search latency with the query embeddings already cached, plus relevance
+    vector_db.encode_queries(queries)
+    latencies = []
+    hits = reciprocal_ranks = 0.0
+    for item in labeled:
+        start = time.perf_counter()
+        found = vector_db.search(item["query"], k=args.k)
+        latencies.append(time.perf_counter() - start)
+        questions = [doc["question"] for doc in found]
+        if item["question"] in questions:
+            hits += 1
+            reciprocal_ranks += 1.0 / (questions.index(item["question"]) + 1)
+    results.update(percentiles("search", latencies))
+    results["recall_at_k"] = round(hits / len(labeled), 4)
+    results["mrr"] = round(reciprocal_ranks / len(labeled), 4)
+
+    # Batched throughput, end to end including encoding
+    vector_db.query_cache.clear()
+    start = time.perf_counter()
+    for i in range(0, len(queries), args.qps_batch_size):
+        vector_db.search_batch(queries[i:i + args.qps_batch_size], k=args.k)
+    results["qps"] = round(len(queries) / (time.perf_counter() - start), 1)
+
+    # Agent latency, with every cache cleared so each query does the full work
+    agent = SexualWellnessAgent(vector_db=vector_db)
+    agent.response_cache.max_size = 0
+    vector_db.query_cache.clear()
+    vector_db.query_cache.max_size = 0
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        agent.process_query(SexualWellnessQuery(query=query))
+        latencies.append(time.perf_counter() - start)
+    results.update(percentiles("agent", latencies))
+
+    results["peak_rss_mb"] = round(peak_rss_mb(), 1)
+    return results
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], args) -> List[str]:
+    """Return a description of every metric that regressed beyond its threshold"""
+    regressions = []
+    for size, metrics in current["runs"].items():
+        previous = baseline.get("runs", {}).get(size)
+        if previous is None:
+            continue
+        for name, higher_is_better in METRICS.items():
+            if name not in metrics or name not in previous:
+                continue
+            new, old = metrics[name], previous[name]
+            if name in QUALITY_METRICS:
+                regressed = old - new > args.max_quality_drop
+            else:
+                tolerance = args.max_memory_regression if name in MEMORY_METRICS else args.max_latency_regression
+                change = (new - old) / old if old else 0.0
+                regressed = -change > tolerance if higher_is_better else change > tolerance
+            if regressed:
+                regressions.append(f"size {size}: {name} {old} -> {new}")
+    return regressions
+
+def main(args):
+    report = {
+        "config": {
+            "index_type": args.index_type, "embedding_backend": args.embedding_backend, "hybrid": args.hybrid,
+            "k": args.k, "queries": args.queries, "seed": args.seed,
+            "python": platform.python_version(), "machine": platform.machine(),
+        },
+        "runs": {}
+    }
+    for size in args.sizes:
+        results = run_size(size, args)
+        report["runs"][str(size)] = results
+        print(f"size {size}: encode p50={results['encode_p50_ms']}ms search p50={results['search_p50_ms']}ms "
+              f"p99={results['search_p99_ms']}ms agent p50={results['agent_p50_ms']}ms qps={results['qps']} "
+              f"recall@{args.k}={results['recall_at_k']} mrr={results['mrr']} build={results['build_s']}s "
+              f"rss +{results['build_rss_mb']}MB peak={results['peak_rss_mb']}MB")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Wrote {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("config", {}).get("seed") != args.seed:
+            print("Warning: baseline was generated with a different seed")
+        regressions = compare(report, baseline, args)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+        print("No regressions against the baseline")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Latency, relevance and memory suite for wellness retrieval")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--queries", type=int, default=300, help="Labeled queries per corpus")
+    parser.add_argument("--k", type=int, default=2)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--index-type", choices=INDEX_TYPES, default="flat")
+    parser.add_argument("--embedding-backend", choices=EMBEDDING_BACKENDS, default="sentence-transformers")
+    parser.add_argument("--hybrid", action=argparse.BooleanOptionalAction, default=True)
+    parser.add_argument("--batch-size", type=int, default=256, help="Encoder batch size while building")
+    parser.add_argument("--qps-batch-size", type=int, default=32)
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    parser.add_argument("--baseline", help="Fail on regressions against this earlier results file")
+    parser.add_argument("--max-latency-regression", type=float, default=0.25,
+                        help="Allowed relative increase of latency metrics (and decrease of QPS)")
+    parser.add_argument("--max-memory-regression", type=float, default=0.15,
+                        help="Allowed relative increase of memory metrics")
+    parser.add_argument("--max-quality-drop", type=float, default=0.01,
+                        help="Allowed absolute drop of recall@k and MRR")
+    main(parser.parse_args())
@@ -0,0 +1,91 @@
+"""
+Sarvam concurrency benchmark
+
+Simulates concurrent /api/chat users while one request is stuck on a slow
+upstream call, and compares p50/p99 latency of calling the synchronous
+client directly from an async handler against AsyncSarvamClient.
+
+Usage:
+    python -m benchmarks.sarvam_concurrency --users 50 --requests 10
+"""
+
+import time
+import asyncio
+import argparse
+import statistics
+from types import SimpleNamespace
+
+from app.sarvam_async import AsyncSarvamClient
+
+class SlowStubSarvam:
+    """Synchronous Sarvam stand-in with a fixed latency and one stuck call"""
+    def __init__(self, latency: float, stuck_latency: float):
+        self.latency = latency
+        self.stuck_latency = stuck_latency
+        self.chat = SimpleNamespace(completions=self._completions)
+        self.speech_to_text = SimpleNamespace(transcribe=self._completions)
+        self.text_to_speech = SimpleNamespace(convert=self._completions)
+
+    def _completions(self, **kwargs):
+        time.sleep(self.stuck_latency if kwargs.get("stuck") else self.latency)
+        return {"choices": [{"message": {"content": "ok"}}]}
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+async def run_users(call, users: int, requests_per_user: int, issued_at: float):
+    latencies = []
+
+    async def user():
+        # The first request of every user is issued at the same moment as the stuck
+        # call, so time spent waiting on a blocked event loop is counted
+        start = issued_at
+        for _ in range(requests_per_user):
+            await call(messages=[{"role": "user", "content": "hi"}])
+            latencies.append(time.perf_counter() - start)
+            start = time.perf_counter()
+
+    await asyncio.gather(*(user() for _ in range(users)))
+    return latencies
+
+async def scenario(name: str, call, stuck_call, users: int, requests_per_user: int):
+    issued_at = time.perf_counter()
+    stuck = asyncio.ensure_future(stuck_call(messages=[], stuck=True))
+    latencies = await run_users(call, users, requests_per_user, issued_at)
+    elapsed = time.perf_counter() - issued_at
+    await stuck
+    print(f"{name:<22} p50={statistics.median(latencies) * 1000:8.1f}ms "
+          f"p99={percentile(latencies, 99) * 1000:8.1f}ms "
+          f"throughput={len(latencies) / elapsed:8.1f} req/s")
+
+async def main(args):
+    stub = SlowStubSarvam(args.latency, args.stuck_latency)
+
+    async def blocking_call(**kwargs):
+        return stub.chat.completions(**kwargs)
+
+    print(f"{args.users} users x {args.requests} requests, upstream latency "
+          f"{args.latency * 1000:.0f}ms, one call stuck for {args.stuck_latency:.1f}s")
+
+    pooled = AsyncSarvamClient(stub, chat_concurrency=args.workers)
+    await scenario("baseline (no stuck)", pooled.chat_completions,
+                   lambda **kwargs: asyncio.sleep(0), args.users, args.requests)
+    await scenario("async worker pool", pooled.chat_completions, pooled.chat_completions,
+                   args.users, args.requests)
+    pooled.shutdown()
+
+    if not args.skip_blocking:
+        await scenario("blocking in handler", blocking_call, blocking_call, args.users, args.requests)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark Sarvam calls under a stuck upstream")
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=10)
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--stuck-latency", type=float, default=3.0)
+    parser.add_argument("--skip-blocking", action="store_true",
+                        help="Skip the blocking scenario, which serializes every request")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,104 @@
+"""
+Shared index memory benchmark
+
+Publishes a synthetic corpus of random vectors, then starts several worker
+processes that each open it and run searches, either memory-mapped (as the
+app does) or read onto the heap with every document decoded (as before the
+versioned layout). Reports load time plus RSS and PSS per worker while all
+workers are alive; PSS splits shared pages between the processes mapping them,
+so it shows what each worker really costs. Linux only (reads /proc).
+
+Usage:
+    python -m benchmarks.shared_index --docs 100000 --workers 4
+"""
+
+import os
+import time
+import argparse
+import tempfile
+import multiprocessing
+
+import numpy as np
+import faiss
+
+from app.vector_db import create_index
+from app.vector_storage import AppendOnlyStorage, DocumentStore
+
+def memory_mb():
+    """Return (RSS, PSS) of this process in MB"""
+    values = {}
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if parts[0] in ("Rss:", "Pss:"):
+                values[parts[0]] = int(parts[1]) / 1024
+    return values["Rss:"], values["Pss:"]
+
+def build(db_path: str, docs: int, dimension: int, index_type: str):
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((docs, dimension), dtype="float32")
+    faiss.normalize_L2(vectors)
+    documents = [{"id": i, "question": f"Synthetic question {i} about sexual wellness?",
+                  "answer": f"Synthetic answer {i}. " + "Talk to a qualified doctor. " * 8} for i in range(docs)]
+    storage = AppendOnlyStorage(db_path, dimension)
+    with storage.write_lock():
+        storage.publish(create_index(index_type, dimension, vectors), None, documents, 0)
+
+def worker(db_path: str, dimension: int, mode: str, queries: int, barrier, results):
+    start = time.perf_counter()
+    storage = AppendOnlyStorage(db_path, dimension)
+    if mode == "mmap":
+        index, store, _ = storage.open_version(storage.current_version())
+        get_document = store.get
+    else:
+        version = storage.current_version()
+        index = storage.read_index(version)
+        documents = [dict(doc) for doc in DocumentStore(os.path.join(storage.versions_path, version))]
+        get_document = documents.__getitem__
+    load = time.perf_counter() - start
+
+    rng = np.random.default_rng(os.getpid())
+    query_vectors = rng.standard_normal((queries, dimension), dtype="float32")
+    faiss.normalize_L2(query_vectors)
+    _, indices = index.search(query_vectors, 3)
+    for idx in indices.ravel():
+        get_document(int(idx))["answer"]
+
+    # Measure only once every worker has loaded, so shared pages are split between them
+    barrier.wait()
+    rss, pss = memory_mb()
+    results.put((load, rss, pss))
+    barrier.wait()
+
+def run(db_path: str, dimension: int, mode: str, workers: int, queries: int):
+    context = multiprocessing.get_context("spawn")
+    barrier = context.Barrier(workers)
+    results = context.Queue()
+    processes = [context.Process(target=worker, args=(db_path, dimension, mode, queries, barrier, results))
+                 for _ in range(workers)]
+    for process in processes:
+        process.start()
+    samples = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    load, rss, pss = (np.mean(column) for column in zip(*samples))
+    print(f"  {mode:<5} load={load * 1000:8.1f}ms  RSS/worker={rss:8.1f}MB  PSS/worker={pss:8.1f}MB  "
+          f"PSS total={pss * workers:8.1f}MB")
+
+def main(args):
+    db_path = tempfile.mkdtemp(prefix="shared-index-bench-")
+    start = time.perf_counter()
+    build(db_path, args.docs, args.dimension, args.index_type)
+    print(f"Published {args.docs} documents ({args.index_type}) in {time.perf_counter() - start:.1f}s; "
+          f"{args.workers} workers")
+    for mode in ("heap", "mmap"):
+        run(db_path, args.dimension, mode, args.workers, args.queries)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Per-worker memory of memory-mapped vs heap-loaded indexes")
+    parser.add_argument("--docs", type=int, default=100000)
+    parser.add_argument("--dimension", type=int, default=384)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--index-type", choices=("flat", "hnsw"), default="flat")
+    main(parser.parse_args())
@@ -0,0 +1,85 @@
+"""
+Startup time benchmark
+
+Measures how long `import main` takes, how long a fresh uvicorn process takes
+to answer /health, and how long the background warm-up takes until
+/api/sexual-wellness/ready reports the model and index as loaded. The app is
+started with SARVAM_FAKE=1, so no Sarvam key is needed.
+
+Usage:
+    python -m benchmarks.startup_time --port 8765
+    python -m benchmarks.startup_time --import-profile 15
+"""
+
+import os
+import sys
+import time
+import argparse
+import subprocess
+import urllib.error
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def app_env():
+    env = dict(os.environ)
+    env.setdefault("SARVAM_FAKE", "1")
+    return env
+
+def measure_import() -> float:
+    code = "import time; t = time.perf_counter(); import main; print(time.perf_counter() - t)"
+    output = subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=app_env(),
+                            capture_output=True, text=True, check=True)
+    return float(output.stdout.strip().splitlines()[-1])
+
+def import_profile(top: int):
+    """Print the slowest modules (cumulative) from python -X importtime"""
+    output = subprocess.run([sys.executable, "-X", "importtime", "-c", "import main"], cwd=ROOT,
+                            env=app_env(), capture_output=True, text=True)
+    rows = []
+    for line in output.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = [part.strip() for part in line[len("import time:"):].split("|")]
+        rows.append((int(cumulative_us), int(self_us), name))
+    for cumulative_us, self_us, name in sorted(rows, reverse=True)[:top]:
+        print(f"  {cumulative_us / 1000:9.1f}ms cumulative {self_us / 1000:8.1f}ms self  {name}")
+
+def wait_for(url: str, deadline: float) -> float:
+    while time.perf_counter() < deadline:
+        try:
+            with urllib.request.urlopen(url, timeout=1) as response:
+                if response.status == 200:
+                    return time.perf_counter()
+        except (urllib.error.URLError, ConnectionError, OSError):
+            pass
+        time.sleep(0.02)
+    raise TimeoutError(f"{url} did not become ready")
+
+def measure_server(port: int, timeout: float):
+    start = time.perf_counter()
+    server = subprocess.Popen([sys.executable, "-m", "uvicorn", "main:app", "--port", str(port)],
+                              cwd=ROOT, env=app_env(), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        health = wait_for(f"http://127.0.0.1:{port}/health", start + timeout) - start
+        ready = wait_for(f"http://127.0.0.1:{port}/api/sexual-wellness/ready", start + timeout) - start
+    finally:
+        server.terminate()
+        server.wait()
+    return health, ready
+
+def main(args):
+    print(f"import main:          {measure_import() * 1000:8.0f}ms")
+    if args.import_profile:
+        import_profile(args.import_profile)
+    health, ready = measure_server(args.port, args.timeout)
+    print(f"/health answering:    {health * 1000:8.0f}ms after process start")
+    print(f"wellness agent ready: {ready * 1000:8.0f}ms after process start")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure import time and time-to-/health")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--timeout", type=float, default=300)
+    parser.add_argument("--import-profile", type=int, default=0, metavar="N",
+                        help="Also print the N slowest imports")
+    main(parser.parse_args())
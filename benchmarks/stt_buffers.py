@@ -0,0 +1,151 @@
+"""
+Speech-to-text buffering benchmark
+
+Runs concurrent speech-to-text requests through AsyncSarvamClient and a fake
+Sarvam client, for the two ways audio reaches the app:
+
+    upload      /api/speech-to-text: a spooled multipart upload
+    websocket   the "speech" message: base64 audio decoded to bytes
+
+each handled two ways:
+
+    temp-file   copy the audio to a NamedTemporaryFile, reopen it for the call,
+                unlink it afterwards (the previous handlers)
+    in-memory   pass the upload's buffer or the decoded bytes straight to the call
+
+A share of the calls fail (--failure-rate), as upstream errors do. Reports
+latency, bytes written through write() (/proc/self/io wchar, Linux only) and
+temporary files left behind.
+
+Usage:
+    python -m benchmarks.stt_buffers --requests 400 --concurrency 32 --audio-seconds 10
+"""
+
+import os
+import time
+import base64
+import random
+import shutil
+import asyncio
+import argparse
+import tempfile
+
+import numpy as np
+
+from app.fake_sarvam import FakeSarvamAI
+from app.sarvam_async import AsyncSarvamClient, audio_file
+from benchmarks.mock_exotel import tone_wav
+
+class FlakySarvamAI(FakeSarvamAI):
+    """Fake Sarvam client failing a share of transcriptions"""
+    def __init__(self, stt_latency: float, failure_rate: float):
+        super().__init__(stt_latency=stt_latency)
+        self.failure_rate = failure_rate
+
+    def _transcribe(self, file=None, **kwargs):
+        response = super()._transcribe(file=file, **kwargs)
+        if random.random() < self.failure_rate:
+            raise RuntimeError("Sarvam speech-to-text failed")
+        return response
+
+def bytes_written() -> int:
+    try:
+        with open("/proc/self/io") as f:
+            return next(int(line.split()[1]) for line in f if line.startswith("wchar:"))
+    except (OSError, StopIteration):
+        return 0
+
+def spooled_upload(audio: bytes) -> tempfile.SpooledTemporaryFile:
+    """An upload as the server hands it over: spooled to memory, or to disk past 1MB"""
+    upload = tempfile.SpooledTemporaryFile(max_size=1024 * 1024)
+    upload.write(audio)
+    upload.seek(0)
+    return upload
+
+async def upload_temp_file(sarvam: AsyncSarvamClient, audio: bytes):
+    upload = spooled_upload(audio)
+    with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as temp_file:
+        shutil.copyfileobj(upload, temp_file)
+        temp_file_path = temp_file.name
+    with open(temp_file_path, "rb") as audio_file_handle:
+        response = await sarvam.transcribe(file=audio_file_handle, model="saarika:v2.5", language_code="en-IN")
+    os.unlink(temp_file_path)
+    return response
+
+async def upload_in_memory(sarvam: AsyncSarvamClient, audio: bytes):
+    upload = spooled_upload(audio)
+    try:
+        return await sarvam.transcribe(file=audio_file(upload), model="saarika:v2.5", language_code="en-IN")
+    finally:
+        upload.close()
+
+async def websocket_temp_file(sarvam: AsyncSarvamClient, audio_base64: str):
+    audio_bytes = base64.b64decode(audio_base64)
+    with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as temp_file:
+        temp_file.write(audio_bytes)
+        temp_file_path = temp_file.name
+    with open(temp_file_path, "rb") as audio_file_handle:
+        response = await sarvam.transcribe(file=audio_file_handle, model="saarika:v2.5", language_code="en-IN")
+    os.unlink(temp_file_path)
+    return response
+
+async def websocket_in_memory(sarvam: AsyncSarvamClient, audio_base64: str):
+    audio_bytes = base64.b64decode(audio_base64)
+    return await sarvam.transcribe(file=audio_file(audio_bytes, "speech.wav"), model="saarika:v2.5",
+                                   language_code="en-IN")
+
+async def run(handler, payload, sarvam: AsyncSarvamClient, total: int, concurrency: int):
+    latencies = []
+    failures = 0
+    slots = asyncio.Semaphore(concurrency)
+
+    async def one():
+        nonlocal failures
+        async with slots:
+            start = time.perf_counter()
+            try:
+                await handler(sarvam, payload)
+            except RuntimeError:
+                failures += 1
+            latencies.append(time.perf_counter() - start)
+
+    await asyncio.gather(*(one() for _ in range(total)))
+    return np.array(latencies) * 1000, failures
+
+def main(args):
+    audio = tone_wav(args.audio_seconds, sample_rate=16000)
+    audio_base64 = base64.b64encode(audio).decode("utf-8")
+    print(f"{args.requests} requests, {args.concurrency} at once, {len(audio) / 1e6:.2f}MB of audio each, "
+          f"STT {args.stt_latency_ms:.0f}ms, {args.failure_rate:.0%} failing")
+    scenarios = [
+        ("upload", "temp-file", upload_temp_file, audio),
+        ("upload", "in-memory", upload_in_memory, audio),
+        ("websocket", "temp-file", websocket_temp_file, audio_base64),
+        ("websocket", "in-memory", websocket_in_memory, audio_base64),
+    ]
+    for source, mode, handler, payload in scenarios:
+        sarvam = AsyncSarvamClient(FlakySarvamAI(args.stt_latency_ms / 1000, args.failure_rate),
+                                   stt_concurrency=args.concurrency)
+        with tempfile.TemporaryDirectory() as tmp:
+            # Temporary files go to a private directory, so the ones left behind can be counted
+            tempfile.tempdir = tmp
+            written = bytes_written()
+            start = time.perf_counter()
+            latencies, failures = asyncio.run(run(handler, payload, sarvam, args.requests, args.concurrency))
+            elapsed = time.perf_counter() - start
+            written = bytes_written() - written
+            leaked = len(os.listdir(tmp))
+            tempfile.tempdir = None
+        sarvam.shutdown()
+        print(f"  {source:<9} {mode:<9} p50={np.percentile(latencies, 50):7.1f}ms "
+              f"p99={np.percentile(latencies, 99):7.1f}ms throughput={args.requests / elapsed:6.1f} req/s "
+              f"written={written / 1e6:7.1f}MB failed={failures} temp files left={leaked}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Latency and disk writes of temp-file vs in-memory speech-to-text")
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--audio-seconds", type=float, default=10)
+    parser.add_argument("--stt-latency-ms", type=float, default=50)
+    parser.add_argument("--failure-rate", type=float, default=0.05, help="Share of transcriptions that fail")
+    main(parser.parse_args())
@@ -0,0 +1,90 @@
+"""
+Synthetic sexual wellness corpora with labeled paraphrase queries
+
+Every document question fills a question template with a topic, a group and
+a setting, so up to len(TEMPLATES) * len(TOPICS) * len(GROUPS) * len(SETTINGS)
+distinct documents can be generated. Labeled queries rephrase a document's
+question with the paired paraphrase template, so the expected answer is known.
+"""
+
+import random
+from typing import Dict, List, Tuple
+
+# (question template, paraphrase template) pairs
+TEMPLATES = [
+    ("What are the symptoms of {topic} in {group} {setting}?", "signs of {topic} for {group} {setting}"),
+    ("How is {topic} treated in {group} {setting}?", "treatment options for {topic}, {group} {setting}"),
+    ("How can {group} prevent {topic} {setting}?", "ways {group} can avoid {topic} {setting}"),
+    ("Is {topic} common among {group} {setting}?", "how often do {group} get {topic} {setting}"),
+    ("When should {group} see a doctor about {topic} {setting}?", "{group} {setting}: when to consult a doctor for {topic}"),
+    ("What causes {topic} in {group} {setting}?", "reasons {group} develop {topic} {setting}"),
+    ("How does {topic} affect relationships for {group} {setting}?", "impact of {topic} on the relationships of {group} {setting}"),
+    ("What tests diagnose {topic} in {group} {setting}?", "diagnosis of {topic} among {group} {setting}"),
+    ("Can {topic} come back in {group} {setting}?", "does {topic} recur for {group} {setting}"),
+    ("What lifestyle changes help {group} with {topic} {setting}?", "habits that help {group} manage {topic} {setting}"),
+    ("How should {group} talk to a partner about {topic} {setting}?", "discussing {topic} with a partner, {group} {setting}"),
+    ("Are home remedies safe for {topic} in {group} {setting}?", "{group} {setting}: is it safe to treat {topic} at home"),
+]
+
+TOPICS = [
+    "chlamydia", "gonorrhea", "syphilis", "genital herpes", "HPV", "HIV", "hepatitis B", "trichomoniasis",
+    "bacterial vaginosis", "yeast infections", "urinary tract infections", "erectile dysfunction",
+    "premature ejaculation", "low libido", "vaginal dryness", "painful intercourse", "infertility",
+    "irregular periods", "endometriosis", "PCOS", "menopause symptoms", "low testosterone",
+    "performance anxiety", "body image concerns", "condom allergies", "contraceptive side effects",
+    "emergency contraception", "unplanned pregnancy", "miscarriage grief", "postpartum intimacy",
+    "prostatitis", "testicular pain", "vaginismus", "pelvic inflammatory disease", "genital warts",
+    "pubic lice", "sexual addiction", "porn-related stress", "consent confusion", "relationship abuse",
+]
+
+GROUPS = [
+    "teenagers", "college students", "newly married couples", "pregnant women", "new mothers",
+    "men over forty", "women over fifty", "older adults", "people with diabetes", "people with disabilities",
+    "LGBTQ+ people", "long-distance couples", "shift workers", "athletes", "people on antidepressants",
+    "cancer survivors", "people with heart disease", "sex workers", "first-time parents", "single adults",
+]
+
+SETTINGS = [
+    "in rural India", "in big cities", "after surgery", "during exams", "while travelling",
+    "after childbirth", "during fasting", "on a tight budget", "without health insurance", "at work",
+    "during the monsoon", "after a breakup", "while trying to conceive", "in joint families", "online",
+]
+
+FILLER = ("Talk to a qualified healthcare provider for advice on your situation, get tested regularly, "
+          "and keep communication with your partner open and honest. ")
+
+def max_documents() -> int:
+    return len(TEMPLATES) * len(TOPICS) * len(GROUPS) * len(SETTINGS)
+
+def _slots(combination: int) -> Tuple[int, str, str, str]:
+    combination, setting = divmod(combination, len(SETTINGS))
+    combination, group = divmod(combination, len(GROUPS))
+    template, topic = divmod(combination, len(TOPICS))
+    return template, TOPICS[topic], GROUPS[group], SETTINGS[setting]
+
+def generate(size: int, queries: int, seed: int = 0) -> Tuple[List[Dict[str, str]], List[Dict[str, str]]]:
+    """
+    Generate a corpus and labeled queries
+
+    Args:
+        size: Number of documents
+        queries: Number of labeled queries, each targeting a distinct document
+        seed: Random seed
+
+    Returns:
+        The documents ({"question", "answer"}) and the labeled queries ({"query", "question"})
+    """
+    if size > max_documents():
+        raise ValueError(f"At most {max_documents()} distinct synthetic documents can be generated")
+    rng = random.Random(seed)
+    documents = []
+    labeled = []
+    for combination in rng.sample(range(max_documents()), size):
+        template, topic, group, setting = _slots(combination)
+        question = TEMPLATES[template][0].format(topic=topic, group=group, setting=setting)
+        answer = f"For {group} {setting}, {topic} needs specific care. {FILLER * 3}"
+        documents.append({"question": question, "answer": answer})
+        if len(labeled) < queries:
+            labeled.append({"query": TEMPLATES[template][1].format(topic=topic, group=group, setting=setting),
+                            "question": question})
+    return documents, labeled
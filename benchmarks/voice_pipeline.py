@@ -0,0 +1,62 @@
+"""
+Voice pipeline benchmark
+
+Runs the websocket speech path against the local fake Sarvam client and
+compares time-to-first-audio of the sequential path (STT -> full LLM reply ->
+TTS of the whole reply) with the streaming pipeline (STT -> streamed LLM
+tokens -> per-sentence TTS).
+
+Usage:
+    python -m benchmarks.voice_pipeline --tts-latency 0.4
+"""
+
+import time
+import asyncio
+import argparse
+
+from app.fake_sarvam import FakeSarvamAI, silent_wav
+from app.sarvam_async import AsyncSarvamClient
+from app.voice_pipeline import stream_speech_reply
+
+async def sequential(sarvam: AsyncSarvamClient, audio: bytes) -> float:
+    start = time.perf_counter()
+    stt = await sarvam.transcribe(file=audio, model="saarika:v2.5", language_code="en-IN")
+    messages = [{"role": "user", "content": stt["transcript"]}]
+    response = await sarvam.chat_completions(model="sarvam-m", messages=messages, temperature=0.7)
+    reply = response["choices"][0]["message"]["content"]
+    await sarvam.text_to_speech(text=reply, target_language_code="en-IN", speaker="Anushka")
+    return time.perf_counter() - start
+
+async def pipelined(sarvam: AsyncSarvamClient, audio: bytes):
+    start = time.perf_counter()
+    stt = await sarvam.transcribe(file=audio, model="saarika:v2.5", language_code="en-IN")
+    messages = [{"role": "user", "content": stt["transcript"]}]
+    first_audio = None
+    chunks = 0
+    async for _ in stream_speech_reply(sarvam, messages):
+        chunks += 1
+        if first_audio is None:
+            first_audio = time.perf_counter() - start
+    return first_audio, time.perf_counter() - start, chunks
+
+async def main(args):
+    fake = FakeSarvamAI(stt_latency=args.stt_latency, first_token_latency=args.first_token_latency,
+                        token_latency=args.token_latency, tts_latency=args.tts_latency)
+    sarvam = AsyncSarvamClient(fake)
+    audio = silent_wav(1.0)
+
+    sequential_total = await sequential(sarvam, audio)
+    first_audio, pipelined_total, chunks = await pipelined(sarvam, audio)
+    sarvam.shutdown()
+
+    print(f"sequential: time-to-first-audio={sequential_total * 1000:7.0f}ms (single response)")
+    print(f"pipelined:  time-to-first-audio={first_audio * 1000:7.0f}ms "
+          f"last chunk={pipelined_total * 1000:7.0f}ms ({chunks} speech_chunk messages)")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare sequential and streamed speech replies")
+    parser.add_argument("--stt-latency", type=float, default=0.3)
+    parser.add_argument("--first-token-latency", type=float, default=0.3)
+    parser.add_argument("--token-latency", type=float, default=0.03)
+    parser.add_argument("--tts-latency", type=float, default=0.4)
+    asyncio.run(main(parser.parse_args()))
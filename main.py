@@ -3,21 +3,27 @@ import base64
 import json
 import logging
 from typing import List, Dict, Any, Optional
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect, UploadFile, File, Form, HTTPException, Depends
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect, UploadFile, File, Form, HTTPException, Depends, Header, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, FileResponse
+from fastapi.responses import JSONResponse, FileResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 import uvicorn
 from dotenv import load_dotenv
 from sarvamai import SarvamAI
 import asyncio
 import uuid
-import tempfile
-import shutil
+import hmac
 import wave
-from app.exotel import ExotelClient
-from app.sexual_wellness_routes import router as sexual_wellness_router
+from app.exotel import AsyncExotelClient, close_async_http_client as close_exotel_http_client
+from app.exotel_jobs import JobQueue, JobWorkers
+from app.exotel_calls import CallStore, TERMINAL_STATUSES
+from app.recordings import RecordingPipeline, transcript_indexer
+from app.sarvam_async import AsyncSarvamClient, audio_file
+from app.voice_pipeline import stream_speech_reply
+from app.sexual_wellness_routes import router as sexual_wellness_router, wellness_loader
+from app.api.practo import close_async_http_client
+from app.api.practo_routes import router as practo_router
 
 # Load environment variables
 load_dotenv()
@@ -48,25 +54,95 @@ app.add_middleware(
 # Include the sexual wellness router
 app.include_router(sexual_wellness_router)
 
+# Include the Practo router (calls are awaited on a pooled async client, bounded by PRACTO_CONCURRENCY)
+app.include_router(practo_router)
+
+@app.on_event("shutdown")
+async def shutdown_practo_pool():
+    await close_async_http_client()
+
 # Create static directory if it doesn't exist
 os.makedirs("static", exist_ok=True)
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
-# Initialize Sarvam AI client
-sarvam_api_key = os.getenv("SARVAM_API")
-if not sarvam_api_key:
-    raise ValueError("SARVAM_API environment variable not set")
+# Initialize Sarvam AI client (SARVAM_FAKE=1 uses a local stand-in for offline testing)
+if os.getenv("SARVAM_FAKE", "").lower() in ("1", "true", "yes"):
+    from app.fake_sarvam import FakeSarvamAI
+    logger.warning("SARVAM_FAKE is set, using the local fake Sarvam client")
+    sarvam_client = FakeSarvamAI()
+else:
+    sarvam_api_key = os.getenv("SARVAM_API")
+    if not sarvam_api_key:
+        raise ValueError("SARVAM_API environment variable not set")
+
+    sarvam_client = SarvamAI(api_subscription_key=sarvam_api_key)
+
+# Run all Sarvam calls on bounded worker pools so they never block the event loop
+sarvam = AsyncSarvamClient(sarvam_client)
 
-sarvam_client = SarvamAI(api_subscription_key=sarvam_api_key)
+@app.on_event("shutdown")
+def shutdown_sarvam_pools():
+    sarvam.shutdown()
 
-# Initialize Exotel client
+# Initialize Exotel client (pooled async HTTP client, shared by the single and bulk routes)
 try:
-    exotel_client = ExotelClient()
+    exotel_client = AsyncExotelClient()
     logger.info("Exotel client initialized successfully")
 except ValueError as e:
     logger.warning(f"Exotel client initialization failed: {str(e)}")
     exotel_client = None
 
+# Call state from status callbacks, so details and recordings are not fetched from Exotel on every poll
+exotel_calls = CallStore() if exotel_client else None
+
+def track_placed_call(job: Dict[str, Any], response: Dict[str, Any]):
+    """Answer details of a queued call locally once placed, if its status callbacks come here"""
+    # A caller-supplied callback elsewhere means this app never hears the call finish
+    callback = job["payload"].get("status_callback") or exotel_client.status_callback_url
+    if job["kind"] == "call" and callback and callback == exotel_client.status_callback_url:
+        exotel_calls.track(response.get("Call") or {})
+
+def wellness_encoder():
+    """The wellness agent's embedding model, shared so indexing transcripts does not load a second one"""
+    return wellness_loader.load().vector_db.model
+
+# Recordings are downloaded, transcribed and indexed into the call transcript vector DB
+recording_pipeline = RecordingPipeline(sarvam, exotel_client.http, exotel_client.auth,
+                                       index=transcript_indexer(encoder=wellness_encoder)) if exotel_client else None
+transcription_tasks = set()
+
+def transcribe_in_background(call_sid: str, url: str):
+    """Run a recording through the pipeline without holding up the caller"""
+    async def run():
+        try:
+            await recording_pipeline.process(call_sid, url)
+        except Exception as e:
+            logger.error(f"Error transcribing recording of call {call_sid}: {str(e)}")
+
+    task = asyncio.ensure_future(run())
+    transcription_tasks.add(task)
+    task.add_done_callback(transcription_tasks.discard)
+
+# Single calls and SMS are queued on disk and sent by background workers (EXOTEL_JOB_WORKERS)
+exotel_jobs = JobQueue() if exotel_client else None
+exotel_workers = JobWorkers(exotel_jobs, exotel_client, on_success=track_placed_call) if exotel_client else None
+
+@app.on_event("startup")
+async def start_exotel_workers():
+    if exotel_workers:
+        exotel_workers.start()
+    if exotel_client and not os.getenv("EXOTEL_CALLBACK_TOKEN"):
+        logger.warning("EXOTEL_CALLBACK_TOKEN is not set, so anyone who can reach /api/exotel/status-callback "
+                       "can change the state of tracked calls; set it and add ?token= to the callback URL")
+        if os.getenv("EXOTEL_TRANSCRIBE_RECORDINGS", "false").lower() in ("1", "true", "yes"):
+            logger.warning("EXOTEL_TRANSCRIBE_RECORDINGS is ignored until EXOTEL_CALLBACK_TOKEN is set")
+
+@app.on_event("shutdown")
+async def shutdown_exotel_pool():
+    if exotel_workers:
+        await exotel_workers.stop()
+    await close_exotel_http_client()
+
 # Models for request/response
 class ChatMessage(BaseModel):
     role: str
@@ -106,6 +182,23 @@ class ExotelSmsRequest(BaseModel):
     priority: str = "normal"
     encoding_type: str = "plain"
 
+class ExotelBulkSmsRequest(BaseModel):
+    from_number: str
+    recipients: List[str] = Field(..., min_length=1, max_length=10000)
+    body: str
+    priority: str = "normal"
+    encoding_type: str = "plain"
+    concurrency: Optional[int] = Field(None, ge=1, le=64)
+
+class ExotelBulkCallRequest(BaseModel):
+    from_numbers: List[str] = Field(..., min_length=1, max_length=10000)
+    to_number: str
+    caller_id: str
+    call_type: str = "trans"
+    time_limit: int = 14400
+    status_callback: Optional[str] = None
+    concurrency: Optional[int] = Field(None, ge=1, le=64)
+
 class ExotelCallDetailsRequest(BaseModel):
     call_sid: str
 
@@ -160,6 +253,11 @@ def audio_to_base64(audio_bytes: bytes) -> str:
 def root():
     return {"message": "Welcome to Dr. Gupt AI Assistant API"}
 
+@app.get("/health")
+def health():
+    """Liveness check; available as soon as the server is up, before any model is loaded"""
+    return {"status": "ok", "sexual_wellness": wellness_loader.status()["status"]}
+
 @app.get("/sexual-wellness")
 def sexual_wellness_page():
     return FileResponse("static/sexual_wellness.html")
@@ -179,7 +277,7 @@ async def chat_completion(request: ChatRequest):
         if request.max_tokens:
             payload["max_tokens"] = request.max_tokens
             
-        response = sarvam_client.chat.completions(**payload)
+        response = await sarvam.chat_completions(**payload)
         
         return response
     except Exception as e:
@@ -189,22 +287,14 @@ async def chat_completion(request: ChatRequest):
 @app.post("/api/speech-to-text")
 async def speech_to_text(file: UploadFile = File(...), language_code: str = Form("en-IN"), model: str = Form("saarika:v2.5")):
     try:
-        # Create a temporary file to store the uploaded audio
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as temp_file:
-            # Copy the uploaded file to the temporary file
-            shutil.copyfileobj(file.file, temp_file)
-            temp_file_path = temp_file.name
-        
-        # Process the audio file
-        with open(temp_file_path, "rb") as audio_file:
-            response = sarvam_client.speech_to_text.transcribe(
-                file=audio_file,
-                model=model,
-                language_code=language_code
-            )
-        
-        # Clean up the temporary file
-        os.unlink(temp_file_path)
+        # The upload is already spooled (in memory, or on disk past 1MB), so hand it to Sarvam as is.
+        # It is closed once the SDK stops reading it, which after a timeout is later than this returns.
+        response = await sarvam.transcribe(
+            file=audio_file(file.file, file.filename or "audio.wav", file.content_type or "audio/wav"),
+            on_done=file.file.close,
+            model=model,
+            language_code=language_code
+        )
         
         return response
     except Exception as e:
@@ -214,7 +304,7 @@ async def speech_to_text(file: UploadFile = File(...), language_code: str = Form
 @app.post("/api/text-to-speech")
 async def text_to_speech(request: TextToSpeechRequest):
     try:
-        response = sarvam_client.text_to_speech.convert(
+        response = await sarvam.text_to_speech(
             text=request.text,
             target_language_code=request.target_language_code,
             speaker=request.speaker,
@@ -255,7 +345,7 @@ async def websocket_endpoint(websocket: WebSocket, client_id: str):
                 
                 # Get AI response
                 try:
-                    response = sarvam_client.chat.completions(
+                    response = await sarvam.chat_completions(
                         model="sarvam-m",
                         messages=conversation_history,
                         temperature=0.7
@@ -287,26 +377,58 @@ async def websocket_endpoint(websocket: WebSocket, client_id: str):
                     audio_base64 = message_data.get("audio", "")
                     audio_bytes = base64_to_audio(audio_base64)
                     
-                    # Save audio to temporary file
-                    with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as temp_file:
-                        temp_file.write(audio_bytes)
-                        temp_file_path = temp_file.name
-                    
-                    # Process speech to text
-                    with open(temp_file_path, "rb") as audio_file:
-                        stt_response = sarvam_client.speech_to_text.transcribe(
-                            file=audio_file,
-                            model="saarika:v2.5",
-                            language_code=message_data.get("language_code", "en-IN")
-                        )
-                    
-                    # Clean up temporary file
-                    os.unlink(temp_file_path)
+                    # Process speech to text straight from the decoded bytes
+                    stt_response = await sarvam.transcribe(
+                        file=audio_file(audio_bytes, "speech.wav"),
+                        model="saarika:v2.5",
+                        language_code=message_data.get("language_code", "en-IN")
+                    )
                     
                     transcript = stt_response.get("transcript", "")
                     
                     # Add transcript to conversation history
-                    if transcript:
+                    if transcript and message_data.get("stream"):
+                        conversation_history.append({"role": "user", "content": transcript})
+                        
+                        await manager.send_message(
+                            client_id,
+                            json.dumps({
+                                "type": "speech_transcript",
+                                "transcript": transcript
+                            })
+                        )
+                        
+                        # Stream the reply: each sentence is synthesized as soon as the LLM completes it
+                        sentences = []
+                        async for chunk in stream_speech_reply(
+                            sarvam,
+                            list(conversation_history),
+                            target_language_code=message_data.get("target_language_code", "en-IN"),
+                            speaker="Anushka"
+                        ):
+                            sentences.append(chunk["text"])
+                            await manager.send_message(
+                                client_id,
+                                json.dumps({
+                                    "type": "speech_chunk",
+                                    "index": chunk["index"],
+                                    "text": chunk["text"],
+                                    "audio": chunk["audio"]  # Base64 encoded audio
+                                })
+                            )
+                        
+                        ai_message = " ".join(sentences)
+                        conversation_history.append({"role": "assistant", "content": ai_message})
+                        
+                        await manager.send_message(
+                            client_id,
+                            json.dumps({
+                                "type": "speech_done",
+                                "transcript": transcript,
+                                "message": ai_message
+                            })
+                        )
+                    elif transcript:
                         conversation_history.append({"role": "user", "content": transcript})
                         
                         # Get AI response
@@ -316,13 +438,13 @@ async def websocket_endpoint(websocket: WebSocket, client_id: str):
                             "temperature": 0.7
                         }
                         
-                        response = sarvam_client.chat.completions(**payload)
+                        response = await sarvam.chat_completions(**payload)
                         
                         ai_message = response['choices'][0]['message']['content']
                         conversation_history.append({"role": "assistant", "content": ai_message})
                         
                         # Convert AI response to speech
-                        tts_response = sarvam_client.text_to_speech.convert(
+                        tts_response = await sarvam.text_to_speech(
                             text=ai_message,
                             target_language_code=message_data.get("target_language_code", "en-IN"),
                             speaker="Anushka"
@@ -378,54 +500,191 @@ def get_exotel_client():
         raise HTTPException(status_code=503, detail="Exotel client not initialized")
     return exotel_client
 
-@app.post("/api/exotel/call")
-async def make_call(request: ExotelCallRequest, client: ExotelClient = Depends(get_exotel_client)):
+async def enqueue_exotel_job(kind: str, payload: Dict[str, Any], idempotency_key: Optional[str]) -> JSONResponse:
+    """Queue an Exotel request and answer 202 with its job, or 200 with the job an idempotency key already made"""
+    # SQLite may wait on another process's write lock, so keep it off the event loop
+    job, created = await asyncio.get_running_loop().run_in_executor(
+        None, exotel_jobs.enqueue, kind, payload, idempotency_key)
+    if created:
+        exotel_workers.notify()
+    return JSONResponse(status_code=202 if created else 200, content={"job_id": job["id"], "status": job["status"]})
+
+@app.post("/api/exotel/call", status_code=202)
+async def make_call(request: ExotelCallRequest, client: AsyncExotelClient = Depends(get_exotel_client),
+                    idempotency_key: Optional[str] = Header(None)):
+    """
+    Queue an outbound call and return its job ID at once
+
+    The call is placed by a background worker, retried if Exotel is throttling
+    or briefly unavailable; poll /api/exotel/jobs/{job_id} for the outcome.
+    Resubmitting with the same Idempotency-Key header returns the original job
+    instead of placing a second call. Keys are scoped to the kind of request,
+    so a call and an SMS may use the same key.
+    """
+    return await enqueue_exotel_job("call", request.dict(), idempotency_key)
+
+@app.post("/api/exotel/sms", status_code=202)
+async def send_sms(request: ExotelSmsRequest, client: AsyncExotelClient = Depends(get_exotel_client),
+                   idempotency_key: Optional[str] = Header(None)):
+    """
+    Queue an SMS and return its job ID at once (see /api/exotel/call)
+    """
+    return await enqueue_exotel_job("sms", request.dict(), idempotency_key)
+
+@app.get("/api/exotel/jobs/{job_id}")
+async def get_exotel_job(job_id: str, client: AsyncExotelClient = Depends(get_exotel_client)):
+    """
+    Status of a queued call or SMS: queued, running, succeeded (with Exotel's
+    response as `result`) or failed (with the last `error`)
+    """
+    job = await asyncio.get_running_loop().run_in_executor(None, exotel_jobs.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@app.post("/api/exotel/status-callback")
+async def exotel_status_callback(request: Request, token: Optional[str] = None,
+                                 client: AsyncExotelClient = Depends(get_exotel_client)):
+    """
+    Receive a call status callback from Exotel and record the transition
+
+    Calls placed through this app point here when EXOTEL_STATUS_CALLBACK_URL is
+    set. When EXOTEL_CALLBACK_TOKEN is set, the URL must carry it as ?token=.
+    Only calls this app placed or looked up take their state from callbacks.
+    Accepts form-encoded (as Exotel posts) or JSON bodies. With
+    EXOTEL_TRANSCRIBE_RECORDINGS set, a finished call's recording is transcribed
+    and indexed in the background; that also needs EXOTEL_CALLBACK_TOKEN.
+    """
+    expected = os.getenv("EXOTEL_CALLBACK_TOKEN")
+    if expected and not hmac.compare_digest(token or "", expected):
+        raise HTTPException(status_code=403, detail="Invalid callback token")
+    if request.headers.get("content-type", "").startswith("application/json"):
+        payload = await request.json()
+    else:
+        payload = dict(await request.form())
     try:
-        response = client.make_call(
-            from_number=request.from_number,
-            to_number=request.to_number,
-            caller_id=request.caller_id,
-            call_type=request.call_type,
-            time_limit=request.time_limit,
-            status_callback=request.status_callback
-        )
-        return response
-    except Exception as e:
-        logger.error(f"Error making Exotel call: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Failed to make call: {str(e)}")
-
-@app.post("/api/exotel/sms")
-async def send_sms(request: ExotelSmsRequest, client: ExotelClient = Depends(get_exotel_client)):
-    try:
-        response = client.send_sms(
-            from_number=request.from_number,
-            to_number=request.to_number,
-            body=request.body,
-            priority=request.priority,
-            encoding_type=request.encoding_type
-        )
-        return response
-    except Exception as e:
-        logger.error(f"Error sending Exotel SMS: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Failed to send SMS: {str(e)}")
+        call = exotel_calls.record_callback(payload)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if call is None:
+        return {"status": "ignored"}
+    logger.info(f"Exotel call {call['Sid']} is {call.get('Status')}")
+    # Only with a callback token: otherwise anyone could have the server fetch a URL of their choosing
+    auto_transcribe = (os.getenv("EXOTEL_TRANSCRIBE_RECORDINGS", "false").lower() in ("1", "true", "yes")
+                       and bool(expected))
+    if auto_transcribe and payload.get("RecordingUrl") and call.get("Status") in TERMINAL_STATUSES:
+        transcribe_in_background(call["Sid"], payload["RecordingUrl"])
+    return {"status": "ok"}
 
 @app.get("/api/exotel/call/{call_sid}")
-async def get_call_details(call_sid: str, client: ExotelClient = Depends(get_exotel_client)):
+async def get_call_details(call_sid: str, client: AsyncExotelClient = Depends(get_exotel_client)):
+    """
+    Call details, from the local call state when known, else from Exotel
+    """
     try:
-        response = client.get_call_details(call_sid)
+        response = await exotel_calls.call_details(call_sid, client.get_call_details)
         return response
     except Exception as e:
         logger.error(f"Error getting call details: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to get call details: {str(e)}")
 
 @app.get("/api/exotel/call/{call_sid}/recordings")
-async def get_call_recordings(call_sid: str, client: ExotelClient = Depends(get_exotel_client)):
+async def get_call_recordings(call_sid: str, client: AsyncExotelClient = Depends(get_exotel_client)):
+    """
+    Call recordings, from the local call state when known, else from Exotel
+    """
     try:
-        response = client.get_call_recordings(call_sid)
+        response = await exotel_calls.recordings(call_sid, client.get_call_recordings)
         return response
     except Exception as e:
         logger.error(f"Error getting call recordings: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to get call recordings: {str(e)}")
 
+@app.post("/api/exotel/call/{call_sid}/transcribe")
+async def transcribe_call_recordings(call_sid: str, client: AsyncExotelClient = Depends(get_exotel_client)):
+    """
+    Download, transcribe and index a call's recordings
+
+    Long recordings are transcribed in chunks of EXOTEL_STT_CHUNK_SECONDS on the
+    bounded speech-to-text pool; returns the transcript segments per recording.
+    """
+    try:
+        recordings = await exotel_calls.recordings(call_sid, client.get_call_recordings)
+    except Exception as e:
+        logger.error(f"Error getting call recordings: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to get call recordings: {str(e)}")
+    urls = [recording.get("Url") or recording.get("RecordingUrl") for recording in recordings.get("Recordings") or []]
+    urls = [url for url in urls if url]
+    if not urls:
+        raise HTTPException(status_code=404, detail="No recordings for this call")
+    # Several recordings of one call are saved under distinct names
+    sids = [call_sid] + [f"{call_sid}-{i}" for i in range(1, len(urls))]
+    results = [result async for result in recording_pipeline.run(zip(sids, urls))]
+    failed = [result for result in results if "error" in result]
+    if failed and len(failed) == len(results):
+        raise HTTPException(status_code=502, detail=f"Failed to transcribe recordings: {failed[0]['error']}")
+    return {"call_sid": call_sid, "recordings": results}
+
+@app.get("/api/exotel/recordings/stats")
+async def get_recording_pipeline_stats(client: AsyncExotelClient = Depends(get_exotel_client)):
+    """Recordings transcribed, audio minutes and time spent per stage"""
+    return recording_pipeline.stats()
+
+@app.get("/api/exotel/call/{call_sid}/events")
+async def get_call_events(call_sid: str, client: AsyncExotelClient = Depends(get_exotel_client)):
+    """Status transitions received for a call, oldest first"""
+    return {"call_sid": call_sid, "events": exotel_calls.events(call_sid)}
+
+@app.get("/api/exotel/calls/stats")
+async def get_call_store_stats(client: AsyncExotelClient = Depends(get_exotel_client)):
+    """Calls tracked, callbacks received and how many lookups the local state answered"""
+    return exotel_calls.stats()
+
+def stream_results(results) -> StreamingResponse:
+    """Stream per-recipient bulk send results as NDJSON, one line each as it completes"""
+    async def lines():
+        async for result in results:
+            yield json.dumps(result, ensure_ascii=False) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+@app.post("/api/exotel/sms/bulk")
+async def send_bulk_sms(request: ExotelBulkSmsRequest, client: AsyncExotelClient = Depends(get_exotel_client)):
+    """
+    Send the same SMS to a batch of recipients
+
+    Sends run concurrently (up to EXOTEL_BULK_CONCURRENCY, or `concurrency`) within
+    the EXOTEL_RATE_LIMIT budget. Each recipient's result is streamed back as an
+    NDJSON line as soon as its send completes; a failed send does not stop the batch.
+    """
+    logger.info(f"Sending bulk SMS to {len(request.recipients)} recipients")
+    return stream_results(client.send_bulk_sms(
+        from_number=request.from_number,
+        recipients=request.recipients,
+        body=request.body,
+        priority=request.priority,
+        encoding_type=request.encoding_type,
+        concurrency=request.concurrency
+    ))
+
+@app.post("/api/exotel/call/bulk")
+async def make_bulk_calls(request: ExotelBulkCallRequest, client: AsyncExotelClient = Depends(get_exotel_client)):
+    """
+    Place a call campaign, connecting each of `from_numbers` to `to_number`
+
+    Calls are placed concurrently within the rate budget and results streamed as
+    NDJSON, as for /api/exotel/sms/bulk.
+    """
+    logger.info(f"Placing {len(request.from_numbers)} bulk calls")
+    return stream_results(client.make_bulk_calls(
+        from_numbers=request.from_numbers,
+        to_number=request.to_number,
+        caller_id=request.caller_id,
+        call_type=request.call_type,
+        time_limit=request.time_limit,
+        status_callback=request.status_callback,
+        concurrency=request.concurrency
+    ))
+
 if __name__ == "__main__":
     uvicorn.run("app:app", host="0.0.0.0", port=8000, reload=True)
@@ -13,6 +13,8 @@ document.addEventListener('DOMContentLoaded', () => {
     let mediaRecorder;
     let audioChunks = [];
     let stream;
+    let audioQueue = [];
+    let isPlayingQueue = false;
 
     // Connect to WebSocket
     function connectWebSocket() {
@@ -51,6 +53,17 @@ document.addEventListener('DOMContentLoaded', () => {
                 addMessage(data.message, 'assistant');
                 playAudio(data.audio);
                 break;
+            case 'speech_transcript':
+                addMessage(data.transcript, 'user');
+                updateStatus('Responding...');
+                break;
+            case 'speech_chunk':
+                enqueueAudio(data.audio);
+                break;
+            case 'speech_done':
+                addMessage(data.message, 'assistant');
+                updateStatus('Connected');
+                break;
             case 'error':
                 updateStatus(`Error: ${data.message}`);
                 addSystemMessage(`Error: ${data.message}`);
@@ -173,7 +186,8 @@ document.addEventListener('DOMContentLoaded', () => {
                     type: 'speech',
                     audio: base64Audio,
                     language_code: 'en-IN',
-                    target_language_code: 'en-IN'
+                    target_language_code: 'en-IN',
+                    stream: true
                 };
                 
                 socket.send(JSON.stringify(data));
@@ -195,6 +209,29 @@ document.addEventListener('DOMContentLoaded', () => {
         });
     }
 
+    // Play streamed audio chunks one after another, in arrival order
+    function enqueueAudio(base64Audio) {
+        audioQueue.push(base64Audio);
+        if (!isPlayingQueue) {
+            playNextChunk();
+        }
+    }
+
+    function playNextChunk() {
+        const base64Audio = audioQueue.shift();
+        if (!base64Audio) {
+            isPlayingQueue = false;
+            return;
+        }
+        isPlayingQueue = true;
+        const audio = new Audio(`data:audio/wav;base64,${base64Audio}`);
+        audio.onended = playNextChunk;
+        audio.play().catch(error => {
+            console.error('Error playing audio chunk:', error);
+            playNextChunk();
+        });
+    }
+
     // Update status indicator
     function updateStatus(message) {
         statusText.textContent = message;